@@ -0,0 +1,70 @@
+"""
+Benchmarks for planning the audio splits: FFmpegSplitter._get_splits and plan_fixed_splits
+for episodes from half an hour to a hundred hours, and the VAD-driven VADSplitPlanner.
+"""
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from audio_processing import FFmpegSplitter, VADSplitPlanner, plan_fixed_splits
+
+from synthetic import synthetic_audio, synthetic_turns_for_duration
+
+
+class SplitPlanningSuite:
+    params = [1800, 10 * 3600, 100 * 3600]
+    param_names = ['duration_s']
+
+    def setup(self, duration_s):
+        self.directory = tempfile.TemporaryDirectory()
+        directory = Path(self.directory.name)
+        self.splitter = FFmpegSplitter("FFmpegSplitter", directory / 'episode.wav', directory, duration_s, 3600, 300)
+
+    def teardown(self, duration_s):
+        self.directory.cleanup()
+
+    def time_get_splits(self, duration_s):
+        self.splitter._get_splits(duration_s)
+
+    def time_plan_fixed_splits(self, duration_s):
+        plan_fixed_splits(duration_s, 3600, 300)
+
+    def track_num_splits(self, duration_s):
+        return len(self.splitter._get_splits(duration_s))
+
+
+class VADSplitPlannerSuite:
+    """VADSplitPlanner on synthetic conversations, whose pauses are quiet noise"""
+    params = [2 * 3600, 4 * 3600]
+    param_names = ['duration_s']
+
+    def setup(self, duration_s):
+        self.turns = synthetic_turns_for_duration(duration_s, num_speakers=3)
+        self.audio = synthetic_audio(duration_s, self.turns)
+        self.vad_done = self.planner()
+        self.vad_done.speech
+
+    def planner(self) -> VADSplitPlanner:
+        return VADSplitPlanner("VADSplitPlanner", self.audio, 3600, 30)
+
+    def time_plan(self, duration_s):
+        self.planner().plan(duration_s)
+
+    def time_choose_cuts(self, duration_s):
+        # the cost of choosing the cuts once the VAD pass is done
+        self.vad_done.choose_cuts(duration_s)
+
+    def track_overlap_s(self, duration_s):
+        """Audio diarized twice with VAD splits, against the default 300 s per boundary of fixed splits"""
+        splits = self.planner().plan(duration_s)
+        vad = sum(previous.end_time_s - split.start_time_s for previous, split in zip(splits, splits[1:]))
+        fixed = 300 * (len(plan_fixed_splits(duration_s, 3600, 300)) - 1)
+        return f'{vad:.0f} s vs {fixed} s fixed'
+
+    def track_cuts_in_pauses(self, duration_s):
+        """Fraction of cuts, the midpoints of the overlaps, that fall outside every turn"""
+        splits = self.planner().plan(duration_s)
+        cuts = [(previous.end_time_s + split.start_time_s) / 2 for previous, split in zip(splits, splits[1:])]
+        in_turn = [np.any((self.turns.start_s <= cut) & (cut < self.turns.end_s)) for cut in cuts]
+        return f'{1 - np.mean(in_turn):.2f} of {len(cuts)}'
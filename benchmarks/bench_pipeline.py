@@ -0,0 +1,75 @@
+"""
+End-to-end benchmark of pipeline.Pipeline with stub models, see stubs.py.
+
+Whisper, WhisperX and NeMo are replaced by stubs that answer from the synthetic fixtures,
+so what is timed is the pipeline's own overhead: decoding checkpoints, splitting, word
+storage, combining, mapping, realignment and output. The overhead is reported as a
+real-time factor, seconds of processing per second of audio with the model stages left out.
+"""
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import stubs
+
+stubs.install()
+
+from pipeline import Pipeline, PipelineOptions  # noqa: E402
+
+from synthetic import synthetic_audio, synthetic_turns_for_duration  # noqa: E402
+
+MODEL_STAGES = ('whisper', 'align', 'nemo_split_')
+
+
+def model_wall_s(metrics: dict) -> float:
+    return sum(values['wall_s'] for stage, values in metrics['stages'].items() if stage.startswith(MODEL_STAGES))
+
+
+class PipelineSuite:
+    params = ([600, 4800], ['overlap', 'start'])
+    param_names = ['duration_s', 'word_mapping']
+    # each run writes every checkpoint and output again, a handful of runs is enough
+    number = 1
+    repeat = 3
+
+    def setup(self, duration_s, word_mapping):
+        self.directory = tempfile.TemporaryDirectory()
+        directory = Path(self.directory.name)
+
+        self.audio = synthetic_audio(duration_s, synthetic_turns_for_duration(duration_s, stubs.NUM_SPEAKERS))
+        self.audio_in = self.audio.write_wav(directory / 'episode.wav')
+        self.output_dir = directory / 'output'
+        self.output_dir.mkdir()
+
+        self.options = PipelineOptions(
+            model_size='stub',
+            split_length_s=1800,
+            split_overlap_s=300,
+            word_mapping=word_mapping,
+            resume=False,
+            )
+
+    def teardown(self, duration_s, word_mapping):
+        self.directory.cleanup()
+
+    def run(self, resume: bool = False) -> dict:
+        self.options.resume = resume
+        with Pipeline("Pipeline", self.options) as pipeline:
+            return pipeline.run(self.audio_in, self.output_dir, audio=self.audio)
+
+    def time_run(self, duration_s, word_mapping):
+        self.run()
+
+    def time_run_resumed(self, duration_s, word_mapping):
+        # every stage is a checkpoint hit after the first run
+        self.run(resume=True)
+
+    def track_overhead_real_time_factor(self, duration_s, word_mapping):
+        start = perf_counter()
+        metrics = self.run()
+        elapsed_s = perf_counter() - start
+        return f'{(elapsed_s - model_wall_s(metrics)) / duration_s:.5f}'
+
+    def track_stage_wall_s(self, duration_s, word_mapping):
+        metrics = self.run()
+        return {stage: round(values['wall_s'], 3) for stage, values in metrics['stages'].items()}
@@ -0,0 +1,211 @@
+"""
+Benchmarks for punctuation_realignment: get_realigned_ws_mapping_with_punctuation, its
+WordTable variant, and the sentence mapping that follows it.
+
+The legacy_* functions are the previous window-scanning implementation, kept as the
+reference for both speed and output.
+"""
+from typing import Optional
+
+import numpy as np
+
+from punctuation_realignment import (
+    get_realigned_ws_mapping_with_punctuation,
+    get_sentences_speaker_mapping,
+    get_sentences_speaker_mapping_from_table,
+    realign_word_table,
+)
+from utils import WordTable, get_words_speaker_mapping
+
+from synthetic import rttm_speaker_timestamps, synthetic_turns_for_duration, synthetic_words
+
+sentence_ending_punctuations = '.?!'
+
+
+def synthetic_word_speaker_mapping(
+    num_words: int,
+    num_speakers: int = 3,
+    seed: int = 0,
+    speaker_labels: Optional[list[int]] = None,
+    terminated: bool = True,
+    ) -> list[dict]:
+    """
+    Words in sentences of 1-60 words, speakers in turns of 5-200 words with some isolated
+    mislabelled words. Speakers are 0 to num_speakers - 1, or drawn from speaker_labels.
+    The transcript ends with a full stop unless terminated is False.
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.array(speaker_labels if speaker_labels is not None else range(num_speakers))
+
+    is_end = np.zeros(num_words, dtype=bool)
+    is_end[np.cumsum(rng.integers(1, 60, num_words))[:num_words] .clip(max=num_words - 1)] = True
+    is_end[-1] = terminated
+    punctuation = rng.choice(list(sentence_ending_punctuations), num_words)
+
+    turn_lengths = rng.integers(5, 200, num_words // 5 + 1)
+    speakers = np.repeat(rng.choice(labels, len(turn_lengths)), turn_lengths)[:num_words]
+    noise = rng.random(num_words) < 0.02
+    speakers[noise] = rng.choice(labels, noise.sum())
+
+    return [
+        {
+            'word': 'word' + (punctuation[i] if is_end[i] else ''),
+            'start_time': i * 300,
+            'end_time': i * 300 + 250,
+            'speaker': int(speakers[i]),
+        }
+        for i in range(num_words)
+    ]
+
+
+def legacy_get_first_word_idx_of_sentence(word_idx, word_list, speaker_list, max_words):
+    is_word_sentence_end = lambda x: x >= 0 and word_list[x][-1] in sentence_ending_punctuations
+    left_idx = word_idx
+    while (left_idx > 0 and word_idx - left_idx < max_words and
+            speaker_list[left_idx - 1] == speaker_list[left_idx] and
+            not is_word_sentence_end(left_idx - 1)):
+        left_idx -= 1
+
+    return left_idx if left_idx == 0 or is_word_sentence_end(left_idx - 1) else -1
+
+
+def legacy_get_last_word_idx_of_sentence(word_idx, word_list, max_words):
+    is_word_sentence_end = lambda x: x >= 0 and word_list[x][-1] in sentence_ending_punctuations
+    right_idx = word_idx
+    while (right_idx < len(word_list) and right_idx - word_idx < max_words and
+            not is_word_sentence_end(right_idx)):
+        right_idx += 1
+
+    return right_idx if right_idx == len(word_list) - 1 or is_word_sentence_end(right_idx) else -1
+
+
+def legacy_get_realigned_ws_mapping_with_punctuation(word_speaker_mapping, max_words_in_sentence = 50):
+    is_word_sentence_end = lambda x: x >= 0 and word_speaker_mapping[x]['word'][-1] in sentence_ending_punctuations
+    wsp_len = len(word_speaker_mapping)
+
+    words_list, speaker_list = [], []
+    for k, line_dict in enumerate(word_speaker_mapping):
+        word, speaker = line_dict['word'], line_dict['speaker']
+        words_list.append(word)
+        speaker_list.append(speaker)
+
+    k = 0
+    while k < len(word_speaker_mapping):
+        line_dict = word_speaker_mapping[k]
+        if k < wsp_len - 1 and speaker_list[k] != speaker_list[k + 1] and not is_word_sentence_end(k):
+            left_idx = legacy_get_first_word_idx_of_sentence(k, words_list, speaker_list, max_words_in_sentence)
+            right_idx = legacy_get_last_word_idx_of_sentence(k, words_list, max_words_in_sentence - k + left_idx - 1) if left_idx > -1 else -1
+            if min(left_idx, right_idx) == -1:
+                k += 1
+                continue
+
+            spk_labels = speaker_list[left_idx: right_idx + 1]
+            mod_speaker = max(set(spk_labels), key=spk_labels.count)
+            if spk_labels.count(mod_speaker) < len(spk_labels) // 2:
+                k += 1
+                continue
+
+            speaker_list[left_idx: right_idx + 1] = [mod_speaker] * (right_idx - left_idx + 1)
+            k = right_idx
+
+        k += 1
+
+    k, realigned_list = 0, []
+    while k < len(word_speaker_mapping):
+        line_dict = word_speaker_mapping[k].copy()
+        line_dict['speaker'] = speaker_list[k]
+        realigned_list.append(line_dict)
+        k += 1
+
+    return realigned_list
+
+
+def tied_word_speaker_mapping(label_pairs: list[tuple[int, int]], sentence_words: int = 10) -> list[dict]:
+    """
+    One sentence per pair of labels, its first half spoken by one and its second half by
+    the other, so every sentence is a tie, the last sentence without final punctuation.
+    """
+    words = []
+    for first, second in label_pairs:
+        half = sentence_words // 2
+        for i, speaker in enumerate([first] * half + [second] * (sentence_words - half)):
+            words.append({
+                'word': 'word' + ('.' if i == sentence_words - 1 else ''),
+                'start_time': len(words) * 300,
+                'end_time': len(words) * 300 + 250,
+                'speaker': speaker,
+            })
+    words[-1]['word'] = 'word'
+    return words
+
+
+def identical_to_legacy(word_speaker_mapping: list[dict]) -> bool:
+    """
+    Whether realignment gives the legacy speakers. The legacy code raises IndexError on
+    an unterminated final sentence, so it gets the transcript with a full stop added,
+    which is how the new code treats the last sentence.
+    """
+    legacy_input = [line_dict.copy() for line_dict in word_speaker_mapping]
+    if legacy_input and legacy_input[-1]['word'][-1] not in sentence_ending_punctuations:
+        legacy_input[-1]['word'] += '.'
+
+    speakers = [line_dict['speaker'] for line_dict in get_realigned_ws_mapping_with_punctuation(word_speaker_mapping)]
+    legacy_speakers = [line_dict['speaker'] for line_dict in legacy_get_realigned_ws_mapping_with_punctuation(legacy_input)]
+    return speakers == legacy_speakers
+
+
+class RealignmentSuite:
+    params = [50_000, 100_000, 500_000]
+    param_names = ['num_words']
+
+    def setup(self, num_words):
+        self.wsm = synthetic_word_speaker_mapping(num_words)
+
+    def time_realign(self, num_words):
+        get_realigned_ws_mapping_with_punctuation(self.wsm)
+
+    def time_realign_inplace(self, num_words):
+        # repeated in-place runs are idempotent, the first one already realigned the words
+        get_realigned_ws_mapping_with_punctuation(self.wsm, inplace=True)
+
+    def time_legacy_realign(self, num_words):
+        legacy_get_realigned_ws_mapping_with_punctuation(self.wsm)
+
+    def track_identical_to_legacy(self, num_words):
+        return get_realigned_ws_mapping_with_punctuation(self.wsm) == legacy_get_realigned_ws_mapping_with_punctuation(self.wsm)
+
+    def track_identical_to_legacy_unterminated(self, num_words):
+        # labels of 8 and up, where set order no longer follows the label order
+        return identical_to_legacy(
+            synthetic_word_speaker_mapping(num_words, speaker_labels=[1, 8, 9, 10, 17], terminated=False))
+
+    def track_identical_to_legacy_ties(self, num_words):
+        pairs = [(1, 8), (8, 1), (8, 9), (9, 8), (10, 8), (9, 10), (16, 0), (17, 9), (3, 11)]
+        return identical_to_legacy(tied_word_speaker_mapping(pairs * (num_words // (10 * len(pairs)))))
+
+
+class SentenceMappingSuite:
+    """Realignment and sentence mapping of a whole synthetic conversation, as the pipeline runs them"""
+    params = ([3600, 4 * 3600], [2, 6])
+    param_names = ['duration_s', 'num_speakers']
+
+    def setup(self, duration_s, num_speakers):
+        turns = synthetic_turns_for_duration(duration_s, num_speakers)
+        self.spk_ts = rttm_speaker_timestamps(turns)
+        self.wsm = get_words_speaker_mapping(synthetic_words(turns), self.spk_ts)
+        self.words = WordTable.from_records(self.wsm)
+
+    def time_realign(self, duration_s, num_speakers):
+        get_realigned_ws_mapping_with_punctuation(self.wsm)
+
+    def time_realign_word_table(self, duration_s, num_speakers):
+        realign_word_table(self.words)
+
+    def time_get_sentences_speaker_mapping(self, duration_s, num_speakers):
+        get_sentences_speaker_mapping(self.wsm, self.spk_ts)
+
+    def time_get_sentences_speaker_mapping_from_table(self, duration_s, num_speakers):
+        get_sentences_speaker_mapping_from_table(self.words)
+
+    def track_num_sentences(self, duration_s, num_speakers):
+        return len(get_sentences_speaker_mapping_from_table(realign_word_table(self.words)))
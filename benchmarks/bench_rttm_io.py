@@ -0,0 +1,46 @@
+"""
+Benchmarks for utils.rttm_io against the pandas regex-separator parsing and to_csv writing
+it replaced.
+"""
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from utils import read_rttm, write_rttm
+
+from synthetic import synthetic_rttm_file
+
+rttm_column_names = ['type', 'file', 'channel', 'start_s', 'duration_s', 'NA1', 'NA2', 'speaker', 'NA3', 'NA4']
+
+
+def legacy_read_rttm(path: Path) -> pd.DataFrame:
+    return pd.read_csv(path, sep=r'\s+', header=None, names=rttm_column_names, index_col=False)
+
+
+class RTTMSuite:
+    params = [10_000, 100_000]
+    param_names = ['num_turns']
+
+    def setup(self, num_turns):
+        self.directory = tempfile.TemporaryDirectory()
+        self.rttm_file = synthetic_rttm_file(Path(self.directory.name) / 'input.rttm', num_turns)
+        self.records = read_rttm(self.rttm_file)
+        self.df = legacy_read_rttm(self.rttm_file)
+
+    def teardown(self, num_turns):
+        self.directory.cleanup()
+
+    def time_read_rttm(self, num_turns):
+        read_rttm(self.rttm_file)
+
+    def time_legacy_read_rttm(self, num_turns):
+        legacy_read_rttm(self.rttm_file)
+
+    def time_write_rttm(self, num_turns):
+        records = self.records
+        write_rttm(Path(self.directory.name) / 'output.rttm', records.file_id, records.start_s, records.end_s, records.speaker)
+
+    def time_legacy_write_rttm(self, num_turns):
+        self.df.to_csv(
+            Path(self.directory.name) / 'output.rttm', sep=' ', header=False, index=False, float_format='%.3f', na_rep='<NA>')
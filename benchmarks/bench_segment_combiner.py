@@ -0,0 +1,218 @@
+"""
+Benchmarks for rttm_combiner: the signal rasterization of SplitCombiner, and combining
+the RTTM files of a synthetic episode's splits with SplitCombiner and SegmentCombiner,
+and with EmbeddingSplitCombiner with and without overlap between the splits.
+
+The legacy_* functions are the pre-vectorization implementations, kept here
+as a reference point for the speedup.
+"""
+import math
+import tempfile
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from audio_processing import plan_fixed_splits
+from diarizer import SpeakerCentroids
+from rttm_combiner import EmbeddingSplitCombiner, SegmentCombiner, SpeakerTurns, SplitCombiner, turns_to_signal
+
+from synthetic import speaker_vectors, synthetic_turns_for_duration, write_turns_rttm
+
+
+def synthetic_overlap_df(num_segments: int, num_speakers: int, duration_s: float, seed: int = 0) -> pd.DataFrame:
+    """Random speaker turns inside [0, duration_s), in the shape of the legacy SegmentCombiner.preprocess_rttm"""
+    rng = np.random.default_rng(seed)
+    start_s = np.sort(rng.uniform(0, duration_s, num_segments))
+    duration = rng.exponential(duration_s / num_segments * 2, num_segments)
+    end_s = np.minimum(start_s + duration, duration_s)
+    speaker = ['speaker_' + str(i) for i in rng.integers(0, num_speakers, num_segments)]
+    return pd.DataFrame({'start_s': start_s, 'duration_s': end_s - start_s, 'end_s': end_s, 'speaker': speaker})
+
+
+def timeit_repeat(func, repeat: int = 3) -> list[float]:
+    return timeit.repeat(func, repeat=repeat, number=1)
+
+
+def legacy_to_signal(signal_length_s: float, signal_quality_s: float, df: pd.DataFrame) -> pd.DataFrame:
+    """Row-by-row fill, with .loc in place of the original chained assignment (a no-op under copy-on-write)"""
+    signal_index_length = int(signal_length_s / signal_quality_s)
+    signal_multiplier = int(1/signal_quality_s)
+    rounding_precision = int(-1*math.log10(signal_quality_s))
+
+    num_speakers = df['speaker'].nunique()
+    columns = ['speaker_' + str(i) for i in range(num_speakers)]
+
+    signal_df = pd.DataFrame(index=range(signal_index_length), columns=columns, data=0)
+
+    for i in range(num_speakers):
+        speaker_str = 'speaker_' + str(i)
+        slice = df[df['speaker'] == speaker_str ]
+
+        start = slice['start_s'].round(rounding_precision).mul(signal_multiplier).astype(int)
+        end = slice['end_s'].round(rounding_precision).mul(signal_multiplier).astype(int)
+
+        temp_df = pd.DataFrame([start, end]).T
+        for row in temp_df.itertuples(index=False):
+            signal_df.loc[row[0]:row[1] - 1, speaker_str] = 1
+
+    return signal_df
+
+
+class ToSignalSuite:
+    params = ([0.1, 0.01], [100, 1000])
+    param_names = ['signal_quality_s', 'num_segments']
+
+    def setup(self, signal_quality_s, num_segments):
+        self.signal_quality_s = signal_quality_s
+        self.combiner = SplitCombiner("SplitCombiner", [], [], None, signal_quality_s)
+        self.df = synthetic_overlap_df(num_segments, num_speakers=4, duration_s=300.0)
+        self.turns = SpeakerTurns(
+            self.df['start_s'].to_numpy(), self.df['end_s'].to_numpy(), self.df['speaker'].to_numpy(dtype=object))
+
+    def to_signal(self):
+        return self.combiner.to_signal(self.turns, 0.0, 300.0)
+
+    def legacy_to_signal(self):
+        return legacy_to_signal(300.0, self.signal_quality_s, self.df)
+
+    def time_to_signal(self, signal_quality_s, num_segments):
+        self.to_signal()
+
+    def time_legacy_to_signal(self, signal_quality_s, num_segments):
+        self.legacy_to_signal()
+
+    def track_speedup(self, signal_quality_s, num_segments):
+        legacy = min(timeit_repeat(self.legacy_to_signal))
+        current = min(timeit_repeat(self.to_signal))
+        return f'{legacy / current:.1f}x'
+
+
+def split_label_mappings(turns: SpeakerTurns, audio_splits: list, seed: int = 0) -> list[dict[str, str]]:
+    """The random relabelling of each split's speakers, from true to split labels"""
+    rng = np.random.default_rng(seed)
+    speakers = sorted(set(turns.speaker))
+    return [dict(zip(speakers, rng.permutation(speakers))) for _ in audio_splits]
+
+
+def write_split_rttms(directory: Path, turns: SpeakerTurns, audio_splits: list, seed: int = 0) -> list[Path]:
+    """
+    Writes the turns inside each split as that split's RTTM, on the split's time base and
+    with its speakers relabelled at random, as independent diarization runs label them
+    """
+    rttm_files = []
+    for split, mapping in zip(audio_splits, split_label_mappings(turns, audio_splits, seed)):
+        split_turns = turns.clip(split.start_time_s, split.end_time_s)
+        split_turns = SpeakerTurns(
+            split_turns.start_s - split.start_time_s,
+            split_turns.end_s - split.start_time_s,
+            split_turns.speaker,
+            ).relabel(mapping)
+        rttm_files.append(write_turns_rttm(directory / f'segment_{split.order:03d}.rttm', split_turns))
+    return rttm_files
+
+
+class CombineSuite:
+    params = ([4 * 3600, 12 * 3600], [2, 6])
+    param_names = ['duration_s', 'num_speakers']
+
+    def setup(self, duration_s, num_speakers):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.directory.name)
+
+        self.turns = synthetic_turns_for_duration(duration_s, num_speakers)
+        self.audio_splits = plan_fixed_splits(duration_s, 3600, 300)
+        self.rttm_files = write_split_rttms(self.output_dir, self.turns, self.audio_splits)
+
+    def teardown(self, duration_s, num_speakers):
+        self.directory.cleanup()
+
+    def combine(self) -> SpeakerTurns:
+        return SplitCombiner(
+            "SplitCombiner", self.rttm_files, self.audio_splits, self.output_dir / 'combined.rttm').combine()
+
+    def time_split_combiner(self, duration_s, num_speakers):
+        SplitCombiner("SplitCombiner", self.rttm_files, self.audio_splits, self.output_dir / 'combined.rttm').run()
+
+    def time_segment_combiner(self, duration_s, num_speakers):
+        # the two-file interface, on the first two splits
+        SegmentCombiner(self.rttm_files[0], self.rttm_files[1], self.output_dir, 3600.0, 300.0).run()
+
+    def track_label_accuracy(self, duration_s, num_speakers):
+        """Fraction of the speaking time given its true speaker, in the labels of the first split"""
+        return label_accuracy(self.turns, self.combine(), self.audio_splits, duration_s)
+
+
+def label_accuracy(turns: SpeakerTurns, combined: SpeakerTurns, audio_splits: list, duration_s: float) -> str:
+    # the first split's labels are kept, so map the ground truth through its permutation
+    expected = turns.relabel(split_label_mappings(turns, audio_splits)[0])
+
+    expected_signal, expected_labels = turns_to_signal(expected, 0.0, duration_s, 0.1)
+    combined_signal, combined_labels = turns_to_signal(combined, 0.0, duration_s, 0.1)
+    rows = [combined_labels.index(label) if label in combined_labels else None for label in expected_labels]
+    correct = sum(
+        int(np.sum(expected_signal[i] & combined_signal[row]))
+        for i, row in enumerate(rows) if row is not None
+        )
+    return f'{correct / max(int(expected_signal.sum()), 1):.4f}'
+
+
+def synthetic_split_centroids(
+    turns: SpeakerTurns,
+    audio_splits: list,
+    noise: float = 0.05,
+    seed: int = 0,
+    ) -> list[SpeakerCentroids]:
+    """Each split's centroids under its split labels: the true speaker's vector plus noise"""
+    rng = np.random.default_rng(seed)
+    speakers = sorted(set(turns.speaker))
+    vectors = speaker_vectors(len(speakers))
+
+    split_centroids = []
+    for split, mapping in zip(audio_splits, split_label_mappings(turns, audio_splits)):
+        present = sorted(set(turns.clip(split.start_time_s, split.end_time_s).speaker))
+        rows = [speakers.index(speaker) for speaker in present]
+        centroids = vectors[rows] + rng.normal(0.0, noise, (len(rows), vectors.shape[1])).astype(np.float32)
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+        split_centroids.append(SpeakerCentroids([mapping[speaker] for speaker in present], centroids, np.full(len(rows), 600.0)))
+    return split_centroids
+
+
+class EmbeddingCombineSuite:
+    """Overlap against embedding matching, with the usual 300 s overlap and with none"""
+    params = ([0, 300], [2, 6])
+    param_names = ['overlap_s', 'num_speakers']
+    duration_s = 4 * 3600
+
+    def setup(self, overlap_s, num_speakers):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.directory.name)
+
+        self.turns = synthetic_turns_for_duration(self.duration_s, num_speakers)
+        self.audio_splits = plan_fixed_splits(self.duration_s, 3600, overlap_s)
+        self.rttm_files = write_split_rttms(self.output_dir, self.turns, self.audio_splits)
+        self.split_centroids = synthetic_split_centroids(self.turns, self.audio_splits)
+
+    def teardown(self, overlap_s, num_speakers):
+        self.directory.cleanup()
+
+    def embedding_combiner(self) -> EmbeddingSplitCombiner:
+        return EmbeddingSplitCombiner(
+            "EmbeddingSplitCombiner",
+            self.rttm_files,
+            self.audio_splits,
+            self.output_dir / 'combined.rttm',
+            self.split_centroids,
+            )
+
+    def time_embedding_combiner(self, overlap_s, num_speakers):
+        self.embedding_combiner().run()
+
+    def track_overlap_label_accuracy(self, overlap_s, num_speakers):
+        combined = SplitCombiner(
+            "SplitCombiner", self.rttm_files, self.audio_splits, self.output_dir / 'combined.rttm').combine()
+        return label_accuracy(self.turns, combined, self.audio_splits, self.duration_s)
+
+    def track_embedding_label_accuracy(self, overlap_s, num_speakers):
+        return label_accuracy(self.turns, self.embedding_combiner().combine(), self.audio_splits, self.duration_s)
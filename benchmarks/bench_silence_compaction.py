@@ -0,0 +1,48 @@
+"""
+Benchmarks for audio_processing.compact_silences and remapping its output back to the
+original time base, on synthetic conversations with longer pauses than usual.
+"""
+import tempfile
+from pathlib import Path
+
+from audio_processing import compact_silences
+from utils import WordTable
+
+from synthetic import synthetic_audio, synthetic_turns_for_duration, synthetic_words
+
+
+class SilenceCompactionSuite:
+    params = ([3600, 4 * 3600], [0.5, 1.5])
+    param_names = ['duration_s', 'mean_pause_s']
+
+    def setup(self, duration_s, mean_pause_s):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pcm_file = Path(self.directory.name) / 'compact.pcm'
+
+        turns = synthetic_turns_for_duration(duration_s, num_speakers=3, mean_pause_s=mean_pause_s)
+        self.audio = synthetic_audio(duration_s, turns)
+        self.compacted, self.offset_map = compact_silences(self.audio)
+
+        # words and turns as Whisper and NeMo would return them for the compacted audio
+        compact_turns = synthetic_turns_for_duration(self.offset_map.compact_duration_s, num_speakers=3)
+        self.words = WordTable.from_word_timestamps(synthetic_words(compact_turns))
+        self.turns = compact_turns
+
+    def teardown(self, duration_s, mean_pause_s):
+        self.directory.cleanup()
+
+    def time_compact_in_memory(self, duration_s, mean_pause_s):
+        compact_silences(self.audio)
+
+    def time_compact_to_pcm_file(self, duration_s, mean_pause_s):
+        compact_silences(self.audio, self.pcm_file)
+
+    def time_remap_words(self, duration_s, mean_pause_s):
+        self.offset_map.remap_words(self.words)
+
+    def time_remap_turns(self, duration_s, mean_pause_s):
+        self.offset_map.remap_intervals(self.turns.start_s, self.turns.end_s)
+
+    def track_audio_removed(self, duration_s, mean_pause_s):
+        """Share of the audio Whisper and NeMo no longer process"""
+        return f'{self.offset_map.removed_s / self.offset_map.original_duration_s:.3f}'
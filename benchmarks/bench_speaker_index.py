@@ -0,0 +1,118 @@
+"""
+Benchmarks for cross-episode speaker identification: per-split centroids from NeMo's
+segment embeddings, and lookups and inserts in a speaker_index.SpeakerIndex the size of an
+archive of episodes.
+
+The archive is synthetic: every episode has a few speakers drawn from a pool of recurring
+hosts and one-off guests, each centroid that speaker's vector plus noise, so the tracks
+show how often known speakers are found again and how often guests are taken for hosts.
+"""
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from diarizer import SpeakerCentroids, speaker_centroids
+from diarizer.speaker_embeddings import normalize_rows
+from speaker_index import SpeakerIndex
+from utils import RTTMRecords
+
+from synthetic import EMBEDDING_DIMENSIONS, speaker_vectors, synthetic_segment_embeddings, synthetic_turns_for_duration
+
+NUM_HOSTS = 40
+SPEAKERS_PER_EPISODE = 4
+CENTROID_NOISE = 0.03
+
+
+def synthetic_episode(rng: np.random.Generator, host_vectors: np.ndarray) -> tuple[SpeakerCentroids, list[int]]:
+    """An episode's centroids, two hosts and the rest one-off guests, with each speaker's host number or -1"""
+    hosts = rng.choice(len(host_vectors), 2, replace=False).tolist()
+    num_guests = SPEAKERS_PER_EPISODE - len(hosts)
+    vectors = np.concatenate([host_vectors[hosts], rng.standard_normal((num_guests, host_vectors.shape[1]))])
+    vectors = normalize_rows(normalize_rows(vectors) + rng.normal(0.0, CENTROID_NOISE, vectors.shape))
+    labels = [f'speaker_{i}' for i in range(SPEAKERS_PER_EPISODE)]
+    return SpeakerCentroids(labels, vectors.astype(np.float32), np.full(SPEAKERS_PER_EPISODE, 600.0)), hosts + [-1] * num_guests
+
+
+class SpeakerIndexSuite:
+    params = [200, 2000]
+    param_names = ['num_episodes']
+
+    def setup(self, num_episodes):
+        self.directory = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.host_vectors = normalize_rows(rng.standard_normal((NUM_HOSTS, EMBEDDING_DIMENSIONS)))
+
+        # the archive as the pipeline would have indexed it, hosts already renamed, saved
+        # once rather than by an insert per episode
+        self.index = SpeakerIndex("SpeakerIndex", Path(self.directory.name) / 'index')
+        embeddings, metadata = [], []
+        for episode in range(num_episodes):
+            centroids, hosts = synthetic_episode(rng, self.host_vectors)
+            embeddings.append(centroids.centroids)
+            metadata += [
+                {'identity': f'host_{host}' if host >= 0 else f'episode_{episode}/{label}',
+                 'episode': f'episode_{episode}', 'label': label, 'speech_s': 600.0}
+                for label, host in zip(centroids.labels, hosts)
+            ]
+        self.index.embeddings, self.index.metadata = np.concatenate(embeddings), metadata
+        self.index.save()
+
+        self.queries = [synthetic_episode(rng, self.host_vectors) for _ in range(50)]
+
+    def teardown(self, num_episodes):
+        self.directory.cleanup()
+
+    def time_load(self, num_episodes):
+        SpeakerIndex("SpeakerIndex", self.index.directory)
+
+    def time_search(self, num_episodes):
+        self.index.search(self.queries[0][0].centroids)
+
+    def time_identify(self, num_episodes):
+        self.index.identify(self.queries[0][0])
+
+    def time_insert(self, num_episodes):
+        self.index.insert(self.queries[0][0], {}, 'new_episode')
+
+    def track_hosts_identified(self, num_episodes):
+        """Fraction of recurring hosts labelled with their own identity"""
+        found = total = 0
+        for centroids, hosts in self.queries:
+            identities = self.index.identify(centroids)
+            for label, host in zip(centroids.labels, hosts):
+                if host >= 0:
+                    total += 1
+                    found += identities.get(label) == f'host_{host}'
+        return round(found / total, 3)
+
+    def track_guests_misidentified(self, num_episodes):
+        """Fraction of one-off guests labelled with a known identity"""
+        wrong = total = 0
+        for centroids, hosts in self.queries:
+            identities = self.index.identify(centroids)
+            for label, host in zip(centroids.labels, hosts):
+                if host < 0:
+                    total += 1
+                    wrong += label in identities
+        return round(wrong / total, 3)
+
+
+class SpeakerCentroidSuite:
+    params = [1800, 3600]
+    param_names = ['split_s']
+
+    def setup(self, split_s):
+        turns = synthetic_turns_for_duration(split_s, SPEAKERS_PER_EPISODE)
+        self.records = RTTMRecords('split', turns.start_s, turns.end_s - turns.start_s, turns.speaker)
+        self.segment_start_s, self.segment_end_s, self.embeddings = synthetic_segment_embeddings(turns, split_s)
+
+    def time_speaker_centroids(self, split_s):
+        speaker_centroids(self.records, self.segment_start_s, self.segment_end_s, self.embeddings)
+
+    def track_centroid_similarity(self, split_s):
+        """Lowest cosine similarity between a speaker's centroid and its true vector"""
+        centroids = speaker_centroids(self.records, self.segment_start_s, self.segment_end_s, self.embeddings)
+        true_vectors = speaker_vectors(SPEAKERS_PER_EPISODE)
+        rows = [int(label.rsplit('_', 1)[-1]) for label in centroids.labels]
+        return round(float(np.min(np.sum(centroids.centroids * true_vectors[rows], axis=1))), 4)
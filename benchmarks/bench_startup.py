@@ -0,0 +1,49 @@
+"""
+Startup time of the CLI, and a guard that importing the pipeline loads no heavy framework.
+
+Each measurement runs a fresh interpreter, as a user does. The target is for `main.py
+--help`, and anything else that fails before a model is needed, to finish within
+STARTUP_TARGET_S. track_heavy_modules must stay empty: torch, Whisper, NeMo and friends
+are imported by the stages that use them, never at import time.
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+from time import perf_counter
+
+SOURCE_DIR = Path(__file__).resolve().parent.parent / 'src'
+STARTUP_TARGET_S = 0.5
+HEAVY_MODULES = ('torch', 'whisper', 'whisperx', 'nemo', 'omegaconf', 'wget', 'pandas', 'scipy')
+CLI_MODULES = ('utils', 'pipeline', 'punctuation_realignment', 'streaming', 'web_vtt')
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=SOURCE_DIR, capture_output=True, text=True, check=True)
+
+
+class StartupSuite:
+    number = 1
+    repeat = 5
+
+    def time_import_cli_modules(self):
+        run_python('-c', f'import {", ".join(CLI_MODULES)}')
+
+    def time_cli_help(self):
+        run_python('main.py', '--help')
+
+    def track_cli_help_within_target(self):
+        best_s = min(self._elapsed_s('main.py', '--help') for _ in range(self.repeat))
+        return f'{best_s:.3f} s, target {STARTUP_TARGET_S} s: {"ok" if best_s <= STARTUP_TARGET_S else "too slow"}'
+
+    def track_heavy_modules(self):
+        code = (
+            f'import json, sys; import {", ".join(CLI_MODULES)}; '
+            f'print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))'
+        )
+        return json.loads(run_python('-c', code).stdout)
+
+    def _elapsed_s(self, *args: str) -> float:
+        start = perf_counter()
+        run_python(*args)
+        return perf_counter() - start
@@ -0,0 +1,80 @@
+"""
+Memory and time of the per-word dict representation versus the columnar WordTable,
+for realignment of a full transcript and for loading it from disk.
+"""
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from bench_punctuation_realignment import synthetic_word_speaker_mapping
+from punctuation_realignment import get_realigned_ws_mapping_with_punctuation, realign_word_table
+from utils import WordTable, load_words, save_word_timestamps
+
+
+def retained_memory_mb(build, *args) -> float:
+    """Python heap still allocated by the object that build(*args) returns, in MiB"""
+    tracemalloc.start()
+    try:
+        result = build(*args)
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current / 2**20
+
+
+def synthetic_word_table(num_words: int) -> WordTable:
+    # the dicts are only a temporary here, what is retained is the table
+    return WordTable.from_records(synthetic_word_speaker_mapping(num_words))
+
+
+class WordTableSuite:
+    params = [100_000, 500_000]
+    param_names = ['num_words']
+
+    def setup(self, num_words):
+        self.wsm = synthetic_word_speaker_mapping(num_words)
+        self.words = WordTable.from_records(self.wsm)
+
+    def time_realign_dicts(self, num_words):
+        get_realigned_ws_mapping_with_punctuation(self.wsm)
+
+    def time_realign_table(self, num_words):
+        realign_word_table(self.words)
+
+    def track_memory_mb_dicts(self, num_words):
+        return retained_memory_mb(synthetic_word_speaker_mapping, num_words)
+
+    def track_memory_mb_table(self, num_words):
+        return retained_memory_mb(synthetic_word_table, num_words)
+
+    def track_identical_to_dicts(self, num_words):
+        return realign_word_table(self.words).to_records() == get_realigned_ws_mapping_with_punctuation(self.wsm)
+
+
+class WordStorageSuite:
+    """Loading a transcript saved as JSON lines versus as memory-mapped WordTable columns"""
+    params = [100_000, 500_000]
+    param_names = ['num_words']
+
+    def setup(self, num_words):
+        self.directory = tempfile.TemporaryDirectory()
+        words = synthetic_word_table(num_words)
+        self.jsonl_file = save_word_timestamps(words, Path(self.directory.name) / 'words.txt')
+        self.columns_dir = Path(self.directory.name) / 'words.words'
+        words.save_columns(self.columns_dir)
+
+    def teardown(self, num_words):
+        self.directory.cleanup()
+
+    def time_load_jsonl(self, num_words):
+        load_words(self.jsonl_file)
+
+    def time_load_columns(self, num_words):
+        load_words(self.columns_dir)
+
+    def track_size_mb_jsonl(self, num_words):
+        return self.jsonl_file.stat().st_size / 2**20
+
+    def track_size_mb_columns(self, num_words):
+        return sum(f.stat().st_size for f in self.columns_dir.iterdir()) / 2**20
@@ -0,0 +1,42 @@
+"""
+Benchmarks for mapping words to speakers: the anchor mapping of get_words_speaker_mapping,
+the overlap-weighted mapping, and their columnar WordTable variants, on synthetic
+conversations of varying length and speaker count.
+"""
+from utils import (
+    TurnTable,
+    WordTable,
+    get_words_speaker_mapping,
+    get_words_speaker_mapping_by_overlap,
+    map_word_table_speakers,
+    map_word_table_speakers_by_anchor,
+)
+
+from synthetic import rttm_speaker_timestamps, synthetic_turns_for_duration, synthetic_words
+
+
+class WordMappingSuite:
+    params = ([3600, 4 * 3600], [2, 6])
+    param_names = ['duration_s', 'num_speakers']
+
+    def setup(self, duration_s, num_speakers):
+        self.turns = synthetic_turns_for_duration(duration_s, num_speakers)
+        self.wrd_ts = synthetic_words(self.turns)
+        self.spk_ts = rttm_speaker_timestamps(self.turns)
+        self.words = WordTable.from_word_timestamps(self.wrd_ts)
+        self.turn_table = TurnTable.from_lists(self.spk_ts)
+
+    def time_get_words_speaker_mapping(self, duration_s, num_speakers):
+        get_words_speaker_mapping(self.wrd_ts, self.spk_ts)
+
+    def time_get_words_speaker_mapping_by_overlap(self, duration_s, num_speakers):
+        get_words_speaker_mapping_by_overlap(self.wrd_ts, self.spk_ts)
+
+    def time_map_word_table_speakers_by_anchor(self, duration_s, num_speakers):
+        map_word_table_speakers_by_anchor(self.words, self.spk_ts)
+
+    def time_map_word_table_speakers(self, duration_s, num_speakers):
+        map_word_table_speakers(self.words, self.turn_table)
+
+    def track_num_words(self, duration_s, num_speakers):
+        return len(self.words)
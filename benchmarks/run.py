@@ -0,0 +1,85 @@
+"""
+Minimal asv-style benchmark runner.
+
+Discovers bench_*.py modules in this directory and runs every `time_*` and
+`track_*` method of every class in them, for each combination of the class
+`params`. Benchmarks are written so that they can also be run by asv directly.
+
+Usage: python benchmarks/run.py [name filter] [--repeat N]
+"""
+import argparse
+import importlib
+import inspect
+import itertools
+import sys
+import timeit
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+SOURCE_DIR = BENCHMARK_DIR.parent / 'src'
+
+sys.path.insert(0, str(SOURCE_DIR))
+sys.path.insert(0, str(BENCHMARK_DIR))
+
+
+def _param_combinations(cls) -> list[tuple]:
+    params = getattr(cls, 'params', None)
+    if params is None:
+        return [()]
+    # asv allows a single list of params for one-parameter benchmarks
+    if params and not isinstance(params[0], (list, tuple)):
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def _format_params(cls, combination: tuple) -> str:
+    names = getattr(cls, 'param_names', [f'p{i}' for i in range(len(combination))])
+    return ', '.join(f'{name}={value}' for name, value in zip(names, combination))
+
+
+def _run_benchmark(cls, method_name: str, combination: tuple, repeat: int):
+    # asv's number and repeat attributes, for benchmarks too slow to autorange
+    number = getattr(cls, 'number', 0)
+    repeat = getattr(cls, 'repeat', repeat)
+
+    instance = cls()
+    if hasattr(instance, 'setup'):
+        instance.setup(*combination)
+    method = getattr(instance, method_name)
+
+    try:
+        if method_name.startswith('time_'):
+            timer = timeit.Timer(lambda: method(*combination))
+            if not number:
+                number, _ = timer.autorange()
+            best = min(timer.repeat(repeat=repeat, number=number)) / number
+            return f'{best * 1000:.3f} ms'
+        return str(method(*combination))
+    finally:
+        if hasattr(instance, 'teardown'):
+            instance.teardown(*combination)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the benchmark suite')
+    parser.add_argument('filter', nargs='?', default='', help='Only run benchmarks whose name contains this string')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing repeats per benchmark, best is reported')
+    args = parser.parse_args()
+
+    for module_path in sorted(BENCHMARK_DIR.glob('bench_*.py')):
+        module = importlib.import_module(module_path.stem)
+        for class_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            methods = [m for m in dir(cls) if m.startswith(('time_', 'track_'))]
+            for method_name in methods:
+                full_name = f'{module.__name__}.{class_name}.{method_name}'
+                if args.filter not in full_name:
+                    continue
+                for combination in _param_combinations(cls):
+                    result = _run_benchmark(cls, method_name, combination, args.repeat)
+                    print(f'{full_name}({_format_params(cls, combination)}): {result}')
+
+
+if __name__ == '__main__':
+    main()
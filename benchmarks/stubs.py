@@ -0,0 +1,177 @@
+"""
+Stand-ins for Whisper, WhisperX, NeMo and TinyTag, so the pipeline can be benchmarked end
+to end offline on CPU: everything it does around the models is measured, the models are not.
+
+install() registers stub modules under the names the pipeline imports when a model stage
+runs, so it must be called before the pipeline runs. The stubs replace the real packages for the rest
+of the process, whether those are installed or not. Worker processes do not inherit them,
+so benchmarks using the stubs run with transcribe_workers=1 and concurrent_stages=False.
+
+The stub models answer from the synthetic fixtures: Whisper returns synthetic_words for the
+duration of the audio it is given, and the diarizer writes synthetic_turns for the duration
+of the split in its manifest, labelled independently per split as NeMo's are. With
+save_embeddings it also saves synthetic_segment_embeddings where NeMo saves its embeddings.
+"""
+import json
+import pickle
+import sys
+import types
+import wave
+import zlib
+from functools import lru_cache
+from pathlib import Path
+
+from audio_processing.pcm_audio import SAMPLE_RATE_HZ
+
+from synthetic import synthetic_segment_embeddings, synthetic_turns_for_duration, synthetic_words, write_turns_rttm
+
+NUM_SPEAKERS = 3
+
+
+@lru_cache(maxsize=8)
+def _words_for_duration(duration_s: float, num_speakers: int) -> tuple:
+    return tuple(synthetic_words(synthetic_turns_for_duration(duration_s, num_speakers)))
+
+
+def _wav_duration_s(path: Path) -> float:
+    with wave.open(str(path), 'rb') as f:
+        return f.getnframes() / f.getframerate()
+
+
+class StubWhisperModel:
+    def __init__(self, num_speakers: int = NUM_SPEAKERS):
+        self.num_speakers = num_speakers
+
+    def transcribe(self, audio, language=None, **options) -> dict:
+        duration_s = len(audio) / SAMPLE_RATE_HZ
+        words = [dict(wrd_dict) for wrd_dict in _words_for_duration(round(duration_s, 3), self.num_speakers)]
+
+        segments, segment_words = [], []
+        for wrd_dict in words:
+            segment_words.append(wrd_dict)
+            if wrd_dict['text'][-1] in '.?!':
+                segments.append({
+                    'start': segment_words[0]['start'],
+                    'end': segment_words[-1]['end'],
+                    'text': ' ' + ' '.join(w['text'] for w in segment_words),
+                    'words': segment_words,
+                })
+                segment_words = []
+        return {'language': language or 'en', 'segments': segments}
+
+
+def stub_load_model(model_size, device=None, **kwargs) -> StubWhisperModel:
+    return StubWhisperModel()
+
+
+def stub_load_align_model(language_code, device=None, **kwargs) -> tuple:
+    return object(), {'language': language_code}
+
+
+def stub_align(segments, model, metadata, audio, device, **kwargs) -> dict:
+    word_segments = [
+        {**wrd_dict, 'text': ' ' + wrd_dict['text']}
+        for segment in segments
+        for wrd_dict in segment['words']
+    ]
+    return {'segments': segments, 'word_segments': word_segments}
+
+
+class StubConfig(dict):
+    """An OmegaConf DictConfig stand-in: attribute access, missing nodes are created on first access"""
+
+    def __getattr__(self, key):
+        if key.startswith('__'):
+            raise AttributeError(key)
+        if key not in self:
+            self[key] = StubConfig()
+        return self[key]
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+class StubOmegaConf:
+    @staticmethod
+    def load(path) -> StubConfig:
+        return StubConfig()
+
+
+def stub_download(url: str, out: str) -> str:
+    path = Path(out) / url.rsplit('/', 1)[-1]
+    path.write_text('')
+    return str(path)
+
+
+class StubClusteringDiarizer:
+    def __init__(self, cfg: StubConfig, num_speakers: int = NUM_SPEAKERS):
+        # a plain namespace, so the model cache does not take it for a torch module
+        self._diarizer_params = types.SimpleNamespace(**cfg.diarizer)
+        self._speaker_params = types.SimpleNamespace(**cfg.diarizer.speaker_embeddings.parameters)
+        self.num_speakers = num_speakers
+
+    def diarize(self):
+        with open(self._diarizer_params.manifest_filepath) as f:
+            audio_file = Path(json.loads(f.readline())['audio_filepath'])
+
+        seed = zlib.crc32(audio_file.name.encode())
+        duration_s = _wav_duration_s(audio_file)
+        turns = synthetic_turns_for_duration(duration_s, self.num_speakers, seed=seed)
+
+        out_dir = Path(self._diarizer_params.out_dir)
+        rttm_dir = out_dir / 'pred_rttms'
+        rttm_dir.mkdir(parents=True, exist_ok=True)
+        write_turns_rttm(rttm_dir / (audio_file.stem + '.rttm'), turns, audio_file.stem)
+
+        if getattr(self._speaker_params, 'save_embeddings', False):
+            self.save_embeddings(out_dir / 'speaker_outputs', audio_file, turns, duration_s, seed)
+
+    def save_embeddings(self, speaker_dir: Path, audio_file: Path, turns, duration_s: float, seed: int):
+        """The scale 0 segment manifest and embeddings pickle, laid out as NeMo's"""
+        start_s, end_s, embeddings = synthetic_segment_embeddings(turns, duration_s, seed=seed)
+        (speaker_dir / 'embeddings').mkdir(parents=True, exist_ok=True)
+        with (speaker_dir / 'subsegments_scale0.json').open('w') as f:
+            for start, end in zip(start_s.tolist(), end_s.tolist()):
+                f.write(json.dumps({'audio_filepath': str(audio_file), 'offset': start, 'duration': end - start,
+                                    'label': 'UNK', 'uniq_id': audio_file.stem}) + '\n')
+        with (speaker_dir / 'embeddings' / 'subsegments_scale0_embeddings.pkl').open('wb') as f:
+            pickle.dump({audio_file.stem: embeddings}, f)
+
+
+class StubTag:
+    def __init__(self, path: Path):
+        with wave.open(str(path), 'rb') as f:
+            self.samplerate = f.getframerate()
+            self.duration = f.getnframes() / self.samplerate
+            self.bitrate = self.samplerate * f.getsampwidth() * f.getnchannels() * 8 / 1000
+        self.album = self.artist = self.title = self.composer = None
+
+
+class StubTinyTag:
+    @staticmethod
+    def get(path) -> StubTag:
+        return StubTag(Path(path))
+
+
+def _module(name: str, **attributes) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+
+def install():
+    """Registers the stub modules, call before importing the pipeline"""
+    modules = {
+        'whisper': _module('whisper', load_model=stub_load_model),
+        'whisperx': _module('whisperx', load_align_model=stub_load_align_model, align=stub_align),
+        'omegaconf': _module('omegaconf', OmegaConf=StubOmegaConf),
+        'wget': _module('wget', download=stub_download),
+        'tinytag': _module('tinytag', TinyTag=StubTinyTag),
+        'nemo': _module('nemo'),
+        'nemo.collections': _module('nemo.collections'),
+        'nemo.collections.asr': _module('nemo.collections.asr'),
+        'nemo.collections.asr.models': _module('nemo.collections.asr.models'),
+        'nemo.collections.asr.models.msdd_models': _module(
+            'nemo.collections.asr.models.msdd_models', ClusteringDiarizer=StubClusteringDiarizer),
+    }
+    sys.modules.update(modules)
@@ -0,0 +1,187 @@
+"""
+Synthetic fixtures for the benchmarks: speaker turns, RTTM files, word timelines and audio
+of configurable length and speaker count, all deterministic for a given seed.
+
+Turns follow a conversation: each turn goes to a different speaker than the one before,
+with short pauses and occasional overlapping speech. Words fall inside the turns, in
+sentences that end with punctuation, so speaker mapping and punctuation realignment see
+realistic input.
+"""
+import math
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from audio_processing import PCMAudio
+from audio_processing.pcm_audio import PCM_DTYPE, SAMPLE_RATE_HZ
+from rttm_combiner import SpeakerTurns
+from utils import write_rttm
+
+SENTENCE_ENDINGS = '.?!'
+EMBEDDING_DIMENSIONS = 192      # TitaNet's
+VOCABULARY = ['the', 'a', 'we', 'you', 'it', 'is', 'was', 'think', 'know', 'really', 'podcast', 'episode',
+              'about', 'that', 'so', 'and', 'but', 'because', 'people', 'time', 'right', 'yeah', 'actually']
+
+
+def synthetic_turns(
+    num_turns: int,
+    num_speakers: int = 4,
+    seed: int = 0,
+    mean_turn_s: float = 3.0,
+    mean_pause_s: float = 0.5,
+    ) -> SpeakerTurns:
+    """Turns labelled speaker_0 .. speaker_{num_speakers - 1}, about one in eight overlapping the previous turn"""
+    rng = np.random.default_rng(seed)
+
+    duration_s = 0.2 + rng.exponential(mean_turn_s, num_turns)
+    pause_s = rng.exponential(mean_pause_s, num_turns)
+    overlap = rng.random(num_turns) < 0.125
+    pause_s[overlap] = -np.minimum(rng.uniform(0.1, 1.0, overlap.sum()), duration_s[np.flatnonzero(overlap) - 1] / 2)
+    pause_s[0] = 0.0
+
+    start_s = np.cumsum(pause_s + np.r_[0.0, duration_s[:-1]])
+    end_s = start_s + duration_s
+
+    # a random walk over the other speakers, so consecutive turns never share a speaker
+    steps = rng.integers(1, num_speakers, num_turns) if num_speakers > 1 else np.zeros(num_turns, dtype=int)
+    speaker_ids = np.cumsum(steps) % num_speakers
+    speaker = np.array([f'speaker_{i}' for i in speaker_ids], dtype=object)
+
+    return SpeakerTurns(np.round(start_s, 3), np.round(end_s, 3), speaker)
+
+
+def synthetic_turns_for_duration(
+    duration_s: float,
+    num_speakers: int = 4,
+    seed: int = 0,
+    mean_turn_s: float = 3.0,
+    mean_pause_s: float = 0.5,
+    ) -> SpeakerTurns:
+    """synthetic_turns clipped to [0, duration_s)"""
+    num_turns = math.ceil(duration_s / (mean_turn_s + mean_pause_s) * 1.2) + 1
+    turns = synthetic_turns(num_turns, num_speakers, seed, mean_turn_s, mean_pause_s)
+    return turns.clip(0.0, duration_s)
+
+
+def synthetic_rttm_file(
+    path: Path,
+    num_turns: int,
+    num_speakers: int = 4,
+    seed: int = 0,
+    file_id: str = 'episode',
+    ) -> Path:
+    turns = synthetic_turns(num_turns, num_speakers, seed)
+    write_rttm(path, file_id, turns.start_s, turns.end_s, turns.speaker)
+    return path
+
+
+def write_turns_rttm(path: Path, turns: SpeakerTurns, file_id: str = 'episode') -> Path:
+    write_rttm(path, file_id, turns.start_s, turns.end_s, turns.speaker)
+    return path
+
+
+def rttm_speaker_timestamps(turns: SpeakerTurns) -> list[list]:
+    """Turns as the [start_ms, end_ms, speaker] lists of load_rttm_file, speaker as its integer index"""
+    return [
+        [int(start_s * 1000), int(end_s * 1000), int(speaker.rsplit('_', 1)[-1])]
+        for start_s, end_s, speaker in zip(turns.start_s.tolist(), turns.end_s.tolist(), turns.speaker)
+    ]
+
+
+def synthetic_words(
+    turns: SpeakerTurns,
+    seed: int = 0,
+    words_per_s: float = 2.5,
+    mean_sentence_words: int = 12,
+    ) -> list[dict]:
+    """
+    Whisper word timestamps, {'text', 'start', 'end', 'score'} in seconds, filling every
+    turn at words_per_s. A sentence ends with punctuation at the end of each turn and every
+    mean_sentence_words words on average inside it. Word edges are jittered by up to 0.15 s,
+    so some words straddle a speaker change as Whisper's do.
+    """
+    rng = np.random.default_rng(seed)
+
+    words = []
+    for start_s, end_s in zip(turns.start_s.tolist(), turns.end_s.tolist()):
+        count = max(int((end_s - start_s) * words_per_s), 1)
+        edges = np.linspace(start_s, end_s, count + 1)
+        jitter = rng.uniform(-0.15, 0.15, count + 1)
+        jitter[[0, -1]] = 0.0
+        edges = np.maximum.accumulate(edges + jitter)
+        texts = rng.choice(VOCABULARY, count)
+        sentence_end = rng.random(count) < 1 / mean_sentence_words
+        sentence_end[-1] = True
+        punctuation = rng.choice(list(SENTENCE_ENDINGS), count)
+        scores = rng.uniform(0.3, 1.0, count)
+
+        for i in range(count):
+            words.append({
+                'text': str(texts[i]) + (str(punctuation[i]) if sentence_end[i] else ''),
+                'start': round(float(edges[i]), 3),
+                'end': round(float(edges[i + 1]) - 0.02, 3),
+                'score': round(float(scores[i]), 3),
+            })
+
+    words.sort(key=lambda wrd_dict: wrd_dict['start'])
+    return words
+
+
+def speaker_vectors(num_speakers: int, dimensions: int = EMBEDDING_DIMENSIONS, seed: int = 1234) -> np.ndarray:
+    """One random unit vector per speaker, the same for speaker_i in every split and episode"""
+    vectors = np.random.default_rng(seed).standard_normal((num_speakers, dimensions))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_segment_embeddings(
+    turns: SpeakerTurns,
+    duration_s: float,
+    window_s: float = 1.5,
+    shift_s: float = 0.75,
+    noise: float = 0.05,
+    seed: int = 0,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Segment start and end times and embeddings as NeMo saves them: windows of window_s every
+    shift_s, each the vector of the speaker whose turn contains its midpoint, or of a
+    random voice outside any turn, plus Gaussian noise per dimension.
+    """
+    rng = np.random.default_rng(seed)
+    start_s = np.arange(0.0, max(duration_s - window_s, 0.0) + 1e-9, shift_s)
+    end_s = np.minimum(start_s + window_s, duration_s)
+    midpoints = (start_s + end_s) / 2
+
+    speaker_ids = np.array([int(speaker.rsplit('_', 1)[-1]) for speaker in turns.speaker], dtype=np.int64)
+    vectors = speaker_vectors(int(speaker_ids.max(initial=0)) + 1)
+    embeddings = rng.standard_normal((len(start_s), vectors.shape[1])).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    turn = np.searchsorted(turns.start_s, midpoints, side='right') - 1
+    inside = (turn >= 0) & (midpoints < turns.end_s[np.maximum(turn, 0)])
+    embeddings[inside] = vectors[speaker_ids[turn[inside]]]
+    embeddings += rng.normal(0.0, noise, embeddings.shape).astype(np.float32)
+    return start_s, end_s, embeddings
+
+
+def synthetic_audio(duration_s: float, turns: Optional[SpeakerTurns] = None, seed: int = 0) -> PCMAudio:
+    """
+    16 kHz noise, quiet between turns and loud inside them, or loud throughout without
+    turns. Enough to exercise every stage that touches samples, not to be recognized.
+    """
+    rng = np.random.default_rng(seed)
+    num_samples = int(duration_s * SAMPLE_RATE_HZ)
+
+    amplitude = np.full(num_samples, 3000 if turns is None else 30, dtype=np.int16)
+    if turns is not None:
+        for start_s, end_s in zip(turns.start_s.tolist(), turns.end_s.tolist()):
+            amplitude[int(start_s * SAMPLE_RATE_HZ):int(end_s * SAMPLE_RATE_HZ)] = 3000
+
+    # in one-minute blocks, so that hours of audio never exist as floats at once
+    samples = np.empty(num_samples, dtype=PCM_DTYPE)
+    block = 60 * SAMPLE_RATE_HZ
+    for first in range(0, num_samples, block):
+        last = min(first + block, num_samples)
+        noise = rng.standard_normal(last - first, dtype=np.float32) * amplitude[first:last]
+        samples[first:last] = noise.clip(-32768, 32767)
+    return PCMAudio(samples)
@@ -1,3 +1,7 @@
-from .audio_splitter import AudioSplitter
+from .audio_splitter import AudioSplit, AudioSplitter, plan_fixed_splits, plan_splits
 from .ffmpeg_splitter import FFmpegSplitter
-from .ffmpeg_utilities import ffmpeg_to_16k
\ No newline at end of file
+from .ffmpeg_utilities import ffmpeg_to_16k
+from .pcm_audio import PCMAudio
+from .pcm_splitter import PCMSplitter
+from .silence_compaction import OffsetMap, compact_silences
+from .split_planner import SPLIT_PLANNERS, SplitPlanner, VADSplitPlanner
\ No newline at end of file
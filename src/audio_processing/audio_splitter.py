@@ -1,5 +1,27 @@
+import math
+
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from .split_planner import SplitPlanner
+
+MAX_DURATION_BEFORE_SPLIT_s = 3600 #TODO should be injected from config
+
+@dataclass
+class AudioSplit:
+  order : int
+  start_time_s : int
+  end_time_s : int
+  duration_s : int = 0
+  file_name : str = ''
+
+  def __post_init__(self):
+    self.duration_s = self.end_time_s - self.start_time_s
+    self.file_name = f"segment_{self.order:03d}.wav"
+
 
 class AudioSplitter(ABC):
     def __init__(self, 
@@ -8,6 +30,7 @@ class AudioSplitter(ABC):
                 duration_s: float,
                 split_s: int,
                 overlap_s: int,
+                planner: Optional['SplitPlanner'] = None,
                 ):
     
         self.input_file = input_file
@@ -15,7 +38,57 @@ class AudioSplitter(ABC):
         self.duration_s = duration_s
         self.split_s = split_s
         self.overlap_s = overlap_s
+        # chooses the splits, default fixed splits every split_s seconds
+        self.planner = planner
 
     @abstractmethod
     def split(self)->list[Path] :
-        ...
\ No newline at end of file
+        ...
+
+    def _get_splits(self, duration_s: float)->list[AudioSplit]:
+        if self.planner is not None:
+            return self.planner.plan(duration_s)
+        return plan_splits(duration_s, self.split_s, self.overlap_s)
+
+
+def plan_splits(duration_s: float, split_s: int, overlap_s: int)->list[AudioSplit]:
+    """
+    The splits an AudioSplitter cuts: fixed splits above MAX_DURATION_BEFORE_SPLIT_s,
+    otherwise the whole of [0, duration_s].
+    """
+    if duration_s > MAX_DURATION_BEFORE_SPLIT_s:
+        return plan_fixed_splits(duration_s, split_s, overlap_s)
+
+    audiosplit = AudioSplit(order=0,
+                start_time_s=0,
+                end_time_s=duration_s)
+    return [audiosplit]
+
+
+def plan_fixed_splits(duration_s: float, split_s: int, overlap_s: int)->list[AudioSplit]:
+    """
+    Cuts [0, duration_s] every split_s seconds, each split after the first starting
+    overlap_s seconds before its cut.
+    """
+    audio_splits_list = []
+
+    number_of_splits = max(math.ceil(duration_s / split_s), 1)
+    for i in range(number_of_splits):
+        if i==0:
+            start_time_s = i*split_s
+        else:
+            start_time_s = i*split_s - overlap_s
+
+        if i == (number_of_splits-1):
+        # TODO using math.ceil here might cause DNE problems 
+            end_time_s = math.ceil( duration_s )
+        else:
+            end_time_s = (i+1)*split_s
+
+        order = i
+        audiosplit = AudioSplit(order=order,
+                                start_time_s=start_time_s,
+                                end_time_s=end_time_s)
+        audio_splits_list.append(audiosplit)
+
+    return audio_splits_list
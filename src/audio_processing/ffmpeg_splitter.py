@@ -1,26 +1,17 @@
-import math 
+import os
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from dataclasses import dataclass
 from subprocess import run
+from time import perf_counter
+from typing import Optional
 
 from utils import LoggingObject
 
-from .audio_splitter import AudioSplitter
+from .audio_splitter import AudioSplit, AudioSplitter
+from .split_planner import SplitPlanner
 
-MAX_DURATION_BEFORE_SPLIT_s = 3600 #TODO should be injected from config
-
-@dataclass
-class AudioSplit:
-  order : int
-  start_time_s : int
-  end_time_s : int
-  duration_s : int = 0
-  file_name : str = ''
-
-  def __post_init__(self):
-    self.duration_s = self.end_time_s - self.start_time_s
-    self.file_name = f"segment_{self.order:03d}.wav"
+SPLIT_MODES = ('parallel', 'single')
 
 class FFmpegSplitter(LoggingObject, AudioSplitter):
     def __init__(
@@ -30,7 +21,10 @@ class FFmpegSplitter(LoggingObject, AudioSplitter):
         output_directory: Path,
         duration_s: float, #TODO could be derived from input_file
         split_s: int,
-        overlap_s: int):
+        overlap_s: int,
+        mode: str = 'parallel',
+        max_workers: Optional[int] = None,
+        planner: Optional[SplitPlanner] = None):
         
         super().__init__(
             name,
@@ -38,7 +32,8 @@ class FFmpegSplitter(LoggingObject, AudioSplitter):
             output_directory,
             duration_s,
             split_s,
-            overlap_s)
+            overlap_s,
+            planner)
 
         """ audio splitter 
         input_file: Path 
@@ -47,57 +42,76 @@ class FFmpegSplitter(LoggingObject, AudioSplitter):
         duration_s: float
         split_s: float? 3600, subsegments are split into this size (plus the overlap)
         overlap_s: float? 300, overlap between subsegments
+        mode: 'parallel' runs one input-seeking ffmpeg job per split on a bounded worker pool,
+              'single' writes every split from one ffmpeg invocation
+        max_workers: size of the worker pool in parallel mode, default is the CPU count
+        planner: chooses the splits, e.g. a VADSplitPlanner, default fixed splits
         """
 
+        if mode not in SPLIT_MODES:
+            raise ValueError(f"Unknown split mode {mode}, expected one of {SPLIT_MODES}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count()
+
+        self.audio_splits: list[AudioSplit] = []
 
     def split(self)->list[Path]:
         split_list = self._get_splits(self.duration_s)
+        self.audio_splits = split_list
+
+        start = perf_counter()
+        if self.mode == 'single':
+            files_list = self._split_single(split_list)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                files_list = list(executor.map(self._split, split_list))
 
+        self.logger.info(f"Split {self.input_file} into {len(files_list)} files in {perf_counter() - start:.2f} s ({self.mode})")
+        self.logger.debug(f"Split list: {split_list}")
+        return files_list
+
+    def _split(self, split: AudioSplit)->Path:
+        """
+        Writes a single split. -ss and -t are input options so ffmpeg seeks in the
+        input instead of decoding everything before the split start.
+        """
+        start = perf_counter()
+        output_file = self.output_directory / split.file_name
+        command = [
+            "ffmpeg", "-y",
+            "-ss", str(split.start_time_s),
+            "-t", str(split.duration_s),
+            "-i", str(self.input_file),
+            "-c", "copy",
+            str(output_file),
+        ]
+        output = run(command, capture_output=True)
+        self.logger.debug(output)
+        if output.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to write split {split.order} of {self.input_file}: {output.stderr.decode(errors='replace')}")
+        self.logger.debug(f"Wrote split {split.order} in {perf_counter() - start:.2f} s")
+        return output_file
+
+    def _split_single(self, split_list: list[AudioSplit])->list[Path]:
+        """
+        Writes every split from one ffmpeg invocation. The input is read once and each
+        output stream-copies its own (overlapping) time range.
+        """
+        command = ["ffmpeg", "-y", "-i", str(self.input_file)]
         files_list = []
-        # _split
         for split in split_list:
             output_file = self.output_directory / split.file_name
-            command_line = f"ffmpeg -i {self.input_file} -ss {split.start_time_s} -to {split.end_time_s} -c copy {output_file}\n"
-            command = command_line.split()
-            output = run(command, capture_output=True )
-            self.logger.debug(output)
+            command += [
+                "-map", "0:a",
+                "-ss", str(split.start_time_s),
+                "-t", str(split.duration_s),
+                "-c", "copy",
+                str(output_file),
+            ]
             files_list.append(output_file)
 
-        self.logger.debug(f"Split {self.input_file} into {len(files_list)} files")
-        self.logger.debug(f"Split list: {split_list}")
+        output = run(command, capture_output=True)
+        self.logger.debug(output)
+        if output.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to split {self.input_file}: {output.stderr.decode(errors='replace')}")
         return files_list
-        # end _split
-
-    def _get_splits(self, duration_s: float)->list[AudioSplit]:
-        audio_splits_list = []
-
-        if duration_s > MAX_DURATION_BEFORE_SPLIT_s:
-            number_of_splits = math.ceil(duration_s / self.split_s)
-            for i in range(number_of_splits):
-                if i==0:
-                    start_time_s = i*self.split_s
-                else:
-                    start_time_s = i*self.split_s - self.overlap_s
-
-                if i == (number_of_splits-1):
-                # TODO using math.ceil here might cause DNE problems 
-                    end_time_s = math.ceil( duration_s )
-                else:
-                    end_time_s = (i+1)*self.split_s
-
-                order = i
-                audiosplit = AudioSplit(order=order,
-                                        start_time_s=start_time_s,
-                                        end_time_s=end_time_s)
-                audio_splits_list.append(audiosplit)
-            
-        else:
-            audiosplit = AudioSplit(order=0,
-                        start_time_s=0,
-                        end_time_s=duration_s)
-            audio_splits_list.append(audiosplit)
-
-        return audio_splits_list
-
-    def _split(self):
-        pass
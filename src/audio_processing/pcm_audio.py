@@ -0,0 +1,91 @@
+import wave
+from pathlib import Path
+from subprocess import PIPE, run
+from typing import Optional
+
+import numpy as np
+
+SAMPLE_RATE_HZ = 16000
+SAMPLE_WIDTH_BYTES = 2
+PCM_DTYPE = np.dtype('<i2')
+
+
+class PCMAudio:
+    """
+    16 kHz mono 16-bit audio, decoded once and shared as zero-copy views.
+
+    The samples are either an in-memory buffer decoded from an ffmpeg pipe or a
+    read-only memory map of a raw .pcm file. slice() returns views into the same
+    buffer, so handing splits to the transcriber and diarizer copies nothing.
+    """
+
+    def __init__(
+        self,
+        samples: np.ndarray,
+        sample_rate_hz: int = SAMPLE_RATE_HZ,
+        source: Optional[Path] = None,
+        pcm_file: Optional[Path] = None,
+        ):
+        """
+        source: the file the audio was decoded from
+        pcm_file: the raw file backing samples, if they are memory-mapped
+        """
+        self.samples = samples
+        self.sample_rate_hz = sample_rate_hz
+        self.source = source
+        self.pcm_file = pcm_file
+
+    @classmethod
+    def from_file(cls, input_file: Path, pcm_file: Optional[Path] = None) -> 'PCMAudio':
+        """
+        Decodes any ffmpeg-readable file to 16 kHz mono PCM.
+
+        Without pcm_file the decoded samples are read from ffmpeg's stdout into memory.
+        With pcm_file they are written to that raw file and memory-mapped, so the pages
+        can be shared between processes and reused by later runs.
+        """
+        output = '-' if pcm_file is None else str(pcm_file)
+        command = [
+            "ffmpeg", "-nostdin", "-y",
+            "-i", str(input_file),
+            "-vn", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(SAMPLE_RATE_HZ),
+            "-f", "s16le", output,
+        ]
+        result = run(command, stdout=PIPE, stderr=PIPE)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to decode {input_file}: {result.stderr.decode(errors='replace')}")
+
+        if pcm_file is not None:
+            return cls.from_pcm_file(pcm_file, source=input_file)
+        return cls(np.frombuffer(result.stdout, dtype=PCM_DTYPE), source=input_file)
+
+    @classmethod
+    def from_pcm_file(cls, pcm_file: Path, source: Optional[Path] = None) -> 'PCMAudio':
+        """Memory-maps a raw 16 kHz mono s16le file"""
+        if pcm_file.stat().st_size == 0:
+            return cls(np.zeros(0, dtype=PCM_DTYPE), source=source or pcm_file, pcm_file=pcm_file)
+        samples = np.memmap(pcm_file, dtype=PCM_DTYPE, mode='r')
+        return cls(samples, source=source or pcm_file, pcm_file=pcm_file)
+
+    @property
+    def duration_s(self) -> float:
+        return len(self.samples) / self.sample_rate_hz
+
+    def slice(self, start_s: float, end_s: Optional[float] = None) -> 'PCMAudio':
+        """Returns a view of [start_s, end_s), without copying the samples"""
+        start = max(int(round(start_s * self.sample_rate_hz)), 0)
+        end = len(self.samples) if end_s is None else int(round(end_s * self.sample_rate_hz))
+        return PCMAudio(self.samples[start:end], self.sample_rate_hz, self.source)
+
+    def to_float32(self) -> np.ndarray:
+        """Returns the samples scaled to [-1, 1) as float32, the input format of Whisper and WhisperX"""
+        return self.samples.astype(np.float32) / 32768.0
+
+    def write_wav(self, output_file: Path) -> Path:
+        """Writes the samples to a WAV file for consumers that can only read files"""
+        with wave.open(str(output_file), 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(SAMPLE_WIDTH_BYTES)
+            f.setframerate(self.sample_rate_hz)
+            f.writeframes(np.ascontiguousarray(self.samples, dtype=PCM_DTYPE).tobytes())
+        return output_file
@@ -0,0 +1,58 @@
+from pathlib import Path
+from time import perf_counter
+from typing import Optional
+
+from utils import LoggingObject
+
+from .audio_splitter import AudioSplit, AudioSplitter
+from .pcm_audio import PCMAudio
+from .split_planner import SplitPlanner
+
+
+class PCMSplitter(LoggingObject, AudioSplitter):
+    """
+    Splits an already decoded PCMAudio buffer.
+
+    Every split is a view into the shared buffer. The splits are still written out
+    as WAV files because the NeMo diarizer only reads audio through its manifest,
+    but nothing is decoded again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        audio: PCMAudio,
+        output_directory: Path,
+        split_s: int,
+        overlap_s: int,
+        planner: Optional[SplitPlanner] = None):
+
+        super().__init__(
+            name,
+            audio.source,
+            output_directory,
+            audio.duration_s,
+            split_s,
+            overlap_s,
+            planner)
+
+        self.audio = audio
+        self.audio_splits: list[AudioSplit] = []
+
+    def split(self)->list[Path]:
+        split_list = self._get_splits(self.duration_s)
+        self.audio_splits = split_list
+
+        start = perf_counter()
+        files_list = [
+            self.split_audio(split).write_wav(self.output_directory / split.file_name)
+            for split in split_list
+        ]
+
+        self.logger.info(f"Split {self.input_file} into {len(files_list)} files in {perf_counter() - start:.2f} s (memory)")
+        self.logger.debug(f"Split list: {split_list}")
+        return files_list
+
+    def split_audio(self, split: AudioSplit) -> PCMAudio:
+        """Returns the zero-copy view of a split"""
+        return self.audio.slice(split.start_time_s, split.end_time_s)
@@ -0,0 +1,149 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from utils import WordTable
+
+from .pcm_audio import PCM_DTYPE, PCMAudio
+from .split_planner import VAD_FRAME_S, detect_speech, frame_energy_db, silence_intervals
+
+
+@dataclass
+class OffsetMap:
+    """
+    Maps times in compacted audio back to the original recording.
+
+    Segment i of the compacted audio starts at compact_start_s[i], lasts duration_s[i] and
+    was cut from the original at original_start_s[i]. Times are in seconds.
+    """
+    compact_start_s: np.ndarray
+    original_start_s: np.ndarray
+    duration_s: np.ndarray
+    original_duration_s: float
+
+    @classmethod
+    def identity(cls, duration_s: float) -> 'OffsetMap':
+        return cls(np.zeros(1), np.zeros(1), np.array([duration_s]), duration_s)
+
+    @property
+    def compact_duration_s(self) -> float:
+        return float(self.duration_s.sum())
+
+    @property
+    def removed_s(self) -> float:
+        return self.original_duration_s - self.compact_duration_s
+
+    def _segments(self, times_s: np.ndarray, end: bool) -> np.ndarray:
+        # an end time on a segment boundary belongs to the segment it ends, a start time to the one it starts
+        side = 'left' if end else 'right'
+        segments = np.searchsorted(self.compact_start_s, times_s, side=side) - 1
+        return np.clip(segments, 0, len(self.compact_start_s) - 1)
+
+    def to_original(self, times_s: np.ndarray, end: bool = False) -> np.ndarray:
+        """Original times of compacted times, end=True for the end times of intervals"""
+        times_s = np.asarray(times_s, dtype=np.float64)
+        segments = self._segments(times_s, end)
+        return self.original_start_s[segments] + (times_s - self.compact_start_s[segments])
+
+    def remap_intervals(self, starts_s: np.ndarray, ends_s: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Maps compacted intervals to the original time base. An interval that spans a removed
+        stretch is split into one piece per segment, so a speaker turn never covers the
+        silence that was cut out of it. Returns the pieces' starts, ends and the index of
+        the interval each piece came from.
+        """
+        starts_s = np.asarray(starts_s, dtype=np.float64)
+        ends_s = np.asarray(ends_s, dtype=np.float64)
+        first = self._segments(starts_s, end=False)
+        last = np.maximum(self._segments(ends_s, end=True), first)
+
+        counts = last - first + 1
+        index = np.repeat(np.arange(len(starts_s)), counts)
+        offsets = np.cumsum(counts) - counts
+        segments = first[index] + (np.arange(len(index)) - offsets[index])
+
+        segment_starts = self.original_start_s[segments]
+        segment_ends = segment_starts + self.duration_s[segments]
+        piece_starts = np.where(segments == first[index], self.to_original(starts_s)[index], segment_starts)
+        piece_ends = np.where(segments == last[index], self.to_original(ends_s, end=True)[index], segment_ends)
+        return piece_starts, piece_ends, index
+
+    def remap_words(self, words: WordTable) -> WordTable:
+        """Returns the words on the original time base, in milliseconds as ever"""
+        start_ms = np.rint(self.to_original(words.start_ms / 1000) * 1000).astype(np.int64)
+        end_ms = np.rint(self.to_original(words.end_ms / 1000, end=True) * 1000).astype(np.int64)
+        return WordTable(start_ms, end_ms, words.text_id, words.text_pool, words.speaker, words.score)
+
+    def to_dict(self) -> dict:
+        return {
+            'compact_start_s': self.compact_start_s.tolist(),
+            'original_start_s': self.original_start_s.tolist(),
+            'duration_s': self.duration_s.tolist(),
+            'original_duration_s': self.original_duration_s,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'OffsetMap':
+        return cls(
+            np.array(data['compact_start_s'], dtype=np.float64),
+            np.array(data['original_start_s'], dtype=np.float64),
+            np.array(data['duration_s'], dtype=np.float64),
+            data['original_duration_s'],
+            )
+
+
+def compact_silences(
+    audio: PCMAudio,
+    pcm_file: Optional[Path] = None,
+    min_silence_s: float = 2.0,
+    keep_silence_s: float = 0.25,
+    frame_s: float = VAD_FRAME_S,
+    margin_db: float = 12.0,
+    ) -> tuple[PCMAudio, OffsetMap]:
+    """
+    Removes every silence of at least min_silence_s found by the energy VAD, keeping
+    keep_silence_s of it on each side so that word onsets and endings are not clipped.
+
+    Returns the compacted audio and the OffsetMap back to the original. With pcm_file the
+    kept segments are written to that raw file one at a time and memory-mapped, as
+    PCMAudio.from_file does, otherwise they are concatenated in memory.
+    """
+    if min_silence_s <= 2 * keep_silence_s:
+        raise ValueError(f"Minimum silence {min_silence_s} s must be longer than the {keep_silence_s} s kept on each side")
+
+    sample_rate_hz = audio.sample_rate_hz
+    speech = detect_speech(frame_energy_db(audio, frame_s), margin_db)
+    silence_starts_s, silence_ends_s = silence_intervals(speech, frame_s, min_silence_s)
+
+    removed_starts = np.rint((silence_starts_s + keep_silence_s) * sample_rate_hz).astype(np.int64)
+    removed_ends = np.rint((silence_ends_s - keep_silence_s) * sample_rate_hz).astype(np.int64)
+    kept_starts = np.r_[0, removed_ends]
+    kept_ends = np.r_[removed_starts, len(audio.samples)]
+    nonempty = kept_ends > kept_starts
+    kept_starts, kept_ends = kept_starts[nonempty], kept_ends[nonempty]
+    if len(kept_starts) == 0:
+        if pcm_file is None:
+            return audio, OffsetMap.identity(audio.duration_s)
+        # nothing to compact, but callers still checkpoint pcm_file
+        with pcm_file.open('wb') as f:
+            f.write(np.ascontiguousarray(audio.samples, dtype=PCM_DTYPE).tobytes())
+        return PCMAudio.from_pcm_file(pcm_file, source=audio.source), OffsetMap.identity(audio.duration_s)
+
+    lengths = kept_ends - kept_starts
+    offset_map = OffsetMap(
+        compact_start_s=(np.cumsum(lengths) - lengths) / sample_rate_hz,
+        original_start_s=kept_starts / sample_rate_hz,
+        duration_s=lengths / sample_rate_hz,
+        original_duration_s=audio.duration_s,
+        )
+
+    if pcm_file is None:
+        samples = np.concatenate([audio.samples[start:end] for start, end in zip(kept_starts, kept_ends)])
+        return PCMAudio(samples, sample_rate_hz, source=audio.source), offset_map
+
+    with pcm_file.open('wb') as f:
+        for start, end in zip(kept_starts, kept_ends):
+            f.write(np.ascontiguousarray(audio.samples[start:end], dtype=PCM_DTYPE).tobytes())
+    return PCMAudio.from_pcm_file(pcm_file, source=audio.source), offset_map
@@ -0,0 +1,171 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+
+from utils import LoggingObject
+
+from .audio_splitter import AudioSplit
+from .pcm_audio import PCMAudio
+
+SPLIT_PLANNERS = ('fixed', 'vad')
+VAD_FRAME_S = 0.03
+VAD_BLOCK_FRAMES = 20000        # frames per block of energy computation, 10 minutes at 30 ms
+
+
+def frame_energy_db(audio: PCMAudio, frame_s: float = VAD_FRAME_S) -> np.ndarray:
+    """RMS energy of each frame_s frame in dB relative to full scale, a trailing partial frame is dropped"""
+    frame_length = int(frame_s * audio.sample_rate_hz)
+    num_frames = len(audio.samples) // frame_length
+    energy_db = np.empty(num_frames, dtype=np.float32)
+
+    # in blocks, so that a memory-mapped episode of many hours is never copied as floats at once
+    for first in range(0, num_frames, VAD_BLOCK_FRAMES):
+        last = min(first + VAD_BLOCK_FRAMES, num_frames)
+        block = audio.samples[first * frame_length:last * frame_length].astype(np.float32) / 32768.0
+        power = np.mean(block.reshape(-1, frame_length) ** 2, axis=1)
+        energy_db[first:last] = 10 * np.log10(power + 1e-10)
+    return energy_db
+
+
+def detect_speech(energy_db: np.ndarray, margin_db: float = 12.0, floor_percentile: float = 10.0) -> np.ndarray:
+    """
+    Energy VAD: a frame is speech when it is margin_db above the noise floor, estimated
+    as the floor_percentile of all frame energies, so the threshold adapts to the
+    recording's level and background noise.
+    """
+    if len(energy_db) == 0:
+        return np.zeros(0, dtype=bool)
+    threshold_db = np.percentile(energy_db, floor_percentile) + margin_db
+    return energy_db > threshold_db
+
+
+def silence_intervals(speech: np.ndarray, frame_s: float, min_silence_s: float) -> tuple[np.ndarray, np.ndarray]:
+    """Start and end times in seconds of the runs of non-speech frames lasting at least min_silence_s"""
+    padded = np.r_[True, speech, True].astype(np.int8)
+    changes = np.diff(padded)
+    starts = np.flatnonzero(changes == -1)
+    ends = np.flatnonzero(changes == 1)
+    long_enough = (ends - starts) * frame_s >= min_silence_s
+    return starts[long_enough] * frame_s, ends[long_enough] * frame_s
+
+
+class SplitPlanner(ABC):
+    @abstractmethod
+    def plan(self, duration_s: float) -> list[AudioSplit]:
+        ...
+
+
+class VADSplitPlanner(LoggingObject, SplitPlanner):
+    """
+    Plans splits that are cut in silences rather than at fixed times.
+
+    A cheap energy VAD pass over the decoded audio finds the pauses. Each cut goes in the
+    longest pause within search_s of the target split length, so no utterance is cut in
+    two. Consecutive splits overlap symmetrically around the cut, so SplitCombiner, which
+    stitches at the middle of each overlap, stitches exactly in the pause.
+
+    The overlap only has to give SplitCombiner enough shared speech to match speakers,
+    not to hide a cut through speech, so it starts at overlap_s and only grows, up to
+    max_overlap_s, where the pause is surrounded by less than min_overlap_speech_s of speech.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        audio: PCMAudio,
+        split_s: float,
+        overlap_s: float = 30.0,
+        search_s: Optional[float] = None,
+        min_silence_s: float = 0.3,
+        min_overlap_speech_s: float = 15.0,
+        max_overlap_s: float = 300.0,
+        frame_s: float = VAD_FRAME_S,
+        margin_db: float = 12.0,
+        ):
+        """
+        search_s: how far a cut may move from the target length, default a tenth of split_s
+        """
+        super().__init__(name)
+
+        if overlap_s > max_overlap_s:
+            raise ValueError(f"Overlap {overlap_s} s is above the maximum overlap {max_overlap_s} s")
+
+        self.audio = audio
+        self.split_s = split_s
+        self.overlap_s = overlap_s
+        self.search_s = split_s / 10 if search_s is None else search_s
+        self.min_silence_s = min_silence_s
+        self.min_overlap_speech_s = min_overlap_speech_s
+        self.max_overlap_s = max_overlap_s
+        self.frame_s = frame_s
+        self.margin_db = margin_db
+
+        self._speech: Optional[np.ndarray] = None
+
+    @property
+    def speech(self) -> np.ndarray:
+        """Per-frame speech flags, computed on first use"""
+        if self._speech is None:
+            self._speech = detect_speech(frame_energy_db(self.audio, self.frame_s), self.margin_db)
+            self.logger.debug("VAD found %.1f s of speech in %.1f s of audio",
+                              self._speech.sum() * self.frame_s, self.audio.duration_s)
+        return self._speech
+
+    def plan(self, duration_s: float) -> list[AudioSplit]:
+        cuts = self.choose_cuts(duration_s)
+        if not cuts:
+            return [AudioSplit(order=0, start_time_s=0, end_time_s=duration_s)]
+
+        half_overlaps = [self.overlap_half_width(cut) for cut in cuts]
+        starts = [0.0] + [cut - half for cut, half in zip(cuts, half_overlaps)]
+        ends = [cut + half for cut, half in zip(cuts, half_overlaps)] + [duration_s]
+        splits = [
+            AudioSplit(order=order, start_time_s=round(start, 3), end_time_s=round(end, 3))
+            for order, (start, end) in enumerate(zip(starts, ends))
+        ]
+
+        total_overlap_s = 2 * sum(half_overlaps)
+        self.logger.info("Planned %s splits cut in silences, %.0f s of audio diarized twice (%.0f s with fixed splits)",
+                         len(splits), total_overlap_s, self.max_overlap_s * len(cuts))
+        return splits
+
+    def choose_cuts(self, duration_s: float) -> list[float]:
+        """Cut times in seconds, in the longest pause near each target, or at the target where there is none"""
+        silence_starts, silence_ends = silence_intervals(self.speech, self.frame_s, self.min_silence_s)
+        silence_mids = (silence_starts + silence_ends) / 2
+        silence_lengths = silence_ends - silence_starts
+
+        cuts = []
+        position = 0.0
+        while duration_s - position > self.split_s:
+            target = position + self.split_s
+            # never so early that a split is shorter than half the split length, nor past the end
+            low = max(target - self.search_s, position + self.split_s / 2)
+            high = min(target + self.search_s, duration_s - self.split_s / 10)
+            candidates = np.flatnonzero((silence_mids >= low) & (silence_mids <= high))
+
+            if len(candidates):
+                # longest pause first, then the one closest to the target
+                best = max(candidates, key=lambda i: (silence_lengths[i], -abs(silence_mids[i] - target)))
+                cut = float(silence_mids[best])
+            else:
+                self.logger.warning("No pause of %s s within %s s of %.0f s, cutting through speech",
+                                    self.min_silence_s, self.search_s, target)
+                cut = target
+            cuts.append(cut)
+            position = cut
+        return cuts
+
+    def speech_s(self, start_s: float, end_s: float) -> float:
+        first = max(int(start_s / self.frame_s), 0)
+        last = max(int(end_s / self.frame_s), first)
+        return float(np.count_nonzero(self.speech[first:last])) * self.frame_s
+
+    def overlap_half_width(self, cut: float) -> float:
+        """Half the overlap around a cut, widened in steps until it holds min_overlap_speech_s of speech"""
+        half = self.overlap_s / 2
+        step = max(self.overlap_s / 2, 5.0)
+        while self.speech_s(cut - half, cut + half) < self.min_overlap_speech_s and 2 * half < self.max_overlap_s:
+            half = min(half + step, self.max_overlap_s / 2)
+        return half
@@ -1 +1,9 @@
-from .nemo_diarizer import prep_NeMo, run_NeMo
\ No newline at end of file
+from .nemo_diarizer import prep_NeMo, run_NeMo
+from .speaker_embeddings import (
+    SpeakerCentroids,
+    centroids_file,
+    load_segment_embeddings,
+    merge_centroids,
+    save_split_centroids,
+    speaker_centroids,
+)
\ No newline at end of file
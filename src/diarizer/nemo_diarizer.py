@@ -1,12 +1,24 @@
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 import json
+import os
+import shutil
+import tempfile
 from pathlib import Path
 
-from omegaconf import OmegaConf
-import wget 
-from nemo.collections.asr.models.msdd_models import ClusteringDiarizer
+from utils import model_cache
 
-def prep_NeMo(audio_in: Path, output_dir: Path, num_speakers:Optional[int]=None):
+# omegaconf, wget and NeMo are imported where they are used, NeMo pulls in torch and
+# much more and importing it takes seconds
+if TYPE_CHECKING:
+    from nemo.collections.asr.models.msdd_models import ClusteringDiarizer
+
+def prep_NeMo(audio_in: Path, output_dir: Path, num_speakers:Optional[int]=None, config_dir:Optional[Path]=None, save_embeddings:bool=False):
+    """
+    Writes the NeMo manifest for audio_in to output_dir and returns the diarizer config.
+    The inference config is downloaded once into config_dir, default output_dir.
+    With save_embeddings NeMo also saves the TitaNet embedding of every segment, see speaker_embeddings.
+    """
+    from omegaconf import OmegaConf
 
     manifest = 'manifest.json'
     manifest_path = output_dir / manifest
@@ -26,10 +38,16 @@ def prep_NeMo(audio_in: Path, output_dir: Path, num_speakers:Optional[int]=None)
     with manifest_path.open('w') as f:
         f.write(json.dumps(diarize_manifest))
 
-    model_config = output_dir / 'diar_infer_meeting.yaml'
+    config_dir = config_dir or output_dir
+    model_config = config_dir / 'diar_infer_meeting.yaml'
     if not model_config.exists():
+      import wget
       config_url = "https://raw.githubusercontent.com/NVIDIA/NeMo/main/examples/speaker_tasks/diarization/conf/inference/diar_infer_meeting.yaml"
-      model_config = wget.download(config_url, str(output_dir))
+      # splits diarized in parallel may all download it at once, each into its own directory
+      # and then moved into place, so none of them reads a half-written or renamed copy
+      download_dir = Path(tempfile.mkdtemp(dir=config_dir))
+      os.replace(wget.download(config_url, str(download_dir)), model_config)
+      shutil.rmtree(download_dir, ignore_errors=True)
 
     #TODO save model config to output_dir and load it from there
 
@@ -45,7 +63,7 @@ def prep_NeMo(audio_in: Path, output_dir: Path, num_speakers:Optional[int]=None)
     config.diarizer.speaker_embeddings.parameters.window_length_in_sec = [1.5, 1.0, 0.5]
     config.diarizer.speaker_embeddings.parameters.shift_length_in_sec = [0.75, 0.5, 0.25]
     config.diarizer.speaker_embeddings.parameters.multiscale_weights = [0.33, 0.33, 0.33]
-    config.diarizer.speaker_embeddings.parameters.save_embeddings = False
+    config.diarizer.speaker_embeddings.parameters.save_embeddings = save_embeddings
 
     config.diarizer.ignore_overlap = False
     config.diarizer.oracle_vad = False
@@ -57,12 +75,34 @@ def prep_NeMo(audio_in: Path, output_dir: Path, num_speakers:Optional[int]=None)
 
     return config 
 
+def get_diarizer(config) -> 'ClusteringDiarizer':
+    """
+    Returns a cached ClusteringDiarizer for the VAD and speaker models in config, so
+    TitaNet and MarbleNet are loaded once per process rather than once per split.
+    """
+    from nemo.collections.asr.models.msdd_models import ClusteringDiarizer
+
+    key = (
+        'nemo_clustering_diarizer',
+        config.diarizer.vad.model_path,
+        config.diarizer.speaker_embeddings.model_path,
+        config.get('device', None),
+    )
+    model = model_cache.get(key, lambda: ClusteringDiarizer(cfg=config))
+
+    # the diarizer reads its inputs and outputs from its config when diarize() runs,
+    # so point a cached instance at this run's manifest and output directory
+    model._diarizer_params.manifest_filepath = config.diarizer.manifest_filepath
+    model._diarizer_params.out_dir = config.diarizer.out_dir
+    model._speaker_params.save_embeddings = config.diarizer.speaker_embeddings.parameters.save_embeddings
+    return model
+
 def run_NeMo(config, audio_in:Path)->Path:
     """
     Runs the NeMo diarization model. Output is saved based on prep_NeMo() config.
     """
     
-    model = ClusteringDiarizer(cfg=config)
+    model = get_diarizer(config)
     model.diarize()
     rttm_file = Path(config.diarizer.out_dir) / 'pred_rttms' / (audio_in.stem + '.rttm')
 
@@ -0,0 +1,140 @@
+import json
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from utils import RTTMRecords, read_rttm
+
+# NeMo saves embeddings per scale, scale 0 has the longest windows (1.5 s), whose
+# embeddings identify a speaker most reliably
+EMBEDDINGS_SCALE = 0
+
+
+@dataclass
+class SpeakerCentroids:
+    """
+    One L2-normalized TitaNet centroid embedding per speaker label, with the seconds of
+    speech behind each, so centroids can be weighted when they are merged.
+    """
+    labels: list[str]
+    centroids: np.ndarray
+    speech_s: np.ndarray
+
+    def __len__(self):
+        return len(self.labels)
+
+    def save(self, path: Path) -> Path:
+        # the path is passed as an open file, so numpy does not append .npz to it
+        with path.open('wb') as f:
+            np.savez(f, labels=np.array(self.labels, dtype=str), centroids=self.centroids, speech_s=self.speech_s)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> 'SpeakerCentroids':
+        with np.load(path) as data:
+            return cls(data['labels'].tolist(), data['centroids'], data['speech_s'])
+
+
+def centroids_file(rttm_file: Path) -> Path:
+    """Where the centroids of the speakers in an RTTM file are kept, next to it"""
+    return rttm_file.with_name(rttm_file.stem + '_speakers.npz')
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def load_segment_embeddings(out_dir: Path, scale: int = EMBEDDINGS_SCALE) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Reads the segment embeddings NeMo's ClusteringDiarizer saved with save_embeddings for
+    the single file in its manifest. Returns the segments' start and end times in seconds
+    and their (segments, dimensions) embeddings.
+    """
+    speaker_dir = Path(out_dir) / 'speaker_outputs'
+    with (speaker_dir / 'embeddings' / f'subsegments_scale{scale}_embeddings.pkl').open('rb') as f:
+        embeddings_by_file = pickle.load(f)
+    if len(embeddings_by_file) != 1:
+        raise ValueError(f"Expected the embeddings of one file in {speaker_dir}, got {len(embeddings_by_file)}")
+    embeddings = next(iter(embeddings_by_file.values()))
+    # NeMo saves torch tensors
+    embeddings = embeddings.cpu().numpy() if hasattr(embeddings, 'cpu') else np.asarray(embeddings)
+
+    starts, durations = [], []
+    with (speaker_dir / f'subsegments_scale{scale}.json').open('r') as f:
+        for line in f:
+            if line.strip():
+                segment = json.loads(line)
+                starts.append(segment['offset'])
+                durations.append(segment['duration'])
+
+    if len(starts) != len(embeddings):
+        raise ValueError(f"{len(embeddings)} embeddings for {len(starts)} segments in {speaker_dir}")
+    start_s = np.array(starts, dtype=np.float64)
+    return start_s, start_s + np.array(durations, dtype=np.float64), embeddings.astype(np.float32)
+
+
+def speaker_centroids(
+    records: RTTMRecords,
+    segment_start_s: np.ndarray,
+    segment_end_s: np.ndarray,
+    embeddings: np.ndarray,
+    ) -> SpeakerCentroids:
+    """
+    Averages the embeddings of the segments whose midpoint falls in exactly one speaker's
+    turns, segments in overlapping speech or outside any turn are left out. Speakers with
+    no such segment are left out too.
+    """
+    midpoints = (segment_start_s + segment_end_s) / 2
+    labels = sorted(set(records.speaker))
+
+    inside = np.zeros((len(labels), len(midpoints)), dtype=bool)
+    for row, label in enumerate(labels):
+        mask = records.speaker == label
+        order = np.argsort(records.start_s[mask], kind='stable')
+        starts, ends = records.start_s[mask][order], records.end_s[mask][order]
+        # a speaker's own turns do not overlap, so only the last turn starting before a midpoint can contain it
+        turn = np.searchsorted(starts, midpoints, side='right') - 1
+        inside[row] = (turn >= 0) & (midpoints < ends[np.maximum(turn, 0)])
+    inside &= inside.sum(axis=0) == 1
+
+    found = inside.any(axis=1)
+    sums = inside[found].astype(np.float32) @ normalize_rows(embeddings)
+    # segments overlap, each counts up to where the next one starts so no second is counted twice
+    lengths = np.maximum(np.minimum(segment_end_s, np.r_[segment_start_s[1:], np.inf]) - segment_start_s, 0.0)
+    speech_s = inside[found].astype(np.float64) @ lengths
+    return SpeakerCentroids(
+        [label for label, keep in zip(labels, found) if keep],
+        normalize_rows(sums).astype(np.float32),
+        speech_s,
+        )
+
+
+def save_split_centroids(out_dir: Path, rttm_file: Path) -> Path:
+    """Computes the centroids of the speakers in a split's RTTM from NeMo's saved embeddings and saves them next to it"""
+    segment_start_s, segment_end_s, embeddings = load_segment_embeddings(out_dir)
+    centroids = speaker_centroids(read_rttm(rttm_file), segment_start_s, segment_end_s, embeddings)
+    return centroids.save(centroids_file(rttm_file))
+
+
+def merge_centroids(split_centroids: list[SpeakerCentroids], label_mappings: list[dict[str, str]]) -> SpeakerCentroids:
+    """
+    Merges per-split centroids into one per combined speaker label, weighting each split's
+    centroid by its seconds of speech. label_mappings maps each split's labels to the
+    combined labels, as SplitCombiner.label_mappings does.
+    """
+    merged: dict[str, list] = {}
+    for centroids, mapping in zip(split_centroids, label_mappings):
+        for label, centroid, speech_s in zip(centroids.labels, centroids.centroids, centroids.speech_s):
+            total = merged.setdefault(mapping.get(label, label), [0.0, 0.0])
+            total[0] = total[0] + centroid * speech_s
+            total[1] += speech_s
+
+    labels = sorted(merged)
+    if not labels:
+        dimensions = split_centroids[0].centroids.shape[1] if split_centroids else 0
+        return SpeakerCentroids([], np.zeros((0, dimensions), dtype=np.float32), np.zeros(0))
+    sums = np.stack([np.asarray(merged[label][0], dtype=np.float32) for label in labels])
+    return SpeakerCentroids(labels, normalize_rows(sums), np.array([merged[label][1] for label in labels]))
@@ -1,27 +1,15 @@
 import logging
 import argparse
+from contextlib import ExitStack
 from datetime import datetime, timezone
 from pathlib import Path
-from uuid import uuid4
-
-import torch
-
-from utils import (
-    configure_logging,
-    load_rttm_file,
-    load_word_timestamps,
-    get_words_speaker_mapping
-)
-from metadata import TinyTagAudioMetadata
-from audio_processing import FFmpegSplitter, ffmpeg_to_16k
-from transcriber import WhisperTranscriber
-from diarizer import prep_NeMo, run_NeMo
-from rttm_combiner import SegmentCombiner
-from punctuation_realignment import (
-    get_realigned_ws_mapping_with_punctuation,
-    get_sentences_speaker_mapping,
-    save_diarized_transcript,
-)
+
+from utils import configure_logging, model_cache
+from pipeline import BatchRunner, Pipeline, PipelineOptions, collect_episodes
+from punctuation_realignment import write_diarized_sentences
+from streaming import PCMStream, StreamingPipeline
+from streaming.pcm_stream import STDIN_SOURCE
+from web_vtt import SubtitleWriter
 
 """
 * The user should decide:
@@ -32,6 +20,13 @@ from punctuation_realignment import (
 * provide json config file for user to set these parameters
 """
 
+
+def detect_device() -> str:
+    # torch is imported only once a run needs it, so --help and --dry-run start in well under a second
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
 if __name__ == "__main__":
 
     APP_NAME = "Speaker Diarization"
@@ -44,14 +39,45 @@ if __name__ == "__main__":
         )
 
     #pylint: disable=line-too-long
-    parser.add_argument("-i", "--input", type=str, default="input.wav", help="Path to audio file, default input.wav")
+    parser.add_argument("-i", "--input", type=str, default="input.wav", help="Path to audio file, or a directory, glob or manifest file of episodes for batch mode, default input.wav")
     parser.add_argument("-o", "--output", type=str, default=None, help="Path to output directory, no default")
     parser.add_argument("-m", "--model", type=str, default="medium", help="Whisper model to use, default medium")
     parser.add_argument("-n", "--number-of-speakers", type=int, default=None, help="Number of speakers, default none (auto)")
     parser.add_argument("-l", "--language", type=str, default="en", help="Language to use, default english (en)")
     parser.add_argument("-v", "--verbose", action="store_true", help="Verbose output")
+    parser.add_argument("--model-cache-size", type=int, default=None, help="maximum number of models kept loaded, default unlimited")
+    parser.add_argument("--model-memory-budget-mb", type=int, default=None, help="evict least recently used models above this estimated size, default unlimited")
     parser.add_argument("--split-length", type=int, default=3600, help="audio split length in seconds")
-    parser.add_argument("--split-overlap", type=int, default=300, help="audio split overlap in seconds")
+    parser.add_argument("--split-overlap", type=int, default=None, help="audio split overlap in seconds, default 300, or with --split-planner vad the minimum overlap, default 30, or 0 with --combine-mode embedding")
+    parser.add_argument("--split-planner", type=str, default="fixed", choices=["fixed", "vad"], help="cut splits every --split-length seconds, or in the pauses found by an energy VAD pass near that length, default fixed")
+    parser.add_argument("--combine-mode", type=str, default="overlap", choices=["overlap", "embedding"], help="match speakers between splits by their activity in the overlap, or by their TitaNet speaker embeddings, which needs no overlap, default overlap")
+    parser.add_argument("--compact-silence", action="store_true", help="cut long silences out of the audio before Whisper and NeMo, timestamps are mapped back to the original")
+    parser.add_argument("--compact-min-silence", type=float, default=2.0, help="with --compact-silence, shortest silence in seconds that is cut, default 2.0")
+    parser.add_argument("--speaker-index", type=str, default=None, help="directory of a speaker embedding index: speakers found in it are labelled with their identity instead of Speaker <n>, and each episode's speakers are added to it")
+    parser.add_argument("--speaker-threshold", type=float, default=0.7, help="with --speaker-index, lowest cosine similarity at which a speaker is identified, default 0.7")
+    parser.add_argument("--no-speaker-index-update", action="store_true", help="with --speaker-index, only look speakers up, without adding the episodes to the index")
+    parser.add_argument("--split-mode", type=str, default="memory", choices=["memory", "parallel", "single"], help="slice the decoded audio in memory, parallel ffmpeg jobs per split, or a single ffmpeg invocation, default memory")
+    parser.add_argument("--split-workers", type=int, default=None, help="number of concurrent ffmpeg jobs in parallel split mode, default CPU count")
+    parser.add_argument("--transcribe-workers", type=int, default=1, help="transcribe overlapping chunks on this many worker processes, default 1 (whole file at once)")
+    parser.add_argument("--transcribe-chunk-length", type=int, default=None, help="chunk length in seconds for --transcribe-workers, default the audio splits")
+    parser.add_argument("--transcribe-chunk-overlap", type=int, default=30, help="chunk overlap in seconds for --transcribe-chunk-length, default 30")
+    parser.add_argument("--concurrent-stages", action="store_true", help="run Whisper and NeMo at the same time in separate worker processes")
+    parser.add_argument("--transcribe-threads", type=int, default=None, help="CPU threads for the Whisper worker with --concurrent-stages, or per chunk worker with --transcribe-workers")
+    parser.add_argument("--diarize-threads", type=int, default=None, help="CPU threads for the NeMo worker with --concurrent-stages, or per split worker with --diarize-workers, default the remaining CPUs shared between the workers")
+    parser.add_argument("--diarize-workers", type=int, default=1, help="diarize the splits in parallel on this many worker processes, each keeping its NeMo models loaded, default 1 (one split after another)")
+    parser.add_argument("--word-mapping", type=str, default="overlap", choices=["overlap", "start", "mid", "end"], help="map words to the speaker overlapping them most, or to the turn containing the word start/mid/end, default overlap")
+    parser.add_argument("--word-format", type=str, default="columns", choices=["columns", "jsonl"], help="checkpoint the transcript as memory-mappable columns or as JSON lines, default columns; a JSON lines copy is always written to the output directory")
+    parser.add_argument("--subtitle-formats", type=str, nargs="*", default=["vtt", "srt"], choices=["vtt", "srt"], help="subtitle files written next to diarization.txt, default vtt srt")
+    parser.add_argument("--stream", action="store_true", help="transcribe a live recording in rolling windows as it arrives, -i - reads stdin")
+    parser.add_argument("--follow", action="store_true", help="with --stream, keep reading the input file while it is still being written")
+    parser.add_argument("--stream-window", type=int, default=300, help="with --stream, window length in seconds, default 300")
+    parser.add_argument("--stream-hop", type=int, default=240, help="with --stream, seconds between windows, default 240")
+    parser.add_argument("--profile", type=str, nargs="*", default=[], metavar="STAGE", help="profile these stages, or all, writing reports to <output>/profiles")
+    parser.add_argument("--profiler", type=str, default="cprofile", choices=["cprofile", "pyinstrument"], help="profiler used by --profile, default cprofile")
+    parser.add_argument("--metrics-textfile", type=str, default=None, help="also write stage metrics to this Prometheus textfile, e.g. for the node_exporter textfile collector")
+    parser.add_argument("--checkpoint-dir", type=str, default=None, help="directory for stage checkpoints, default <output>/checkpoints")
+    parser.add_argument("--no-resume", action="store_true", help="recompute every stage instead of resuming from valid checkpoints")
+    parser.add_argument("--dry-run", action="store_true", help="validate the inputs and options and log the planned splits, without decoding audio or loading any model")
     #pylint: enable=line-too-long
 
     args = parser.parse_args()
@@ -70,8 +96,16 @@ if __name__ == "__main__":
     logger = logging.getLogger(LOG_NAME)
     logger.info("%s: starting", APP_NAME)
     
-    DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-    logger.info("Using device: %s", DEVICE)
+    if args.dry_run:
+        DEVICE = PipelineOptions.device
+    else:
+        DEVICE = detect_device()
+        logger.info("Using device: %s", DEVICE)
+
+    model_cache.configure(
+        max_models=args.model_cache_size,
+        memory_budget_bytes=args.model_memory_budget_mb * 1024 * 1024 if args.model_memory_budget_mb else None,
+        )
 
     MODEL_SIZE = args.model
     logger.info("Using model: %s", MODEL_SIZE)
@@ -81,14 +115,27 @@ if __name__ == "__main__":
     #TODO: problem, this defaults to english, not None
 
     AUDIO_IN = args.input
-    # check if file exists
-    if not Path(AUDIO_IN).is_file():
-        message = "Input file not found: %s", AUDIO_IN
-        logger.error(message)
-        raise FileNotFoundError(message)
+    if args.stream:
+        if AUDIO_IN != STDIN_SOURCE and not Path(AUDIO_IN).is_file():
+            message = f"Input file not found: {AUDIO_IN}"
+            logger.error(message)
+            raise FileNotFoundError(message)
+        logger.info("Streaming from: %s", "stdin" if AUDIO_IN == STDIN_SOURCE else AUDIO_IN)
+    else:
+        episodes = collect_episodes(AUDIO_IN)
+        if not episodes:
+            message = f"Input file not found: {AUDIO_IN}"
+            logger.error(message)
+            raise FileNotFoundError(message)
 
-    logger.info("Using file: %s", AUDIO_IN)
-    audio_in = Path(AUDIO_IN)
+        missing = [episode for episode in episodes if not episode.is_file()]
+        if missing:
+            message = f"Input files not found: {missing}"
+            logger.error(message)
+            raise FileNotFoundError(message)
+
+        batch_mode = len(episodes) > 1 or episodes[0] != Path(AUDIO_IN)
+        logger.info("Using %s: %s", "episodes" if batch_mode else "file", AUDIO_IN)
 
     SPEAKERS = args.number_of_speakers
     if SPEAKERS is None:
@@ -114,116 +161,92 @@ if __name__ == "__main__":
         raise FileNotFoundError("Output directory not found")
     output_dir = Path(OUTPUT_DIR)
     logger.info("Using output directory: %s", output_dir)
-    temp_uuid = uuid4()
-    output_temp_dir = output_dir / str(temp_uuid)
-    output_temp_dir.mkdir()
-    logger.debug("Using temp directory: %s", output_temp_dir)
-
-    #TODO: instead of a uuid, use the input file name so we can use checkpoints to resume
 
     # TODO verify or parse these variables into correct format
     split_length_s = args.split_length
     logger.info("Using split length (seconds): %s", split_length_s)
     split_overlap_s = args.split_overlap
+    if split_overlap_s is None:
+        if args.combine_mode == "embedding":
+            split_overlap_s = 0
+        else:
+            split_overlap_s = 30 if args.split_planner == "vad" else 300
     logger.info("Using split overlap (seconds): %s", split_overlap_s)
 
     # Above this is config and setup
 
-    # ------- METADATA -------
-
-    metadata = TinyTagAudioMetadata("Metadata", audio_in)
-    #TODO debug log metadata
-
-    # ------- 16K CONVERSION -------
-
-    audio_16k, log = ffmpeg_to_16k(audio_in, output_temp_dir)
-    logger.info("Converted audio to 16k: %s", audio_16k)
-    logger.debug("FFmpeg log: %s", log)
-
-    # ------- SPLIT -------
-
-    if metadata.duration_s > split_length_s:
-        audio_splitter = FFmpegSplitter(
-            "FFmpegSplitter",
-            audio_16k,
-            output_temp_dir,
-            metadata.duration_s,
-            split_length_s,
-            split_overlap_s,
-        )
-        input_splits = audio_splitter.split()
-    else:
-        input_splits = [audio_16k]
-    
-    # ------- WHISPER -------
-
-    transcriber = WhisperTranscriber(
-        # "WhisperTranscriber",
-        audio_in=audio_16k,
+    options = PipelineOptions(
         model_size=MODEL_SIZE,
         device=DEVICE,
         language=LANGUAGE,
+        num_speakers=SPEAKERS,
+        split_length_s=split_length_s,
+        split_overlap_s=split_overlap_s,
+        split_mode=args.split_mode,
+        split_workers=args.split_workers,
+        split_planner=args.split_planner,
+        compact_silence=args.compact_silence,
+        compact_min_silence_s=args.compact_min_silence,
+        combine_mode=args.combine_mode,
+        speaker_index=Path(args.speaker_index) if args.speaker_index else None,
+        speaker_match_threshold=args.speaker_threshold,
+        update_speaker_index=not args.no_speaker_index_update,
+        transcribe_workers=args.transcribe_workers,
+        transcribe_chunk_length_s=args.transcribe_chunk_length,
+        transcribe_chunk_overlap_s=args.transcribe_chunk_overlap,
+        concurrent_stages=args.concurrent_stages,
+        transcribe_threads=args.transcribe_threads,
+        diarize_threads=args.diarize_threads,
+        diarize_workers=args.diarize_workers,
+        word_mapping=args.word_mapping,
+        word_format=args.word_format,
+        subtitle_formats=tuple(args.subtitle_formats),
+        stream_window_s=args.stream_window,
+        stream_hop_s=args.stream_hop,
+        profile_stages=tuple(args.profile),
+        profiler=args.profiler,
+        prometheus_textfile=Path(args.metrics_textfile) if args.metrics_textfile else None,
+        checkpoint_dir=Path(args.checkpoint_dir) if args.checkpoint_dir else None,
+        resume=not args.no_resume,
         )
-
-    timestamped_words = transcriber.transcribe()
-    timestamped_words_filepath = transcriber.save_transcript(timestamped_words, output_dir)
-
-    # ------- NEMO -------
-    logger.info("Running NeMo")
-
-    rttm_splits = []
-    for split in input_splits:
-        logger.info("Processing split: %s", split)
-        nemo_config = prep_NeMo(split, output_temp_dir, SPEAKERS)
-        rttm_file = run_NeMo(nemo_config, split)
-        rttm_splits.append(rttm_file)
-
-    # ------- SEGMENT COMBINE RTTM -------
-    logger.info("Combining RTTM files")
-
-    rttm_output_file_path = rttm_splits[0]
-    for i in range(1, len(rttm_splits)):
-        rttm_file_path_2 = rttm_splits[i+1]
-        
-        SIGNAL_QUALITY_S = 0.1
-
-        segcom = SegmentCombiner(
-        rttm_output_file_path,
-        rttm_file_path_2,
-        output_temp_dir,
-        split_length_s,
-        split_overlap_s,
-        SIGNAL_QUALITY_S
-        )
-        rttm_output_file_path = segcom.run()
-
-    rttm_output_file_path = rttm_output_file_path.rename(output_dir / "combined_output.rttm")
-
-    # ------- COMBINE WORDS AND RTTM -------
-    logger.info("Combining words and RTTM")
-
-    # timestamped_words_filepath = Path("/home/gdoerksen/repos/PodcastTranscription/output/C1E2_IntoTheMuck_16k.txt")
-
-    #TODO already have timestamped_words
-    words = load_word_timestamps(timestamped_words_filepath)
-    speakers = load_rttm_file(rttm_output_file_path)
-
-    combined_words_and_speakers = get_words_speaker_mapping(words, speakers, 'start')   
-
-
-    # ------- REALIGNMENT VIA PUNCTUATION -------`  
-    logger.info("Realigning via punctuation")
-
-    wsm = get_realigned_ws_mapping_with_punctuation(combined_words_and_speakers)
-    ssm = get_sentences_speaker_mapping(wsm, speakers)
-    save_diarized_transcript(ssm, output_dir)
-
-    logger.info("Completed diarization on file: %s", audio_in)
-
-    pass
-
-    """
-    ssm {'speaker': f'Speaker {spk}', 'start_time': start, 'end_time': end, 'text': ''}
-    """
-
-    #TODO: output WebVTT file 
+    if args.dry_run:
+        if args.stream:
+            latency_s = StreamingPipeline.check_options(options)
+            logger.info("Dry run: %s s windows every %s s, sentences at most %.0f s of audio behind the stream",
+                        options.stream_window_s, options.stream_hop_s, latency_s)
+        else:
+            failed = []
+            pipeline = Pipeline("Pipeline", options)
+            for episode in episodes:
+                try:
+                    plan = pipeline.plan(episode)
+                except Exception as ex:
+                    logger.error("Dry run: %s: %s: %s", episode, type(ex).__name__, ex)
+                    failed.append(episode)
+                    continue
+                logger.info("Dry run: %s, %.1f s, %s splits %s, transcription chunks %s",
+                            episode, plan['duration_s'], plan['split_planner'], plan['splits'],
+                            plan['transcription_chunks'] or "none")
+            if failed:
+                raise SystemExit(f"Dry run failed for {len(failed)} of {len(episodes)} episodes")
+        logger.info("Dry run complete, no audio was decoded and no model was loaded")
+    elif args.stream:
+        stream = PCMStream("PCMStream", AUDIO_IN, follow=args.follow)
+        streaming_pipeline = StreamingPipeline("StreamingPipeline", options, output_dir / "stream")
+        with ExitStack() as stack:
+            f = stack.enter_context((output_dir / 'diarization.txt').open('w'))
+            subtitle_writers = [
+                stack.enter_context(SubtitleWriter("SubtitleWriter", output_dir / f'diarization.{subtitle_format}'))
+                for subtitle_format in options.subtitle_formats
+            ]
+            for sentence in streaming_pipeline.run(stream):
+                write_diarized_sentences([sentence], f)
+                f.flush()
+                for writer in subtitle_writers:
+                    writer.write(sentence)
+    else:
+        with Pipeline("Pipeline", options) as pipeline:
+            if batch_mode:
+                BatchRunner("BatchRunner", pipeline, output_dir).run(episodes)
+            else:
+                pipeline.run(episodes[0], output_dir)
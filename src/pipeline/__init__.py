@@ -0,0 +1,3 @@
+from .options import PipelineOptions
+from .pipeline import Pipeline
+from .batch import BatchRunner, collect_episodes
\ No newline at end of file
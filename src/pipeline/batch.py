@@ -0,0 +1,123 @@
+import glob
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from time import perf_counter
+from typing import Optional
+
+from utils import LoggingObject
+
+from .pipeline import Pipeline
+
+AUDIO_EXTENSIONS = {'.wav', '.mp3', '.m4a', '.aac', '.flac', '.ogg', '.opus', '.wma', '.mp4', '.webm'}
+MANIFEST_EXTENSIONS = {'.txt', '.lst', '.manifest'}
+
+
+def collect_episodes(source: str) -> list[Path]:
+    """
+    Resolves an input to a list of episode files.
+
+    source can be a single audio file, a directory (its audio files, sorted), a glob
+    pattern, or a manifest file listing one episode path per line. Relative manifest
+    entries are resolved against the manifest's directory, blank lines and lines
+    starting with # are ignored.
+    """
+    path = Path(source)
+
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if p.is_file() and p.suffix.lower() in AUDIO_EXTENSIONS)
+
+    if path.is_file() and path.suffix.lower() in MANIFEST_EXTENSIONS:
+        episodes = []
+        for line in path.read_text().splitlines():
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            episode = Path(line)
+            episodes.append(episode if episode.is_absolute() else path.parent / episode)
+        return episodes
+
+    if path.is_file():
+        return [path]
+
+    if glob.has_magic(source):
+        return sorted(Path(p) for p in glob.glob(source, recursive=True) if Path(p).is_file())
+
+    return []
+
+
+class BatchRunner(LoggingObject):
+    """
+    Runs a Pipeline over many episodes in one process.
+
+    Models stay loaded across episodes, and the next episode is decoded on a background
+    thread while the current one is transcribed and diarized. Each episode's outputs go
+    to its own subdirectory of output_dir, checkpoints are shared under output_dir, and a
+    summary with per-stage metrics is written to output_dir / batch_summary.json.
+    """
+
+    def __init__(self, name: str, pipeline: Pipeline, output_dir: Path):
+        super().__init__(name)
+        self.pipeline = pipeline
+        self.output_dir = output_dir
+
+    def episode_output_dir(self, episode: Path) -> Path:
+        output_dir = self.output_dir / episode.stem
+        output_dir.mkdir(parents=True, exist_ok=True)
+        return output_dir
+
+    def _open_and_decode(self, episode: Path):
+        checkpoints = self.pipeline.open_checkpoints(episode, self.output_dir)
+        return checkpoints, self.pipeline.decode(episode, checkpoints)
+
+    def _prefetch(self, executor: ThreadPoolExecutor, episode: Path) -> tuple[Path, Future]:
+        output_dir = self.episode_output_dir(episode)
+        return output_dir, executor.submit(self._open_and_decode, episode)
+
+    def run(self, episodes: list[Path]) -> dict:
+        summary = {'episodes': [], 'stage_totals_s': {}}
+        start = perf_counter()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_job: Optional[tuple] = self._prefetch(executor, episodes[0]) if episodes else None
+
+            for i, episode in enumerate(episodes):
+                output_dir, decoded = next_job
+                next_job = self._prefetch(executor, episodes[i + 1]) if i + 1 < len(episodes) else None
+
+                self.logger.info("Episode %s/%s: %s", i + 1, len(episodes), episode)
+                record = {'episode': str(episode), 'output_dir': str(output_dir)}
+                episode_start = perf_counter()
+                try:
+                    prefetch_wait_start = perf_counter()
+                    checkpoints, audio = decoded.result()
+                    record['prefetch_wait_s'] = perf_counter() - prefetch_wait_start
+
+                    metrics = self.pipeline.run(episode, output_dir, checkpoints=checkpoints, audio=audio)
+                    record['status'] = 'ok'
+                    record['audio_s'] = metrics['audio_s']
+                    record['stages'] = metrics['stages']
+                    for detail in ('compaction', 'speakers'):
+                        if detail in metrics:
+                            record[detail] = metrics[detail]
+                    for stage, stage_metrics in metrics['stages'].items():
+                        summary['stage_totals_s'][stage] = summary['stage_totals_s'].get(stage, 0.0) + stage_metrics['wall_s']
+                except Exception as ex:
+                    # one bad episode should not stop a nightly backfill
+                    self.logger.exception("Episode failed: %s", episode)
+                    record['status'] = 'failed'
+                    record['error'] = repr(ex)
+
+                record['wall_s'] = perf_counter() - episode_start
+                summary['episodes'].append(record)
+
+        summary['total_wall_s'] = perf_counter() - start
+        summary['succeeded'] = sum(1 for r in summary['episodes'] if r['status'] == 'ok')
+        summary['failed'] = len(summary['episodes']) - summary['succeeded']
+
+        summary_file = self.output_dir / 'batch_summary.json'
+        with summary_file.open('w') as f:
+            json.dump(summary, f, indent=2)
+        self.logger.info("Batch finished: %s ok, %s failed, summary in %s", summary['succeeded'], summary['failed'], summary_file)
+
+        return summary
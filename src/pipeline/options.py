@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass
+class PipelineOptions:
+    model_size: str = "medium"
+    device: str = "cpu"
+    language: Optional[str] = "en"
+    num_speakers: Optional[int] = None
+
+    split_length_s: int = 3600
+    split_overlap_s: int = 300
+    split_mode: str = "memory"
+    split_workers: Optional[int] = None
+    split_planner: str = "fixed"
+
+    compact_silence: bool = False
+    compact_min_silence_s: float = 2.0
+
+    signal_quality_s: float = 0.1
+    combine_mode: str = "overlap"
+
+    speaker_index: Optional[Path] = None
+    speaker_match_threshold: float = 0.7
+    update_speaker_index: bool = True
+    word_mapping: str = "overlap"
+    word_format: str = "columns"
+    subtitle_formats: tuple[str, ...] = ("vtt", "srt")
+
+    transcribe_workers: int = 1
+    transcribe_chunk_length_s: Optional[int] = None
+    transcribe_chunk_overlap_s: int = 30
+
+    concurrent_stages: bool = False
+    transcribe_threads: Optional[int] = None
+    diarize_threads: Optional[int] = None
+    diarize_workers: int = 1
+
+    stream_window_s: int = 300
+    stream_hop_s: int = 240
+
+    profile_stages: tuple[str, ...] = ()
+    profiler: str = "cprofile"
+    prometheus_textfile: Optional[Path] = None
+
+    checkpoint_dir: Optional[Path] = None
+    resume: bool = True
@@ -0,0 +1,688 @@
+import logging
+import shutil
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional, Union
+
+from utils import (
+    CheckpointStore,
+    LoggingObject,
+    Profiler,
+    StageMetrics,
+    WordTable,
+    load_rttm_file,
+    load_turn_table,
+    load_words,
+    map_word_table_speakers,
+    map_word_table_speakers_by_anchor,
+    read_rttm,
+    save_word_timestamps,
+    write_rttm,
+)
+from metadata import TinyTagAudioMetadata
+from audio_processing import (
+    AudioSplit,
+    FFmpegSplitter,
+    OffsetMap,
+    PCMAudio,
+    PCMSplitter,
+    VADSplitPlanner,
+    compact_silences,
+    plan_fixed_splits,
+    plan_splits,
+)
+from audio_processing.pcm_audio import SAMPLE_RATE_HZ
+from transcriber import ChunkedWhisperTranscriber, WhisperTranscriber
+from diarizer import SpeakerCentroids, centroids_file, merge_centroids, prep_NeMo, run_NeMo, save_split_centroids
+from rttm_combiner import EmbeddingSplitCombiner, SplitCombiner
+from speaker_index import SpeakerIndex
+from punctuation_realignment import (
+    get_sentences_speaker_mapping_from_table,
+    realign_word_table,
+    save_diarized_transcript,
+)
+
+from web_vtt import save_subtitles
+
+from .options import PipelineOptions
+from .scheduler import StageScheduler
+
+
+def _transcribe_job(
+    pipeline: 'Pipeline',
+    pcm_file: Path,
+    audio_in: Path,
+    checkpoints: CheckpointStore,
+    params: dict,
+    chunks: Optional[list[AudioSplit]],
+    ) -> tuple[WordTable, dict[str, StageMetrics]]:
+    """Transcription stage as run in a StageScheduler worker, the audio is re-mapped from its .pcm checkpoint"""
+    pipeline.profiler = pipeline.profiler.empty_copy()
+    with pipeline.profiler.stage("transcribe"):
+        audio = PCMAudio.from_pcm_file(pcm_file, source=audio_in)
+        words = pipeline.transcribe(audio, audio_in, checkpoints, params, chunks)
+    return words, pipeline.profiler.stages
+
+
+def _diarize_job(
+    pipeline: 'Pipeline',
+    input_splits: list[Path],
+    audio_splits: list[AudioSplit],
+    checkpoints: CheckpointStore,
+    params_list: list[dict],
+    ) -> tuple[list[Path], dict[str, StageMetrics]]:
+    """Diarization stage as run in a StageScheduler worker"""
+    pipeline.profiler = pipeline.profiler.empty_copy()
+    with pipeline.profiler.stage("diarize"):
+        rttm_splits = [
+            pipeline.diarize(split, checkpoints, params, audio_split.duration_s)
+            for split, audio_split, params in zip(input_splits, audio_splits, params_list)
+        ]
+    return rttm_splits, pipeline.profiler.stages
+
+
+def _diarize_split_job(
+    pipeline: 'Pipeline',
+    split: Path,
+    checkpoints: CheckpointStore,
+    params: dict,
+    audio_s: float,
+    ) -> tuple[Path, dict[str, StageMetrics]]:
+    """One split's diarization as run by one of the StageScheduler's diarization workers"""
+    pipeline.profiler = pipeline.profiler.empty_copy()
+    rttm_file = pipeline.diarize(split, checkpoints, params, audio_s)
+    return rttm_file, pipeline.profiler.stages
+
+
+class Pipeline(LoggingObject):
+    """
+    Transcribes and diarizes one episode at a time.
+
+    A Pipeline keeps no per-episode state between runs, so one instance can process
+    many episodes in the same process while the models stay warm in the model cache.
+    Every stage is checkpointed in a CheckpointStore, and stages whose artifacts are
+    still valid are skipped when an episode is run again.
+    """
+
+    def __init__(self, name: str, options: PipelineOptions):
+        super().__init__(name)
+        self.options = options
+        self.profiler = Profiler("Profiler")
+
+        self._scheduler: Optional[StageScheduler] = None
+        self._speaker_index: Optional[SpeakerIndex] = None
+
+    def __getstate__(self):
+        # the pipeline is sent to the stage worker processes, its process pools and index stay behind
+        state = self.__dict__.copy()
+        state['_scheduler'] = None
+        state['_speaker_index'] = None
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stops the stage worker processes, if any were started"""
+        if self._scheduler is not None:
+            self._scheduler.shutdown()
+            self._scheduler = None
+
+    def _get_scheduler(self) -> StageScheduler:
+        if self._scheduler is None:
+            self._scheduler = StageScheduler(
+                "StageScheduler",
+                transcribe_threads=self.options.transcribe_threads,
+                diarize_threads=self.options.diarize_threads,
+                diarize_workers=self.options.diarize_workers,
+                concurrent_stages=self.options.concurrent_stages,
+                verbose=self.logger.isEnabledFor(logging.DEBUG),
+                )
+        return self._scheduler
+
+    def _get_speaker_index(self) -> SpeakerIndex:
+        if self._speaker_index is None:
+            self._speaker_index = SpeakerIndex("SpeakerIndex", self.options.speaker_index)
+        return self._speaker_index
+
+    def open_checkpoints(self, audio_in: Path, output_dir: Path) -> CheckpointStore:
+        checkpoint_dir = self.options.checkpoint_dir or output_dir / "checkpoints"
+        return CheckpointStore("Checkpoints", checkpoint_dir, audio_in, resume=self.options.resume)
+
+    def decode(self, audio_in: Path, checkpoints: CheckpointStore) -> PCMAudio:
+        """
+        Decodes the episode to a memory-mapped 16 kHz .pcm checkpoint, or maps the existing one.
+        Safe to call ahead of run() from another thread.
+        """
+        params = {'sample_rate_hz': SAMPLE_RATE_HZ}
+        checkpoint = checkpoints.load('decode', params)
+        if checkpoint is not None:
+            return PCMAudio.from_pcm_file(checkpoint['artifacts'][0], source=audio_in)
+
+        pcm_file = checkpoints.stage_dir('decode', params) / (audio_in.stem + "_16k.pcm")
+        audio = PCMAudio.from_file(audio_in, pcm_file)
+        checkpoints.save('decode', params, [pcm_file])
+        self.logger.info("Decoded audio to 16k PCM: %.1f s", audio.duration_s)
+        return audio
+
+    def run(
+        self,
+        audio_in: Path,
+        output_dir: Path,
+        checkpoints: Optional[CheckpointStore] = None,
+        audio: Optional[PCMAudio] = None,
+        ) -> dict:
+        """
+        Runs every stage on audio_in and writes the outputs to output_dir.
+
+        audio is the already decoded episode, if it was decoded ahead of time.
+        Returns the metrics of every stage, which are also written to output_dir / metrics.json.
+        """
+        options = self.options
+        self.profiler = Profiler(
+            "Profiler",
+            profile_stages=options.profile_stages,
+            profile_dir=output_dir / "profiles",
+            profiler=options.profiler,
+            )
+        checkpoints = checkpoints or self.open_checkpoints(audio_in, output_dir)
+        self.logger.debug("Using checkpoint directory: %s", checkpoints.directory)
+
+        # ------- METADATA -------
+        with self.profiler.stage("metadata"):
+            metadata = TinyTagAudioMetadata("Metadata", audio_in)
+            #TODO debug log metadata
+
+        # ------- 16K CONVERSION -------
+        with self.profiler.stage("decode"):
+            if audio is None:
+                audio = self.decode(audio_in, checkpoints)
+            self.profiler.audio_s = audio.duration_s
+            decode_key = checkpoints.key('decode', {'sample_rate_hz': SAMPLE_RATE_HZ})
+            audio_params = {'decode': decode_key}
+            duration_s = metadata.duration_s
+
+        # ------- SILENCE COMPACTION -------
+        offset_map = None
+        if options.compact_silence:
+            with self.profiler.stage("compact"):
+                compact_params = {'decode': decode_key, 'min_silence_s': options.compact_min_silence_s}
+                audio, offset_map = self.compact(audio, audio_in, checkpoints, compact_params)
+                audio_params['compact'] = checkpoints.key('compact', compact_params)
+                duration_s = audio.duration_s
+
+        # ------- SPLIT -------
+        with self.profiler.stage("split"):
+            split_params = {
+                **audio_params,
+                'split_length_s': options.split_length_s,
+                'split_overlap_s': options.split_overlap_s,
+                'split_mode': options.split_mode,
+                'split_planner': options.split_planner,
+            }
+            input_splits, audio_splits = self.split(audio, audio_in, duration_s, checkpoints, split_params)
+            split_key = checkpoints.key('split', split_params)
+
+        # ------- WHISPER AND NEMO -------
+        transcription_chunks = self.plan_transcription_chunks(audio_splits, audio.duration_s)
+        transcribe_params = {
+            **audio_params,
+            'model_size': options.model_size,
+            'language': options.language,
+            'chunks': [(chunk.start_time_s, chunk.end_time_s) for chunk in transcription_chunks or []],
+            'word_format': options.word_format,
+        }
+        diarize_params = [
+            {'split': split_key, 'order': audio_split.order, 'num_speakers': options.num_speakers}
+            for audio_split in audio_splits
+        ]
+        if options.speaker_index is not None or options.combine_mode == 'embedding':
+            # only added when needed, so the keys of existing diarization checkpoints do not change
+            for params in diarize_params:
+                params['speaker_embeddings'] = True
+        words, rttm_splits = self.transcribe_and_diarize(
+            audio,
+            audio_in,
+            input_splits,
+            audio_splits,
+            transcription_chunks,
+            checkpoints,
+            transcribe_params,
+            diarize_params,
+            )
+        if offset_map is not None:
+            words = offset_map.remap_words(words)
+        save_word_timestamps(words, output_dir / f'{audio_in.stem}.txt')
+        transcribe_key = checkpoints.key('transcribe', transcribe_params)
+        diarize_keys = [checkpoints.key('diarize', params) for params in diarize_params]
+
+        # ------- SEGMENT COMBINE RTTM -------
+        with self.profiler.stage("combine"):
+            combine_params = {'diarize': diarize_keys, 'signal_quality_s': options.signal_quality_s}
+            if options.combine_mode != 'overlap':
+                combine_params['combine_mode'] = options.combine_mode
+            checkpoint = checkpoints.load('combine', combine_params)
+            if checkpoint is not None:
+                rttm_combined_file_path = checkpoint['artifacts'][0]
+                label_mappings = checkpoint['data'].get('label_mappings')
+            else:
+                segcom = self.split_combiner(
+                    rttm_splits,
+                    audio_splits,
+                    checkpoints.stage_dir('combine', combine_params) / "combined_output.rttm",
+                    )
+                rttm_combined_file_path = segcom.run()
+                label_mappings = segcom.label_mappings
+                checkpoints.save('combine', combine_params, [rttm_combined_file_path], {'label_mappings': label_mappings})
+            combine_key = checkpoints.key('combine', combine_params)
+
+            rttm_output_file_path = output_dir / "combined_output.rttm"
+            if offset_map is not None:
+                self.remap_rttm(rttm_combined_file_path, rttm_output_file_path, offset_map)
+            else:
+                shutil.copyfile(rttm_combined_file_path, rttm_output_file_path)
+
+        # ------- SPEAKER IDENTIFICATION -------
+        speaker_names = None
+        if options.speaker_index is not None:
+            with self.profiler.stage("identify"):
+                speaker_names = self.identify_speakers(audio_in, rttm_splits, label_mappings)
+
+        realign_params = {
+            'transcribe': transcribe_key,
+            'combine': combine_key,
+            'word_mapping': options.word_mapping,
+        }
+        checkpoint = checkpoints.load('realign', realign_params)
+        if checkpoint is not None:
+            with self.profiler.stage("realignment"):
+                words = WordTable.load(checkpoint['artifacts'][0])
+        else:
+            # ------- COMBINE WORDS AND RTTM -------
+            with self.profiler.stage("mapping"):
+                if options.word_mapping == 'overlap':
+                    words = map_word_table_speakers(words, load_turn_table(rttm_output_file_path))
+                else:
+                    words = map_word_table_speakers_by_anchor(
+                        words, load_rttm_file(rttm_output_file_path), options.word_mapping)
+
+            # ------- REALIGNMENT VIA PUNCTUATION -------
+            with self.profiler.stage("realignment"):
+                words = realign_word_table(words)
+
+                wsm_file = checkpoints.stage_dir('realign', realign_params) / "realigned_mapping.npz"
+                words.save(wsm_file)
+                checkpoints.save('realign', realign_params, [wsm_file])
+
+        with self.profiler.stage("output"):
+            ssm = get_sentences_speaker_mapping_from_table(words, speaker_names)
+            save_diarized_transcript(ssm, output_dir)
+            save_subtitles(ssm, output_dir, options.subtitle_formats)
+
+        self.profiler.write_json(output_dir / "metrics.json")
+        if options.prometheus_textfile is not None:
+            self.profiler.write_prometheus(options.prometheus_textfile, labels={'episode': audio_in.stem})
+
+        self.logger.info("Completed diarization on file: %s", audio_in)
+        return self.profiler.to_dict()
+
+    def split_combiner(self, rttm_splits: list[Path], audio_splits: list[AudioSplit], output_file: Path) -> SplitCombiner:
+        """The combiner for the combine_mode option, the embedding mode reads the centroids saved by diarize()"""
+        if self.options.combine_mode == 'embedding':
+            return EmbeddingSplitCombiner(
+                "EmbeddingSplitCombiner",
+                rttm_splits,
+                audio_splits,
+                output_file,
+                [SpeakerCentroids.load(centroids_file(rttm_file)) for rttm_file in rttm_splits],
+                self.options.signal_quality_s,
+                )
+        return SplitCombiner("SplitCombiner", rttm_splits, audio_splits, output_file, self.options.signal_quality_s)
+
+    def identify_speakers(
+        self,
+        audio_in: Path,
+        rttm_splits: list[Path],
+        label_mappings: Optional[list[dict[str, str]]],
+        ) -> dict[int, str]:
+        """
+        Merges the speaker centroids of the splits into one per combined speaker, looks them
+        up in the speaker index and, unless update_speaker_index is off, adds them to it.
+        Returns the identity of every identified speaker, by speaker number.
+        """
+        if label_mappings is None:
+            self.logger.warning("Combined RTTM has no split label mappings, speakers cannot be identified")
+            return {}
+
+        centroids = merge_centroids(
+            [SpeakerCentroids.load(centroids_file(rttm_file)) for rttm_file in rttm_splits], label_mappings)
+        index = self._get_speaker_index()
+        identities = index.identify(centroids, self.options.speaker_match_threshold)
+        self.logger.info("Identified %s of %s speakers: %s", len(identities), len(centroids), identities)
+        if self.options.update_speaker_index:
+            identities = index.insert(centroids, identities, audio_in.stem)
+
+        self.profiler.details['speakers'] = identities
+        return {int(label.rsplit('_', 1)[-1]): identity for label, identity in identities.items()}
+
+    def compact(
+        self,
+        audio: PCMAudio,
+        audio_in: Path,
+        checkpoints: CheckpointStore,
+        params: dict,
+        ) -> tuple[PCMAudio, OffsetMap]:
+        """
+        Removes long silences before transcription and diarization, and returns the
+        compacted audio, memory-mapped from its .pcm checkpoint, with its map back to
+        the original time base.
+        """
+        checkpoint = checkpoints.load('compact', params)
+        if checkpoint is not None:
+            compacted = PCMAudio.from_pcm_file(checkpoint['artifacts'][0], source=audio_in)
+            offset_map = OffsetMap.from_dict(checkpoint['data']['offset_map'])
+        else:
+            pcm_file = checkpoints.stage_dir('compact', params) / (audio_in.stem + "_16k_compact.pcm")
+            compacted, offset_map = compact_silences(audio, pcm_file, params['min_silence_s'])
+            checkpoints.save('compact', params, [pcm_file], {'offset_map': offset_map.to_dict()})
+
+        saved = offset_map.removed_s / offset_map.original_duration_s if offset_map.original_duration_s else 0.0
+        self.logger.info("Silence compaction removed %.1f s of %.1f s, %.0f%% less audio for Whisper and NeMo",
+                         offset_map.removed_s, offset_map.original_duration_s, saved * 100)
+        self.profiler.details['compaction'] = {
+            'original_duration_s': offset_map.original_duration_s,
+            'compact_duration_s': offset_map.compact_duration_s,
+            'removed_s': offset_map.removed_s,
+            'removed_fraction': saved,
+            'segments': len(offset_map.duration_s),
+        }
+        return compacted, offset_map
+
+    def remap_rttm(self, rttm_file: Path, output_file: Path, offset_map: OffsetMap) -> Path:
+        """Writes the turns of a compacted RTTM file on the original time base, split where silence was removed"""
+        records = read_rttm(rttm_file)
+        starts_s, ends_s, index = offset_map.remap_intervals(records.start_s, records.end_s)
+        file_id = records.file_id if records.file_id is not None else output_file.stem
+        write_rttm(output_file, file_id, starts_s, ends_s, records.speaker[index])
+        return output_file
+
+    def plan(self, audio_in: Path) -> dict:
+        """
+        Validates audio_in and returns the splits and transcription chunks run() would use,
+        from the file's metadata alone: nothing is decoded, written or loaded. With the vad
+        split planner the splits are the fixed ones, the cuts move to pauses at run time.
+        """
+        metadata = TinyTagAudioMetadata("Metadata", audio_in)
+        if not metadata.duration_s:
+            raise ValueError(f"Could not read the duration of {audio_in}")
+
+        audio_splits = self.plan_splits(metadata.duration_s)
+        chunks = self.plan_transcription_chunks(audio_splits, metadata.duration_s)
+        return {
+            'audio_in': str(audio_in),
+            'duration_s': metadata.duration_s,
+            'split_planner': self.options.split_planner,
+            'splits': [(split.start_time_s, split.end_time_s) for split in audio_splits],
+            'transcription_chunks': [(chunk.start_time_s, chunk.end_time_s) for chunk in chunks] if chunks else None,
+        }
+
+    def plan_splits(self, duration_s: float) -> list[AudioSplit]:
+        """The audio splits split() cuts for an episode of duration_s"""
+        if duration_s > self.options.split_length_s:
+            return plan_splits(duration_s, self.options.split_length_s, self.options.split_overlap_s)
+        return [AudioSplit(order=0, start_time_s=0, end_time_s=duration_s)]
+
+    def split(
+        self,
+        audio: PCMAudio,
+        audio_in: Path,
+        duration_s: float,
+        checkpoints: CheckpointStore,
+        params: dict,
+        ) -> tuple[list[Path], list[AudioSplit]]:
+        options = self.options
+
+        checkpoint = checkpoints.load('split', params)
+        if checkpoint is not None:
+            audio_splits = [
+                AudioSplit(order=s['order'], start_time_s=s['start_time_s'], end_time_s=s['end_time_s'])
+                for s in checkpoint['data']['audio_splits']
+            ]
+            return checkpoint['artifacts'], audio_splits
+
+        split_dir = checkpoints.stage_dir('split', params)
+        audio_16k = split_dir / (audio_in.stem + "_16k.wav")
+
+        if duration_s > options.split_length_s:
+            planner = None
+            if options.split_planner == "vad":
+                # speakers matched by embedding need no shared speech around the cut
+                planner_options = {'min_overlap_speech_s': 0.0} if options.combine_mode == 'embedding' else {}
+                planner = VADSplitPlanner(
+                    "VADSplitPlanner",
+                    audio,
+                    options.split_length_s,
+                    options.split_overlap_s,
+                    **planner_options,
+                    )
+
+            if options.split_mode == "memory":
+                audio_splitter = PCMSplitter(
+                    "PCMSplitter",
+                    audio,
+                    split_dir,
+                    options.split_length_s,
+                    options.split_overlap_s,
+                    planner=planner,
+                )
+            else:
+                audio.write_wav(audio_16k)
+                audio_splitter = FFmpegSplitter(
+                    "FFmpegSplitter",
+                    audio_16k,
+                    split_dir,
+                    duration_s,
+                    options.split_length_s,
+                    options.split_overlap_s,
+                    mode=options.split_mode,
+                    max_workers=options.split_workers,
+                    planner=planner,
+                )
+            input_splits = audio_splitter.split()
+            audio_splits = audio_splitter.audio_splits
+        else:
+            # NeMo reads its input through a manifest, so the unsplit audio still needs a file
+            input_splits = [audio.write_wav(audio_16k)]
+            audio_splits = [AudioSplit(order=0, start_time_s=0, end_time_s=duration_s)]
+
+        data = {'audio_splits': [
+            {'order': s.order, 'start_time_s': s.start_time_s, 'end_time_s': s.end_time_s}
+            for s in audio_splits
+        ]}
+        checkpoints.save('split', params, input_splits, data)
+        return input_splits, audio_splits
+
+    def transcribe_and_diarize(
+        self,
+        audio: PCMAudio,
+        audio_in: Path,
+        input_splits: list[Path],
+        audio_splits: list[AudioSplit],
+        transcription_chunks: Optional[list[AudioSplit]],
+        checkpoints: CheckpointStore,
+        transcribe_params: dict,
+        diarize_params: list[dict],
+        ) -> tuple[WordTable, list[Path]]:
+        """
+        Runs Whisper and NeMo, which are independent until the words are mapped to speakers.
+        With concurrent_stages they run at the same time in worker processes, and with
+        diarize_workers above 1 the splits are diarized in parallel.
+        """
+        if not self.options.concurrent_stages:
+            with self.profiler.stage("transcribe"):
+                words = self.transcribe(
+                    audio, audio_in, checkpoints, transcribe_params, transcription_chunks)
+            with self.profiler.stage("diarize"):
+                if self.options.diarize_workers > 1:
+                    rttm_splits = self.gather_diarized_splits(
+                        self.submit_diarize_splits(input_splits, audio_splits, checkpoints, diarize_params))
+                else:
+                    rttm_splits = [
+                        self.diarize(split, checkpoints, params, audio_split.duration_s)
+                        for split, audio_split, params in zip(input_splits, audio_splits, diarize_params)
+                    ]
+            return words, rttm_splits
+
+        scheduler = self._get_scheduler()
+        with self.profiler.stage("transcribe_and_diarize"):
+            transcribe_future = scheduler.submit_transcribe(
+                _transcribe_job, self, audio.pcm_file, audio_in, checkpoints, transcribe_params, transcription_chunks)
+            if self.options.diarize_workers > 1:
+                diarize_jobs = self.submit_diarize_splits(input_splits, audio_splits, checkpoints, diarize_params)
+            else:
+                diarize_future = scheduler.submit_diarize(
+                    _diarize_job, self, input_splits, audio_splits, checkpoints, diarize_params)
+
+            words, transcribe_metrics = transcribe_future.result()
+            if self.options.diarize_workers > 1:
+                rttm_splits = self.gather_diarized_splits(diarize_jobs)
+            else:
+                rttm_splits, diarize_metrics = diarize_future.result()
+                self.profiler.merge(diarize_metrics)
+        self.profiler.merge(transcribe_metrics)
+
+        return words, rttm_splits
+
+    def submit_diarize_splits(
+        self,
+        input_splits: list[Path],
+        audio_splits: list[AudioSplit],
+        checkpoints: CheckpointStore,
+        diarize_params: list[dict],
+        ) -> list[Union[Path, Future]]:
+        """
+        Submits every split that has no valid checkpoint to the scheduler's diarization
+        workers, one split per job. Each job writes its NeMo manifest and outputs to its own
+        checkpoint directory, so the workers never share files. Returns, in split order,
+        the RTTM file of each checkpointed split and the future of each submitted one.
+        """
+        scheduler = self._get_scheduler()
+        jobs = []
+        for split, audio_split, params in zip(input_splits, audio_splits, diarize_params):
+            checkpoint = checkpoints.load('diarize', params)
+            if checkpoint is not None:
+                jobs.append(checkpoint['artifacts'][0])
+            else:
+                jobs.append(scheduler.submit_diarize(
+                    _diarize_split_job, self, split, checkpoints, params, audio_split.duration_s))
+
+        submitted = sum(isinstance(job, Future) for job in jobs)
+        if submitted:
+            self.logger.info("Diarizing %s splits on %s workers", submitted, scheduler.diarize_workers)
+        return jobs
+
+    def gather_diarized_splits(self, jobs: list[Union[Path, Future]]) -> list[Path]:
+        """Waits for the jobs of submit_diarize_splits and returns the RTTM files in split order"""
+        rttm_splits = []
+        for job in jobs:
+            if isinstance(job, Future):
+                rttm_file, metrics = job.result()
+                self.profiler.merge(metrics)
+            else:
+                rttm_file = job
+            rttm_splits.append(rttm_file)
+        return rttm_splits
+
+    def plan_transcription_chunks(self, audio_splits: list[AudioSplit], duration_s: float) -> Optional[list[AudioSplit]]:
+        """
+        Returns the chunks to transcribe in parallel, or None to transcribe the whole episode at once.
+        Chunks are the diarization splits unless a transcription chunk length is set.
+        """
+        options = self.options
+        if options.transcribe_workers <= 1:
+            return None
+
+        if options.transcribe_chunk_length_s:
+            chunks = plan_fixed_splits(duration_s, options.transcribe_chunk_length_s, options.transcribe_chunk_overlap_s)
+        else:
+            chunks = audio_splits
+        return chunks if len(chunks) > 1 else None
+
+    def transcribe(
+        self,
+        audio: PCMAudio,
+        audio_in: Path,
+        checkpoints: CheckpointStore,
+        params: dict,
+        chunks: Optional[list[AudioSplit]] = None,
+        ) -> WordTable:
+        """
+        Transcribes the episode, in parallel chunks if any are given, and returns its words.
+        A resumed transcript is memory-mapped when it was saved as columns.
+        """
+        options = self.options
+
+        checkpoint = checkpoints.load('transcribe', params)
+        if checkpoint is not None:
+            words_path = checkpoint['artifacts'][0]
+            return load_words(words_path.parent if options.word_format == 'columns' else words_path)
+
+        if chunks:
+            self.logger.info("Transcribing %s chunks on %s workers", len(chunks), options.transcribe_workers)
+            transcriber = ChunkedWhisperTranscriber(
+                audio_in=audio_in,
+                model_size=options.model_size,
+                device=options.device,
+                audio=audio,
+                chunks=chunks,
+                language=options.language,
+                workers=options.transcribe_workers,
+                threads_per_worker=options.transcribe_threads,
+                profiler=self.profiler,
+                )
+        else:
+            transcriber = WhisperTranscriber(
+                audio_in=audio_in,
+                model_size=options.model_size,
+                device=options.device,
+                language=options.language,
+                audio=audio,
+                profiler=self.profiler,
+                )
+
+        transcription = transcriber.transcribe()
+        words_path = transcriber.save_transcript(
+            transcription,
+            checkpoints.stage_dir('transcribe', params),
+            options.word_format,
+            )
+        artifacts = sorted(words_path.iterdir()) if words_path.is_dir() else [words_path]
+        checkpoints.save('transcribe', params, artifacts)
+        return transcriber.to_word_table(transcription)
+
+    def diarize(self, split: Path, checkpoints: CheckpointStore, params: dict, audio_s: Optional[float] = None) -> Path:
+        """
+        Diarizes one split and returns its RTTM file, audio_s is the split's duration for the metrics.
+        With speaker_embeddings in params the centroids of its speakers are saved next to it.
+        """
+        checkpoint = checkpoints.load('diarize', params)
+        if checkpoint is not None:
+            return checkpoint['artifacts'][0]
+
+        self.logger.info("Processing split: %s", split)
+        diarize_dir = checkpoints.stage_dir('diarize', params)
+        save_embeddings = params.get('speaker_embeddings', False)
+        nemo_config = prep_NeMo(
+            split, diarize_dir, self.options.num_speakers, config_dir=checkpoints.directory, save_embeddings=save_embeddings)
+        with self.profiler.stage(f"nemo_split_{params['order']:03d}", audio_s=audio_s):
+            rttm_file = run_NeMo(nemo_config, split)
+        rttm_file = rttm_file.rename(diarize_dir / rttm_file.name)
+        artifacts = [rttm_file]
+        if save_embeddings:
+            artifacts.append(save_split_centroids(Path(nemo_config.diarizer.out_dir), rttm_file))
+
+        checkpoints.save('diarize', params, artifacts)
+        return rttm_file
@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Optional
+
+from utils import LoggingObject, init_worker, model_cache
+
+
+class StageScheduler(LoggingObject):
+    """
+    Runs the transcription and diarization stages in separate processes.
+
+    Each stage has its own pool with a fixed CPU thread budget per worker, so the torch
+    intra-op thread pools of the stages do not oversubscribe the machine. Transcription
+    has a single worker. Diarization has diarize_workers, which take one split each, so
+    the splits of an episode are diarized in parallel. The pools are kept alive between
+    episodes so the models each worker loads stay warm.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        transcribe_threads: Optional[int] = None,
+        diarize_threads: Optional[int] = None,
+        diarize_workers: int = 1,
+        concurrent_stages: bool = True,
+        verbose: bool = False,
+        ):
+        """
+        diarize_threads: CPU threads per diarization worker, by default the CPUs left by
+        the transcription worker when the stages run concurrently, or all of them, shared
+        between the diarization workers
+        """
+        super().__init__(name)
+
+        cpu_count = os.cpu_count() or 2
+        self.transcribe_threads = transcribe_threads or max(cpu_count // 2, 1)
+        diarize_cpus = cpu_count - self.transcribe_threads if concurrent_stages else cpu_count
+        self.diarize_workers = diarize_workers
+        self.diarize_threads = diarize_threads or max(diarize_cpus // diarize_workers, 1)
+        self.verbose = verbose
+
+        self._pools: dict[str, ProcessPoolExecutor] = {}
+
+    def _pool(self, stage: str, num_threads: int, workers: int = 1) -> ProcessPoolExecutor:
+        if stage not in self._pools:
+            self.logger.info("Starting %s %s worker(s) with %s threads each", workers, stage, num_threads)
+            # spawn rather than fork, forking a process that has initialised torch or CUDA is unsafe
+            self._pools[stage] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+                initargs=(num_threads, self.verbose, model_cache.max_models, model_cache.memory_budget_bytes),
+                )
+        return self._pools[stage]
+
+    def submit_transcribe(self, fn: Callable, *args) -> Future:
+        return self._pool('transcribe', self.transcribe_threads).submit(fn, *args)
+
+    def submit_diarize(self, fn: Callable, *args) -> Future:
+        return self._pool('diarize', self.diarize_threads, self.diarize_workers).submit(fn, *args)
+
+    def shutdown(self):
+        for pool in self._pools.values():
+            pool.shutdown()
+        self._pools.clear()
@@ -1,5 +1,9 @@
 from .punctuation_realignment import (
     get_realigned_ws_mapping_with_punctuation,
     get_sentences_speaker_mapping,
+    get_sentences_speaker_mapping_from_table,
+    realign_speakers_with_punctuation,
+    realign_word_table,
     save_diarized_transcript,
+    write_diarized_sentences,
 )
\ No newline at end of file
@@ -1,71 +1,133 @@
+from collections import Counter
 from pathlib import Path
+from typing import Optional, TextIO
+
+import numpy as np
+
+from utils import WordTable
 
 
 sentence_ending_punctuations = '.?!'
 
-def get_first_word_idx_of_sentence(word_idx, word_list, speaker_list, max_words):
-    is_word_sentence_end = lambda x: x >= 0 and word_list[x][-1] in sentence_ending_punctuations
-    left_idx = word_idx
-    while (left_idx > 0 and word_idx - left_idx < max_words and
-            speaker_list[left_idx - 1] == speaker_list[left_idx] and
-            not is_word_sentence_end(left_idx - 1)):
-        left_idx -= 1
-        
-    return left_idx if left_idx == 0 or is_word_sentence_end(left_idx - 1) else -1
-
-def get_last_word_idx_of_sentence(word_idx, word_list, max_words):
-    is_word_sentence_end = lambda x: x >= 0 and word_list[x][-1] in sentence_ending_punctuations
-    right_idx = word_idx
-    while (right_idx < len(word_list) and right_idx - word_idx < max_words and
-            not is_word_sentence_end(right_idx)):
-        right_idx += 1
-        
-    return right_idx if right_idx == len(word_list) - 1 or is_word_sentence_end(right_idx) else -1
-
-def get_realigned_ws_mapping_with_punctuation(word_speaker_mapping, max_words_in_sentence = 50):
-    is_word_sentence_end = lambda x: x >= 0 and word_speaker_mapping[x]['word'][-1] in sentence_ending_punctuations
-    wsp_len = len(word_speaker_mapping)
-    
-    words_list, speaker_list = [], []
-    for k, line_dict in enumerate(word_speaker_mapping):
-        word, speaker = line_dict['word'], line_dict['speaker']
-        words_list.append(word)
-        speaker_list.append(speaker)
-
-    k = 0
-    while k < len(word_speaker_mapping):
-        line_dict = word_speaker_mapping[k]
-        if k < wsp_len - 1 and speaker_list[k] != speaker_list[k + 1] and not is_word_sentence_end(k):
-            left_idx = get_first_word_idx_of_sentence(k, words_list, speaker_list, max_words_in_sentence)
-            right_idx = get_last_word_idx_of_sentence(k, words_list, max_words_in_sentence - k + left_idx - 1) if left_idx > -1 else -1
-            if min(left_idx, right_idx) == -1:
-                k += 1
-                continue
-            
-            spk_labels = speaker_list[left_idx: right_idx + 1]
-            mod_speaker = max(set(spk_labels), key=spk_labels.count)
-            if spk_labels.count(mod_speaker) < len(spk_labels) // 2:
-                k += 1
-                continue
-            
-            speaker_list[left_idx: right_idx + 1] = [mod_speaker] * (right_idx - left_idx + 1)
-            k = right_idx
-        
-        k += 1
-  
-    k, realigned_list = 0, []
-    while k < len(word_speaker_mapping):
-        line_dict = word_speaker_mapping[k].copy()
-        line_dict['speaker'] = speaker_list[k]
-        realigned_list.append(line_dict)
-        k += 1
-      
-  
-    return realigned_list
-
-def get_sentences_speaker_mapping(word_speaker_mapping, spk_ts) -> list[dict[str, str]]:
+def is_sentence_end(word: str) -> bool:
+    return bool(word) and word[-1] in sentence_ending_punctuations
+
+def realign_speakers_with_punctuation(words_list, speaker_list, max_words_in_sentence = 50) -> list:
+    """
+    Returns the speaker of every word after re-assigning sentences that straddle a speaker
+    change to their majority speaker.
+
+    A sentence is only re-assigned when its first speaker change comes within
+    max_words_in_sentence words of its start, the sentence ends within
+    max_words_in_sentence words of its start (or at the last word), and the majority
+    speaker holds at least half of it. Ties go to whichever tied label comes first in
+    set(labels) of the sentence, as they always have.
+
+    Runs in a single pass: sentence boundaries are found once and every word is visited
+    a constant number of times, so the cost is linear in the number of words.
+    """
+    sentence_end_idxs = [k for k, word in enumerate(words_list) if is_sentence_end(word)]
+    return _realign_sentences(sentence_end_idxs, list(speaker_list), max_words_in_sentence)
+
+def _realign_sentences(sentence_end_idxs: list[int], speaker_list: list, max_words_in_sentence: int) -> list:
+    """Realigns speaker_list in place given the indices of the sentence-ending words"""
+    n = len(speaker_list)
+    left_idx = 0
+    # the words after the last sentence end form a final, unterminated sentence
+    for end_idx in sentence_end_idxs + [n]:
+        if left_idx >= n:
+            break
+
+        first_change_idx = next(
+            (k for k in range(left_idx, min(end_idx, n - 1)) if speaker_list[k] != speaker_list[k + 1]),
+            None,
+            )
+        sentence_left_idx, left_idx = left_idx, end_idx + 1
+
+        if first_change_idx is None or first_change_idx - sentence_left_idx > max_words_in_sentence:
+            continue
+        if max_words_in_sentence - (first_change_idx - sentence_left_idx) - 1 <= 0:
+            continue
+
+        right_idx = min(end_idx, sentence_left_idx + max_words_in_sentence - 1, n - 1)
+        if right_idx != end_idx and right_idx != n - 1:
+            # sentence longer than max_words_in_sentence
+            continue
+
+        spk_labels = speaker_list[sentence_left_idx: right_idx + 1]
+        counts = Counter(spk_labels)
+        mod_speaker = max(set(spk_labels), key=counts.__getitem__)
+        if counts[mod_speaker] < len(spk_labels) // 2:
+            continue
+
+        speaker_list[sentence_left_idx: right_idx + 1] = [mod_speaker] * (right_idx - sentence_left_idx + 1)
+
+    return speaker_list
+
+def get_realigned_ws_mapping_with_punctuation(word_speaker_mapping, max_words_in_sentence = 50, inplace = False):
+    """
+    Re-assigns the speaker of sentences that straddle a speaker change, see realign_speakers_with_punctuation.
+
+    Returns a new list of copied word dicts, or with inplace the same list with the
+    'speaker' of the changed words updated, which avoids copying every word.
+    """
+    words_list = [line_dict['word'] for line_dict in word_speaker_mapping]
+    speaker_list = [line_dict['speaker'] for line_dict in word_speaker_mapping]
+
+    realigned_speakers = realign_speakers_with_punctuation(words_list, speaker_list, max_words_in_sentence)
+
+    if inplace:
+        for line_dict, speaker in zip(word_speaker_mapping, realigned_speakers):
+            if line_dict['speaker'] != speaker:
+                line_dict['speaker'] = speaker
+        return word_speaker_mapping
+
+    return [{**line_dict, 'speaker': speaker} for line_dict, speaker in zip(word_speaker_mapping, realigned_speakers)]
+
+def realign_word_table(words: WordTable, max_words_in_sentence = 50) -> WordTable:
+    """
+    Columnar get_realigned_ws_mapping_with_punctuation. Sentence ends are looked up once
+    per distinct word in the string pool rather than once per word.
+    """
+    pool_is_end = np.array([is_sentence_end(text) for text in words.text_pool.strings], dtype=bool)
+    sentence_end_idxs = np.flatnonzero(pool_is_end[words.text_id]).tolist() if len(words) else []
+
+    speaker_list = _realign_sentences(sentence_end_idxs, words.speaker.tolist(), max_words_in_sentence)
+    return words.with_speakers(np.array(speaker_list, dtype=np.int32))
+
+def speaker_name(speaker: int, speaker_names: Optional[dict[int, str]] = None) -> str:
+    """The speaker's identity from speaker_names, e.g. from a SpeakerIndex, or the generic 'Speaker <n>'"""
+    if speaker_names and speaker in speaker_names:
+        return speaker_names[speaker]
+    return f'Speaker {speaker}'
+
+def get_sentences_speaker_mapping_from_table(words: WordTable, speaker_names: Optional[dict[int, str]] = None) -> list[dict[str, str]]:
+    """
+    Columnar get_sentences_speaker_mapping: one sentence per run of words with the same
+    speaker, times in milliseconds. Unlike the dict version it starts from the first word,
+    so it never emits an empty leading sentence for the first RTTM turn.
+    """
+    if len(words) == 0:
+        return []
+
+    run_starts = np.flatnonzero(np.r_[True, words.speaker[1:] != words.speaker[:-1]])
+    run_ends = np.r_[run_starts[1:], len(words)]
+    texts = words.texts
+
+    return [
+        {
+            'speaker': speaker_name(int(words.speaker[start]), speaker_names),
+            'start_time': int(words.start_ms[start]),
+            'end_time': int(words.end_ms[end - 1]),
+            'text': ' '.join(texts[start:end]) + ' ',
+        }
+        for start, end in zip(run_starts.tolist(), run_ends.tolist())
+    ]
+
+def get_sentences_speaker_mapping(word_speaker_mapping, spk_ts, speaker_names: Optional[dict[int, str]] = None) -> list[dict[str, str]]:
     """
-    Seperate the word speaker mapping into sentences based on the speaker change
+    Seperate the word speaker mapping into sentences based on the speaker change.
+    speaker_names replaces the generic 'Speaker <n>' labels of known speakers.
 
     #TODO move this to a separate file
     """
@@ -74,14 +136,14 @@ def get_sentences_speaker_mapping(word_speaker_mapping, spk_ts) -> list[dict[str
     prev_spk = spk
 
     sentences = []
-    sentence = {'speaker': f'Speaker {spk}', 'start_time': start, 'end_time': end, 'text': ''}
+    sentence = {'speaker': speaker_name(spk, speaker_names), 'start_time': start, 'end_time': end, 'text': ''}
 
     for wrd_dict in word_speaker_mapping:
         wrd, spk = wrd_dict['word'], wrd_dict['speaker']
         start, end = wrd_dict['start_time'], wrd_dict['end_time']
         if spk != prev_spk:
             sentences.append(sentence)
-            sentence = {'speaker': f'Speaker {spk}', 'start_time': start, 'end_time': end, 'text': ''}
+            sentence = {'speaker': speaker_name(spk, speaker_names), 'start_time': start, 'end_time': end, 'text': ''}
         else:
             sentence['end_time'] = end
         sentence['text'] += wrd + ' '
@@ -100,7 +162,13 @@ def save_diarized_transcript(sentences_speaker_mapping, output_dir_path: Path):
     output_file = output_dir_path / 'diarization.txt'
 
     with output_file.open('w') as f:
-        for sentence_dict in sentences_speaker_mapping:
-            speaker = sentence_dict['speaker']
-            text = sentence_dict['text']
-            f.write(f'\n\n{speaker}: {text}')
\ No newline at end of file
+        write_diarized_sentences(sentences_speaker_mapping, f)
+
+def write_diarized_sentences(sentences_speaker_mapping, f: TextIO):
+    """
+    Write sentences to an open diarized transcript, so that a stream can append as it goes
+    """
+    for sentence_dict in sentences_speaker_mapping:
+        speaker = sentence_dict['speaker']
+        text = sentence_dict['text']
+        f.write(f'\n\n{speaker}: {text}')
\ No newline at end of file
@@ -1 +1,3 @@
-from .segment_combiner import SegmentCombiner
\ No newline at end of file
+from .embedding_combiner import COMBINE_MODES, EmbeddingSplitCombiner
+from .segment_combiner import SegmentCombiner
+from .split_combiner import SplitCombiner, SpeakerTurns, match_speaker_turns, turns_to_signal
@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import numpy as np
+
+from audio_processing import AudioSplit
+from diarizer import SpeakerCentroids
+
+from .signal import assign_labels, sort_speaker_labels, speaker_index
+from .split_combiner import SpeakerTurns, SplitCombiner
+
+COMBINE_MODES = ('overlap', 'embedding')
+# same-speaker TitaNet centroids from one recording sit well above this, different speakers well below
+EMBEDDING_MATCH_THRESHOLD = 0.5
+
+
+class EmbeddingSplitCombiner(SplitCombiner):
+    """
+    A SplitCombiner that matches the speakers of each split by their TitaNet centroid
+    embeddings instead of by their activity in the overlap.
+
+    A split's speakers are compared with the running centroids of every speaker combined
+    so far, not only with the previous split's, so a speaker who is silent around a cut,
+    or for a whole split, keeps their label. Splits need no overlap: without one,
+    consecutive splits meet at the cut. A speaker with no centroid, too little clean
+    speech in the split to have one, falls back to overlap matching where there is an overlap.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rttm_files: list[Path],
+        audio_splits: list[AudioSplit],
+        output_file: Path,
+        split_centroids: list[SpeakerCentroids],
+        signal_quality_s: float = 0.1,
+        threshold: float = EMBEDDING_MATCH_THRESHOLD,
+        ):
+        super().__init__(name, rttm_files, audio_splits, output_file, signal_quality_s)
+
+        if len(split_centroids) != len(rttm_files):
+            raise ValueError(f"Got {len(split_centroids)} speaker centroid sets for {len(rttm_files)} RTTM files")
+
+        self.split_centroids = split_centroids
+        self.threshold = threshold
+
+        # speech-weighted sums of the centroids of every combined speaker
+        self._centroid_sums: dict[str, np.ndarray] = {}
+
+    def add_centroids(self, centroids: SpeakerCentroids, mapping: dict[str, str]):
+        for label, centroid, speech_s in zip(centroids.labels, centroids.centroids, centroids.speech_s):
+            combined = mapping[label]
+            self._centroid_sums[combined] = self._centroid_sums.get(combined, 0.0) + centroid.astype(np.float64) * speech_s
+
+    def combine(self) -> SpeakerTurns:
+        first = self.split_centroids[0]
+        self._centroid_sums = {}
+        self.add_centroids(first, {label: label for label in first.labels})
+        return super().combine()
+
+    def match_speakers(
+        self,
+        previous: SpeakerTurns,
+        current: SpeakerTurns,
+        window_start_s: float,
+        window_end_s: float,
+        existing_speakers: set[str],
+        split_index: int,
+        ) -> dict[str, str]:
+        centroids = self.split_centroids[split_index]
+        known = sort_speaker_labels(self._centroid_sums)
+
+        if known and len(centroids):
+            sums = np.stack([self._centroid_sums[label] for label in known])
+            known_centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+            similarity = known_centroids @ centroids.centroids.T.astype(np.float64)
+            # below the threshold a pair scores nothing, so assign_labels gives the speaker a fresh label
+            similarity = np.where(similarity >= self.threshold, similarity, 0.0)
+        else:
+            similarity = np.zeros((0, 0))
+        mapping = assign_labels(similarity, known, centroids.labels, existing_labels=sorted(existing_speakers))
+        self.add_centroids(centroids, mapping)
+
+        missing = [label for label in sort_speaker_labels(current.speaker) if label not in mapping]
+        if missing:
+            overlap_mapping = {}
+            if window_end_s > window_start_s:
+                overlap_mapping = super().match_speakers(
+                    previous, current, window_start_s, window_end_s, existing_speakers, split_index)
+
+            used = set(mapping.values())
+            next_index = max((speaker_index(label) for label in [*existing_speakers, *used, *known]), default=-1) + 1
+            for label in missing:
+                target = overlap_mapping.get(label)
+                if target is None or target in used or target not in existing_speakers:
+                    target = 'speaker_' + str(next_index)
+                    next_index += 1
+                mapping[label] = target
+                used.add(target)
+            self.logger.debug("Split %s speakers without centroids %s matched by overlap", split_index, missing)
+
+        return mapping
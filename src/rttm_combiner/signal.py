@@ -0,0 +1,99 @@
+import numpy as np
+
+
+def rasterize_intervals(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    labels: np.ndarray,
+    num_labels: int,
+    signal_length: int,
+) -> np.ndarray:
+    """
+    Rasterizes [start, end) sample intervals into a (num_labels, signal_length) uint8 matrix.
+
+    Each row is the activity signal of one label, 1 where any of its intervals is active.
+    Uses a difference array and a cumulative sum, so the cost is one pass over the
+    intervals plus one pass over the matrix regardless of how many intervals there are.
+    """
+    starts = np.clip(np.asarray(starts, dtype=np.int64), 0, signal_length)
+    ends = np.clip(np.asarray(ends, dtype=np.int64), 0, signal_length)
+    labels = np.asarray(labels, dtype=np.int64)
+
+    valid = (ends > starts) & (labels >= 0) & (labels < num_labels)
+    starts, ends, labels = starts[valid], ends[valid], labels[valid]
+
+    # one extra column so that intervals ending at signal_length have somewhere to close
+    diff = np.zeros((num_labels, signal_length + 1), dtype=np.int32)
+    np.add.at(diff, (labels, starts), 1)
+    np.add.at(diff, (labels, ends), -1)
+
+    active = np.cumsum(diff[:, :signal_length], axis=1) > 0
+    return active.astype(np.uint8)
+
+
+def seconds_to_samples(times_s: np.ndarray, signal_quality_s: float) -> np.ndarray:
+    """
+    Converts times in seconds to sample indices at the given signal quality (resolution).
+    """
+    return np.rint(np.asarray(times_s, dtype=np.float64) / signal_quality_s).astype(np.int64)
+
+
+def correlate_signals(signal_1: np.ndarray, signal_2: np.ndarray) -> np.ndarray:
+    """
+    Computes the (S1, S2) matrix of co-activity between two rasterized signal matrices.
+
+    Entry [i, j] is the number of samples where label i of signal_1 and label j of
+    signal_2 are both active, computed as a single matrix product.
+    """
+    # float64 keeps BLAS in play and is exact for any realistic number of samples
+    return signal_1.astype(np.float64) @ signal_2.astype(np.float64).T
+
+
+def speaker_index(label: str) -> int:
+    """
+    Returns the integer suffix of a speaker label, e.g. 3 for 'speaker_3', or -1 if there is none.
+    """
+    suffix = label.rsplit('_', 1)[-1]
+    return int(suffix) if suffix.isdigit() else -1
+
+
+def sort_speaker_labels(labels) -> list[str]:
+    """
+    Sorts speaker labels by their integer suffix so that 'speaker_10' comes after 'speaker_9'.
+    """
+    return sorted(set(labels), key=lambda label: (speaker_index(label), label))
+
+
+def assign_labels(
+    correlation: np.ndarray,
+    labels_1: list[str],
+    labels_2: list[str],
+    unmatched_labels_2: list[str] = (),
+    existing_labels: list[str] = (),
+) -> dict[str, str]:
+    """
+    Maps the labels of the second side onto the labels of the first side.
+
+    The matching maximizes the total correlation as a linear assignment problem
+    (Hungarian algorithm), so every first-side label is used at most once. Second-side
+    labels that are left unmatched, have no correlation with their match, or are listed
+    in unmatched_labels_2 (e.g. speakers absent from the overlap) get fresh labels that do
+    not collide with labels_1 or existing_labels.
+    """
+    assignments = {}
+    if correlation.size:
+        # scipy.optimize takes longer to import than most runs spend matching speakers
+        from scipy.optimize import linear_sum_assignment
+        rows, cols = linear_sum_assignment(correlation, maximize=True)
+        for row, col in zip(rows, cols):
+            if correlation[row, col] > 0:
+                assignments[labels_2[col]] = labels_1[row]
+
+    used = [speaker_index(label) for label in [*labels_1, *existing_labels, *assignments.values()]]
+    next_index = max(used, default=-1) + 1
+    for label in [*labels_2, *unmatched_labels_2]:
+        if label not in assignments:
+            assignments[label] = 'speaker_' + str(next_index)
+            next_index += 1
+
+    return assignments
@@ -0,0 +1,207 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from audio_processing import AudioSplit
+from utils import LoggingObject, read_rttm, write_rttm
+
+from .signal import (
+    assign_labels,
+    correlate_signals,
+    rasterize_intervals,
+    seconds_to_samples,
+    sort_speaker_labels,
+)
+
+
+@dataclass
+class SpeakerTurns:
+    """Columnar speaker turns, times in seconds"""
+    start_s: np.ndarray
+    end_s: np.ndarray
+    speaker: np.ndarray
+
+    def __len__(self):
+        return len(self.start_s)
+
+    def select(self, mask: np.ndarray) -> 'SpeakerTurns':
+        return SpeakerTurns(self.start_s[mask], self.end_s[mask], self.speaker[mask])
+
+    def clip(self, start_s: float, end_s: float) -> 'SpeakerTurns':
+        """Clips the turns to [start_s, end_s), dropping turns that fall outside"""
+        clipped = SpeakerTurns(
+            np.maximum(self.start_s, start_s),
+            np.minimum(self.end_s, end_s),
+            self.speaker,
+            )
+        return clipped.select(clipped.end_s > clipped.start_s)
+
+    def relabel(self, mapping: dict[str, str]) -> 'SpeakerTurns':
+        speaker = np.array([mapping[s] for s in self.speaker], dtype=object)
+        return SpeakerTurns(self.start_s, self.end_s, speaker)
+
+    @staticmethod
+    def concatenate(turns_list: list['SpeakerTurns']) -> 'SpeakerTurns':
+        return SpeakerTurns(
+            np.concatenate([t.start_s for t in turns_list]),
+            np.concatenate([t.end_s for t in turns_list]),
+            np.concatenate([t.speaker for t in turns_list]),
+            )
+
+
+def turns_to_signal(
+    turns: SpeakerTurns,
+    window_start_s: float,
+    window_end_s: float,
+    signal_quality_s: float,
+    ) -> tuple[np.ndarray, list[str]]:
+    """Rasterizes the turns inside the window to a (speakers, samples) matrix and its speaker labels"""
+    turns = turns.clip(window_start_s, window_end_s)
+    labels = sort_speaker_labels(turns.speaker)
+    label_codes = {label: code for code, label in enumerate(labels)}
+    codes = np.fromiter((label_codes[s] for s in turns.speaker), dtype=np.int64, count=len(turns))
+
+    signal_length = int(round((window_end_s - window_start_s) / signal_quality_s))
+    starts = seconds_to_samples(turns.start_s - window_start_s, signal_quality_s)
+    ends = seconds_to_samples(turns.end_s - window_start_s, signal_quality_s)
+    return rasterize_intervals(starts, ends, codes, len(labels), signal_length), labels
+
+
+def match_speaker_turns(
+    previous: SpeakerTurns,
+    current: SpeakerTurns,
+    window_start_s: float,
+    window_end_s: float,
+    existing_speakers: set[str],
+    signal_quality_s: float,
+    ) -> dict[str, str]:
+    """
+    Maps every speaker of current onto a speaker of previous by correlating their activity
+    in the overlap [window_start_s, window_end_s). Speakers that cannot be matched get fresh
+    labels that do not collide with existing_speakers.
+    """
+    if window_end_s > window_start_s:
+        signal_1, labels_1 = turns_to_signal(previous, window_start_s, window_end_s, signal_quality_s)
+        signal_2, labels_2 = turns_to_signal(current, window_start_s, window_end_s, signal_quality_s)
+        correlation = correlate_signals(signal_1, signal_2)
+    else:
+        labels_1, labels_2 = [], []
+        correlation = np.zeros((0, 0))
+
+    return assign_labels(
+        correlation,
+        labels_1,
+        labels_2,
+        unmatched_labels_2=sort_speaker_labels(current.speaker),
+        existing_labels=sorted(existing_speakers),
+        )
+
+
+class SplitCombiner(LoggingObject):
+    """
+    Stitches the RTTM files of all audio splits into a single RTTM in one pass.
+
+    Speaker labels are reconciled chain-wise in memory: the speakers of each split are
+    matched against the already relabelled speakers of the previous split by correlating
+    their activity in the overlap between the two splits. Each overlap is cut at its
+    midpoint, away from the split edges where diarization is least reliable.
+
+    After combine(), label_mappings holds the mapping from each split's own labels to the
+    combined labels, in split order.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rttm_files: list[Path],
+        audio_splits: list[AudioSplit],
+        output_file: Path,
+        signal_quality_s: float = 0.1,
+        ):
+        super().__init__(name)
+
+        if len(rttm_files) != len(audio_splits):
+            raise ValueError(f"Got {len(rttm_files)} RTTM files for {len(audio_splits)} audio splits")
+
+        self.rttm_files = rttm_files
+        self.audio_splits = sorted(audio_splits, key=lambda split: split.order)
+        self.output_file = output_file
+        self.signal_quality_s = signal_quality_s
+
+        self.file_id = None
+        self.label_mappings: list[dict[str, str]] = []
+
+    def load_split(self, rttm_file: Path, audio_split: AudioSplit) -> SpeakerTurns:
+        """Loads a split RTTM file and shifts its turns to the time base of the full recording"""
+        records = read_rttm(rttm_file)
+        if self.file_id is None:
+            self.file_id = records.file_id
+
+        start_s = records.start_s + audio_split.start_time_s
+        return SpeakerTurns(start_s, start_s + records.duration_s, records.speaker)
+
+    def to_signal(self, turns: SpeakerTurns, window_start_s: float, window_end_s: float) -> tuple[np.ndarray, list[str]]:
+        """Rasterizes the turns inside the window to a (speakers, samples) matrix"""
+        return turns_to_signal(turns, window_start_s, window_end_s, self.signal_quality_s)
+
+    def match_speakers(
+        self,
+        previous: SpeakerTurns,
+        current: SpeakerTurns,
+        window_start_s: float,
+        window_end_s: float,
+        existing_speakers: set[str],
+        split_index: int,
+        ) -> dict[str, str]:
+        """
+        Maps the speakers of the current split onto the speakers of the previous split.
+        split_index is the position of the current split in rttm_files.
+        """
+        if window_end_s <= window_start_s:
+            self.logger.warning("No overlap between splits at %s s, speakers cannot be matched", window_start_s)
+        return match_speaker_turns(
+            previous, current, window_start_s, window_end_s, existing_speakers, self.signal_quality_s)
+
+    def combine(self) -> SpeakerTurns:
+        """Loads every split and returns the stitched, relabelled turns"""
+        previous_split = self.audio_splits[0]
+        previous = self.load_split(self.rttm_files[0], previous_split)
+        existing_speakers = set(previous.speaker)
+        self.label_mappings = [{label: label for label in sort_speaker_labels(previous.speaker)}]
+
+        kept = []
+        kept_from_s = 0.0
+        for split_index, (rttm_file, split) in enumerate(zip(self.rttm_files[1:], self.audio_splits[1:]), start=1):
+            current = self.load_split(rttm_file, split)
+
+            window_start_s = split.start_time_s
+            window_end_s = previous_split.end_time_s
+            mapping = self.match_speakers(previous, current, window_start_s, window_end_s, existing_speakers, split_index)
+            self.logger.debug("Split %s speaker assignments: %s", split.order, mapping)
+            self.label_mappings.append(mapping)
+
+            current = current.relabel(mapping)
+            existing_speakers.update(mapping.values())
+
+            cut_s = (window_start_s + window_end_s) / 2
+            kept.append(previous.clip(kept_from_s, cut_s))
+            kept_from_s = cut_s
+
+            previous, previous_split = current, split
+
+        kept.append(previous.clip(kept_from_s, np.inf))
+
+        combined = SpeakerTurns.concatenate(kept)
+        order = np.argsort(combined.start_s, kind='stable')
+        return combined.select(order)
+
+    def write_rttm(self, turns: SpeakerTurns, output_file: Path):
+        file_id = self.file_id if self.file_id is not None else output_file.stem
+        write_rttm(output_file, file_id, turns.start_s, turns.end_s, turns.speaker)
+
+    def run(self) -> Path:
+        combined = self.combine()
+        self.write_rttm(combined, self.output_file)
+        self.logger.info("Combined %s RTTM files into %s", len(self.rttm_files), self.output_file)
+        return self.output_file
@@ -0,0 +1 @@
+from .speaker_index import SpeakerIndex
\ No newline at end of file
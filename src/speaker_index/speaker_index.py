@@ -0,0 +1,155 @@
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from diarizer import SpeakerCentroids
+from utils import LoggingObject
+
+EMBEDDINGS_FILE = 'embeddings.npy'
+METADATA_FILE = 'speakers.jsonl'
+
+
+class SpeakerIndex(LoggingObject):
+    """
+    An on-disk index of speaker centroid embeddings across episodes.
+
+    directory holds embeddings.npy, a float32 matrix with one L2-normalized centroid per
+    row, and speakers.jsonl, one line of metadata per row: the speaker's identity, the
+    episode and diarization label it came from, and its seconds of speech. An identity is
+    shared by the rows of the same person in different episodes. Rename it in
+    speakers.jsonl, e.g. to a host's name, and later episodes use the new name.
+
+    Search is exact cosine similarity, a single matrix product, which stays well under a
+    second for the few speakers of thousands of episodes.
+    """
+
+    def __init__(self, name: str, directory: Path):
+        super().__init__(name)
+        self.directory = directory
+
+        self.embeddings: Optional[np.ndarray] = None
+        self.metadata: list[dict] = []
+        self.load()
+
+    def __len__(self):
+        return len(self.metadata)
+
+    @property
+    def identities(self) -> list[str]:
+        return sorted({row['identity'] for row in self.metadata})
+
+    def load(self):
+        embeddings_file = self.directory / EMBEDDINGS_FILE
+        metadata_file = self.directory / METADATA_FILE
+        if not embeddings_file.is_file() or not metadata_file.is_file():
+            self.embeddings, self.metadata = None, []
+            return
+
+        self.embeddings = np.load(embeddings_file)
+        with metadata_file.open('r') as f:
+            self.metadata = [json.loads(line) for line in f if line.strip()]
+        if len(self.metadata) != len(self.embeddings):
+            raise ValueError(
+                f"Speaker index {self.directory} has {len(self.embeddings)} embeddings for {len(self.metadata)} speakers")
+        self.logger.info("Loaded speaker index with %s speakers of %s identities", len(self), len(self.identities))
+
+    def save(self):
+        """Writes both files next to the old ones first, so an interrupted save never leaves them inconsistent"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        embeddings_file = self.directory / EMBEDDINGS_FILE
+        metadata_file = self.directory / METADATA_FILE
+
+        with (self.directory / (EMBEDDINGS_FILE + '.tmp')).open('wb') as f:
+            np.save(f, self.embeddings)
+        with (self.directory / (METADATA_FILE + '.tmp')).open('w') as f:
+            for row in self.metadata:
+                f.write(json.dumps(row) + '\n')
+
+        os.replace(self.directory / (EMBEDDINGS_FILE + '.tmp'), embeddings_file)
+        os.replace(self.directory / (METADATA_FILE + '.tmp'), metadata_file)
+
+    def search(self, queries: np.ndarray, k: int = 10) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the cosine similarities and row numbers of the k most similar rows to each
+        query, best first, as two (queries, k) arrays.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if not len(self):
+            return np.zeros((len(queries), 0), dtype=np.float32), np.zeros((len(queries), 0), dtype=np.int64)
+
+        similarities = queries @ self.embeddings.T
+
+        k = min(k, similarities.shape[1])
+        rows = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(similarities, rows, axis=1)
+        order = np.argsort(-top, axis=1, kind='stable')
+        rows = np.take_along_axis(rows, order, axis=1)
+        return np.take_along_axis(top, order, axis=1), rows
+
+    def identify(
+        self,
+        centroids: SpeakerCentroids,
+        threshold: float = 0.7,
+        k: int = 10,
+        ) -> dict[str, str]:
+        """
+        Maps the labels of an episode's speakers to known identities.
+
+        Each label is scored against every identity among its k nearest rows by that
+        identity's best similarity, and the labels and identities are matched one to one
+        to maximize the total similarity, so two speakers of one episode never get the
+        same identity. Matches below threshold are left out. An episode that is indexed
+        again matches its own rows, so it keeps its identities, renamed ones included.
+        """
+        if not len(centroids):
+            return {}
+        scores, rows = self.search(centroids.centroids, k)
+        if not scores.size:
+            return {}
+
+        candidates = sorted({self.metadata[row]['identity'] for row in rows.ravel().tolist()})
+        column = {identity: i for i, identity in enumerate(candidates)}
+        similarity = np.full((len(centroids), len(candidates)), -1.0)
+        for query, (query_scores, query_rows) in enumerate(zip(scores.tolist(), rows.tolist())):
+            for score, row in zip(query_scores, query_rows):
+                i = column[self.metadata[row]['identity']]
+                similarity[query, i] = max(similarity[query, i], score)
+
+        # scipy.optimize takes longer to import than most runs spend matching speakers
+        from scipy.optimize import linear_sum_assignment
+        matches = {}
+        for query, i in zip(*linear_sum_assignment(similarity, maximize=True)):
+            if similarity[query, i] >= threshold:
+                matches[centroids.labels[query]] = candidates[i]
+        return matches
+
+    def insert(self, centroids: SpeakerCentroids, identities: dict[str, str], episode: str) -> dict[str, str]:
+        """
+        Adds an episode's centroids under the given identities and saves the index. A label
+        without an identity becomes a new one, named episode/label until it is renamed.
+        Rows the episode already had are replaced. Returns the identity of every label.
+        """
+        keep = [i for i, row in enumerate(self.metadata) if row['episode'] != episode]
+        metadata = [self.metadata[i] for i in keep]
+        embeddings = [self.embeddings[keep]] if self.embeddings is not None else []
+
+        metadata += [
+            {
+                'identity': identities.get(label, f'{episode}/{label}'),
+                'episode': episode,
+                'label': label,
+                'speech_s': round(float(speech_s), 3),
+            }
+            for label, speech_s in zip(centroids.labels, centroids.speech_s)
+        ]
+        embeddings.append(centroids.centroids.astype(np.float32))
+
+        self.embeddings = np.concatenate(embeddings)
+        self.metadata = metadata
+        self.save()
+        self.logger.info("Indexed %s speakers of %s, %s speakers of %s identities in the index",
+                         len(centroids), episode, len(self), len(self.identities))
+        return {row['label']: row['identity'] for row in metadata[len(keep):]}
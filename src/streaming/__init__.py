@@ -0,0 +1,3 @@
+from .pcm_stream import PCMStream
+from .reconciler import SpeakerReconciler
+from .stream_pipeline import StreamingPipeline
\ No newline at end of file
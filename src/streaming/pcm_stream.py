@@ -0,0 +1,103 @@
+import queue
+import threading
+from pathlib import Path
+from subprocess import DEVNULL, PIPE, Popen
+from typing import Iterator, Optional, Union
+
+import numpy as np
+
+from audio_processing.pcm_audio import PCM_DTYPE, SAMPLE_RATE_HZ, SAMPLE_WIDTH_BYTES
+from utils import LoggingObject
+
+STDIN_SOURCE = '-'
+
+
+class PCMStream(LoggingObject):
+    """
+    Decodes audio to 16 kHz mono PCM as it arrives and yields it in blocks.
+
+    The source is either '-' for a pipe on stdin, or a file. With follow=True the file
+    may still be growing: ffmpeg keeps reading at its end and only stops once no new
+    data has arrived for idle_timeout_s. A reader thread drains ffmpeg while the
+    consumer is busy, so a slow window never stalls the decoder.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        source: Union[str, Path],
+        follow: bool = False,
+        block_s: float = 1.0,
+        idle_timeout_s: float = 30.0,
+        ):
+        super().__init__(name)
+        self.source = source
+        self.follow = follow
+        self.block_bytes = int(block_s * SAMPLE_RATE_HZ) * SAMPLE_WIDTH_BYTES
+        self.idle_timeout_s = idle_timeout_s
+
+        self.samples_read = 0
+        self._process: Optional[Popen] = None
+
+    @property
+    def duration_s(self) -> float:
+        """Seconds of audio yielded so far"""
+        return self.samples_read / SAMPLE_RATE_HZ
+
+    def command(self) -> list[str]:
+        if str(self.source) == STDIN_SOURCE:
+            input_args = ["-i", "pipe:0"]
+        elif self.follow:
+            input_args = ["-follow", "1", "-rw_timeout", str(int(self.idle_timeout_s * 1e6)), "-i", f"file:{self.source}"]
+        else:
+            input_args = ["-nostdin", "-i", str(self.source)]
+
+        return [
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            *input_args,
+            "-vn", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(SAMPLE_RATE_HZ),
+            "-f", "s16le", "-",
+        ]
+
+    def _read(self, blocks: queue.Queue):
+        try:
+            while True:
+                block = self._process.stdout.read(self.block_bytes)
+                if not block:
+                    break
+                blocks.put(block)
+        finally:
+            blocks.put(None)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        stdin = None if str(self.source) == STDIN_SOURCE else DEVNULL
+        self._process = Popen(self.command(), stdin=stdin, stdout=PIPE)
+        self.logger.info("Streaming %s", self.source)
+
+        blocks = queue.Queue()
+        reader = threading.Thread(target=self._read, args=(blocks,), daemon=True)
+        reader.start()
+
+        remainder = b''
+        try:
+            while (block := blocks.get()) is not None:
+                block = remainder + block
+                usable = len(block) - len(block) % SAMPLE_WIDTH_BYTES
+                remainder = block[usable:]
+                samples = np.frombuffer(block[:usable], dtype=PCM_DTYPE)
+                self.samples_read += len(samples)
+                yield samples
+        finally:
+            self.close()
+            reader.join()
+
+    def close(self):
+        if self._process is None:
+            return
+        if self._process.poll() is None:
+            self._process.terminate()
+        self._process.wait()
+        if self._process.returncode not in (0, -15):
+            self.logger.warning("ffmpeg exited with code %s while streaming %s", self._process.returncode, self.source)
+        self.logger.info("Stopped streaming %s after %.1f s of audio", self.source, self.duration_s)
+        self._process = None
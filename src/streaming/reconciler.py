@@ -0,0 +1,45 @@
+from typing import Optional
+
+from rttm_combiner import SpeakerTurns, match_speaker_turns
+from utils import LoggingObject
+
+
+class SpeakerReconciler(LoggingObject):
+    """
+    Keeps speaker labels consistent across rolling diarization windows.
+
+    Each window is diarized on its own, so its labels are arbitrary. They are mapped onto
+    the labels of the previous window by correlating speaker activity where the two
+    windows overlap, the same matching SplitCombiner uses for audio splits, only applied
+    as every window arrives instead of once at the end.
+    """
+
+    def __init__(self, name: str, signal_quality_s: float = 0.1):
+        super().__init__(name)
+        self.signal_quality_s = signal_quality_s
+
+        self.previous: Optional[SpeakerTurns] = None
+        self.previous_end_s = 0.0
+        self.speakers: set[str] = set()
+
+    def update(self, turns: SpeakerTurns, window_start_s: float, window_end_s: float) -> SpeakerTurns:
+        """Relabels the turns of a window, already on the stream time base, and remembers them"""
+        if self.previous is None:
+            mapping = {speaker: speaker for speaker in set(turns.speaker)}
+        else:
+            mapping = match_speaker_turns(
+                self.previous,
+                turns,
+                window_start_s,
+                self.previous_end_s,
+                self.speakers,
+                self.signal_quality_s,
+                )
+            self.logger.debug("Window at %.1f s speaker assignments: %s", window_start_s, mapping)
+
+        turns = turns.relabel(mapping)
+        self.speakers.update(mapping.values())
+
+        self.previous = turns
+        self.previous_end_s = window_end_s
+        return turns
@@ -0,0 +1,191 @@
+import shutil
+from pathlib import Path
+from time import perf_counter
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from audio_processing import PCMAudio
+from audio_processing.pcm_audio import PCM_DTYPE, SAMPLE_RATE_HZ
+from diarizer import prep_NeMo, run_NeMo
+from pipeline import PipelineOptions
+from punctuation_realignment import get_sentences_speaker_mapping_from_table, realign_word_table
+from punctuation_realignment.punctuation_realignment import is_sentence_end
+from rttm_combiner import SpeakerTurns
+from rttm_combiner.signal import speaker_index
+from transcriber import WhisperTranscriber
+from utils import LoggingObject, WordTable, read_rttm
+from utils.speaker_overlap_mapping import assign_word_speakers
+
+from .reconciler import SpeakerReconciler
+
+
+class StreamingPipeline(LoggingObject):
+    """
+    Transcribes and diarizes audio as it arrives, in rolling windows.
+
+    Every stream_hop_s seconds the last stream_window_s seconds are transcribed and
+    diarized, and the window's speakers are reconciled with the previous window's. The
+    overlap between consecutive windows is cut at its midpoint, and everything before the
+    cut is final: words are taken from the window whose side of the cut their midpoint
+    falls on, as in stitch_chunks. Final words are held back until their sentence ends, so
+    punctuation realignment never sees half a sentence, then yielded as sentences.
+
+    A sentence is available at most stream_window_s - (stream_window_s - stream_hop_s) / 2
+    seconds of audio after it was spoken, plus the time to process one window.
+    """
+
+    def __init__(self, name: str, options: PipelineOptions, work_dir: Path, max_words_in_sentence: int = 50):
+        super().__init__(name)
+        self.check_options(options)
+
+        self.options = options
+        self.work_dir = work_dir
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self.max_words_in_sentence = max_words_in_sentence
+
+        self.language = options.language
+        self.reconciler = SpeakerReconciler(f"{name}.SpeakerReconciler", options.signal_quality_s)
+
+        self.finalized_s = 0.0
+        self.pending_words: list[dict] = []
+        self.final_turns: list[SpeakerTurns] = []
+        self.windows = 0
+
+    @staticmethod
+    def check_options(options: PipelineOptions) -> float:
+        """Validates the window and hop, and returns the worst-case latency in seconds of audio"""
+        if not 0 < options.stream_hop_s <= options.stream_window_s:
+            raise ValueError(
+                f"Stream hop must be positive and at most the window, got {options.stream_hop_s} s "
+                f"for a {options.stream_window_s} s window")
+        return options.stream_window_s - (options.stream_window_s - options.stream_hop_s) / 2
+
+    def run(self, stream: Iterable[np.ndarray]) -> Iterator[dict]:
+        """
+        Consumes blocks of 16 kHz PCM samples and yields finalized sentences,
+        {'speaker', 'start_time', 'end_time', 'text'} with times in milliseconds
+        """
+        window_s, hop_s = self.options.stream_window_s, self.options.stream_hop_s
+        window_samples = int(window_s * SAMPLE_RATE_HZ)
+        hop_samples = int(hop_s * SAMPLE_RATE_HZ)
+
+        blocks, buffered = [], 0
+        window_start_s = 0.0
+        for block in stream:
+            blocks.append(block)
+            buffered += len(block)
+
+            while buffered >= window_samples:
+                buffer = np.concatenate(blocks)
+                yield from self.process_window(PCMAudio(buffer[:window_samples]), window_start_s, final=False)
+
+                blocks, buffered = [buffer[hop_samples:]], len(buffer) - hop_samples
+                window_start_s += hop_s
+
+        # whatever follows the last cut, including a stream shorter than one window
+        buffer = np.concatenate(blocks) if blocks else np.zeros(0, dtype=PCM_DTYPE)
+        if self.windows == 0 or window_start_s + len(buffer) / SAMPLE_RATE_HZ > self.finalized_s:
+            yield from self.process_window(PCMAudio(buffer), window_start_s, final=True)
+
+    def process_window(self, audio: PCMAudio, start_s: float, final: bool) -> list[dict]:
+        """Transcribes and diarizes one window and returns the sentences it finalized"""
+        start = perf_counter()
+        end_s = start_s + audio.duration_s
+        lower_s = self.finalized_s
+        upper_s = np.inf if final else end_s - (self.options.stream_window_s - self.options.stream_hop_s) / 2
+
+        if audio.duration_s > 0:
+            audio_file = audio.write_wav(self.work_dir / f"window_{self.windows:05d}.wav")
+            words = self.transcribe(audio, audio_file, start_s)
+            turns = self.reconciler.update(self.diarize(audio_file, start_s), start_s, end_s)
+            audio_file.unlink()
+        else:
+            words, turns = [], SpeakerTurns(np.zeros(0), np.zeros(0), np.zeros(0, dtype=object))
+        self.windows += 1
+
+        self.pending_words.extend(
+            wrd_dict for wrd_dict in words if lower_s <= (wrd_dict['start'] + wrd_dict['end']) / 2 < upper_s)
+        self.final_turns.append(turns.clip(lower_s, upper_s))
+        self.finalized_s = upper_s
+
+        sentences = self.finalize(final)
+
+        elapsed_s = perf_counter() - start
+        self.logger.info(
+            "Window %s [%.1f, %.1f) s finalized up to %.1f s, %s sentences in %.1f s",
+            self.windows, start_s, end_s, min(upper_s, end_s), len(sentences), elapsed_s)
+        if elapsed_s > self.options.stream_hop_s and not final:
+            self.logger.warning("Processing a window took %.1f s, longer than the %s s hop, falling behind the stream",
+                                elapsed_s, self.options.stream_hop_s)
+        return sentences
+
+    def transcribe(self, audio: PCMAudio, audio_file: Path, start_s: float) -> list[dict]:
+        """Returns the window's words on the stream time base, dropping words without timestamps"""
+        transcriber = WhisperTranscriber(
+            audio_in=audio_file,
+            model_size=self.options.model_size,
+            device=self.options.device,
+            language=self.language,
+            audio=audio,
+            )
+        transcription = transcriber.transcribe()
+        # detected on the first window, then kept so that every window is in the same language
+        self.language = transcriber.language
+
+        return [
+            {**wrd_dict, 'text': wrd_dict['text'].strip(), 'start': wrd_dict['start'] + start_s, 'end': wrd_dict['end'] + start_s}
+            for wrd_dict in transcription['word_segments']
+            if wrd_dict.get('start') is not None and wrd_dict.get('end') is not None
+        ]
+
+    def diarize(self, audio_file: Path, start_s: float) -> SpeakerTurns:
+        """Returns the window's speaker turns on the stream time base, with the window's own labels"""
+        window_dir = self.work_dir / audio_file.stem
+        window_dir.mkdir(exist_ok=True)
+
+        config = prep_NeMo(audio_file, window_dir, self.options.num_speakers, config_dir=self.work_dir)
+        rttm_file = run_NeMo(config, audio_file)
+        records = read_rttm(rttm_file)
+
+        rttm_file.unlink()
+        shutil.rmtree(window_dir)
+
+        turn_start_s = records.start_s + start_s
+        return SpeakerTurns(turn_start_s, turn_start_s + records.duration_s, records.speaker)
+
+    def finalize(self, final: bool) -> list[dict]:
+        """
+        Maps the pending words to speakers, realigns them with punctuation and returns the
+        complete sentences among them. An unfinished sentence is kept pending unless it has
+        outgrown max_words_in_sentence or the stream has ended.
+        """
+        if not self.pending_words:
+            self.final_turns = []
+            return []
+
+        words = WordTable.from_word_timestamps(self.pending_words)
+        turns = SpeakerTurns.concatenate(self.final_turns)
+        if len(turns):
+            speakers = np.array([speaker_index(speaker) for speaker in turns.speaker], dtype=np.int32)
+            words = words.with_speakers(assign_word_speakers(
+                words.start_ms, words.end_ms, turns.start_s * 1000, turns.end_s * 1000, speakers))
+        words = realign_word_table(words, self.max_words_in_sentence)
+
+        emit = len(words)
+        if not final:
+            sentence_ends = [i for i, text in enumerate(words.texts) if is_sentence_end(text)]
+            if sentence_ends:
+                emit = sentence_ends[-1] + 1
+            elif len(words) < self.max_words_in_sentence:
+                emit = 0
+
+        self.pending_words = self.pending_words[emit:]
+        if self.pending_words:
+            # pending words are re-mapped next time, keep the turns they may overlap
+            first_start_s = self.pending_words[0]['start']
+            self.final_turns = [turns.select(turns.end_s > first_start_s)]
+        else:
+            self.final_turns = []
+
+        return get_sentences_speaker_mapping_from_table(words.select(slice(0, emit)))
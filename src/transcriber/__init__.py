@@ -1 +1,2 @@
-from .transcriber import WhisperTranscriber
\ No newline at end of file
+from .transcriber import WORD_FORMATS, WhisperTranscriber
+from .chunked_transcriber import ChunkedWhisperTranscriber, stitch_chunks
\ No newline at end of file
@@ -0,0 +1,168 @@
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from audio_processing import AudioSplit, PCMAudio
+from utils import Profiler, StageMetrics, init_worker, model_cache
+
+from .transcriber import WhisperTranscriber
+
+_pools: dict[tuple[int, int], ProcessPoolExecutor] = {}
+
+
+def get_transcription_pool(workers: int, threads_per_worker: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Returns the process-wide pool of transcription workers for this size, starting it on first use.
+    Workers load their models once and keep them for the life of the process, within
+    this process's model cache limits.
+    """
+    threads_per_worker = threads_per_worker or max((os.cpu_count() or 1) // workers, 1)
+    key = (workers, threads_per_worker)
+    if key not in _pools:
+        _pools[key] = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            initargs=(threads_per_worker, False, model_cache.max_models, model_cache.memory_budget_bytes),
+            )
+    return _pools[key]
+
+
+@atexit.register
+def shutdown_transcription_pools():
+    for pool in _pools.values():
+        pool.shutdown()
+    _pools.clear()
+
+
+def _transcribe_chunk(
+    audio: Union[Path, np.ndarray],
+    split: AudioSplit,
+    audio_in: Path,
+    model_size: str,
+    device: str,
+    language: Optional[str],
+    beam_size: Optional[int],
+    profiler: Profiler,
+    ) -> tuple[dict, dict[str, StageMetrics]]:
+    """
+    Transcribes one chunk in a worker process. audio is either the .pcm file backing the
+    episode, which is memory-mapped and sliced here, or the chunk's samples. Returns the
+    result with the whisper and align metrics the worker's profiler recorded.
+    """
+    if isinstance(audio, Path):
+        chunk = PCMAudio.from_pcm_file(audio).slice(split.start_time_s, split.end_time_s)
+    else:
+        chunk = PCMAudio(audio)
+
+    transcriber = WhisperTranscriber(
+        audio_in=audio_in,
+        model_size=model_size,
+        device=device,
+        language=language,
+        beam_size=beam_size,
+        audio=chunk,
+        profiler=profiler,
+        )
+    return transcriber.transcribe(), profiler.stages
+
+
+def _midpoint(item: dict) -> Optional[float]:
+    if item.get('start') is None or item.get('end') is None:
+        return None
+    return (item['start'] + item['end']) / 2
+
+
+def _shift(item: dict, offset_s: float) -> dict:
+    item = dict(item)
+    for key in ('start', 'end'):
+        if item.get(key) is not None:
+            item[key] += offset_s
+    return item
+
+
+def stitch_chunks(results: list[dict], splits: list[AudioSplit]) -> dict:
+    """
+    Shifts each chunk's segments and words by its split offset and joins them.
+
+    Consecutive chunks overlap, so each overlap is cut at its midpoint and every segment
+    or word is kept only from the chunk whose side of the cut its own midpoint falls on.
+    Items without timestamps are kept from the chunk that produced them.
+    """
+    stitched = {'segments': [], 'word_segments': []}
+
+    for i, (result, split) in enumerate(zip(results, splits)):
+        lower_s = -np.inf if i == 0 else (split.start_time_s + splits[i - 1].end_time_s) / 2
+        upper_s = np.inf if i == len(splits) - 1 else (splits[i + 1].start_time_s + split.end_time_s) / 2
+
+        for key in ('segments', 'word_segments'):
+            for item in result.get(key, []):
+                item = _shift(item, split.start_time_s)
+                midpoint = _midpoint(item)
+                if midpoint is None or lower_s <= midpoint < upper_s:
+                    stitched[key].append(item)
+
+    if results and 'language' in results[0]:
+        stitched['language'] = results[0]['language']
+    return stitched
+
+
+class ChunkedWhisperTranscriber(WhisperTranscriber):
+    """
+    Transcribes an episode as overlapping chunks spread over a pool of worker processes,
+    then stitches the words back onto the episode's time base.
+    """
+
+    def __init__(
+        self,
+        audio_in: Path,
+        model_size: str,
+        device: str,
+        audio: PCMAudio,
+        chunks: list[AudioSplit],
+        language: str = None,
+        beam_size: int = None,
+        workers: int = 2,
+        threads_per_worker: Optional[int] = None,
+        profiler: Optional[Profiler] = None,
+        ):
+        """profiler: the workers' whisper and align metrics are merged into it"""
+        super().__init__(audio_in, model_size, device, language, beam_size, audio, profiler)
+        self.chunks = chunks
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+
+    def transcribe(self):
+        """Transcribe every chunk in parallel and stitch the aligned results"""
+        pool = get_transcription_pool(self.workers, self.threads_per_worker)
+
+        futures = []
+        for chunk in self.chunks:
+            if self.audio.pcm_file is not None:
+                # workers map the same file, nothing is copied between processes
+                audio = self.audio.pcm_file
+            else:
+                audio = np.asarray(self.audio.slice(chunk.start_time_s, chunk.end_time_s).samples)
+            futures.append(pool.submit(
+                _transcribe_chunk,
+                audio,
+                chunk,
+                self.audio_in,
+                self.model_size,
+                self.device,
+                self.language,
+                self.beam_size,
+                self.profiler.empty_copy(),
+                ))
+
+        results = []
+        for future in futures:
+            result, metrics = future.result()
+            self.profiler.merge(metrics)
+            results.append(result)
+        return stitch_chunks(results, self.chunks)
@@ -1,8 +1,11 @@
 from pathlib import Path
+from typing import Optional
 import json
 
-import whisper
-import whisperx
+from audio_processing import PCMAudio
+from utils import Profiler, WordTable, model_cache
+
+WORD_FORMATS = ('jsonl', 'columns')
 
 class WhisperTranscriber:
 
@@ -13,38 +16,78 @@ class WhisperTranscriber:
         device: str,
         language : str = None,
         beam_size: int = None,
-
+        audio: Optional[PCMAudio] = None,
+        profiler: Optional[Profiler] = None,
         ):
+        """
+        audio: already decoded audio_in, when given it is passed to Whisper and WhisperX
+        as a float32 buffer instead of each of them decoding audio_in again
+        profiler: records the whisper and align stages, default a private one
+        """
         self.audio_in = audio_in
+        self.audio = audio
         self.model_size = model_size
         self.device = device
         self.language = language
         self.beam_size = beam_size
+        self.profiler = profiler or Profiler("Profiler")
         
 
     def transcribe(self):
         """Transcribe audio file using Whisper model and align the results using WhisperX"""
+        # imported here so that importing the transcriber does not load torch
+        import whisper
+        import whisperx
 
-        audio_in_str = str(self.audio_in)
+        if self.audio is not None:
+            # decoded once, shared by transcription and alignment
+            audio_in = self.audio.to_float32()
+        else:
+            audio_in = str(self.audio_in)
 
         options = {
             "language": self.language,
             "beam_size": self.beam_size,
         }
 
-        model = whisper.load_model(self.model_size, device=self.device )
-        results = model.transcribe(audio_in_str, **options) 
+        audio_s = self.audio.duration_s if self.audio is not None else None
+        with self.profiler.stage("whisper", audio_s=audio_s):
+            model = model_cache.get(
+                ('whisper', self.model_size, self.device),
+                lambda: whisper.load_model(self.model_size, device=self.device),
+                )
+            results = model.transcribe(audio_in, **options)
 
         if self.language is None:
             self.language = results["language"]
 
-        alignment_model, metadata = whisperx.load_align_model(language_code=self.language, device=self.device)
-        result_aligned = whisperx.align(results["segments"], alignment_model, metadata, audio_in_str, self.device)
+        with self.profiler.stage("align", audio_s=audio_s):
+            alignment_model, metadata = model_cache.get(
+                ('whisperx_align', self.language, self.device),
+                lambda: whisperx.load_align_model(language_code=self.language, device=self.device),
+                )
+            result_aligned = whisperx.align(results["segments"], alignment_model, metadata, audio_in, self.device)
 
         return result_aligned
     
-    def save_transcript(self, transcription, output_dir: Path)-> Path:
-        """Save transcript to file"""
+    def to_word_table(self, transcription) -> WordTable:
+        """Columnar words of a transcription, text stripped as in save_transcript"""
+        return WordTable.from_word_timestamps(
+            {**line, 'text': line['text'].strip()} for line in transcription['word_segments']
+            )
+
+    def save_transcript(self, transcription, output_dir: Path, word_format: str = 'jsonl')-> Path:
+        """
+        Save transcript to file, either as JSONL, one word per line, or with word_format='columns'
+        as a directory of memory-mappable WordTable columns
+        """
+        if word_format not in WORD_FORMATS:
+            raise ValueError(f"Unknown word format: {word_format}, expected one of {WORD_FORMATS}")
+
+        if word_format == 'columns':
+            directory = output_dir / f'{self.audio_in.stem}.words'
+            self.to_word_table(transcription).save_columns(directory)
+            return directory
 
         filename = output_dir / f'{self.audio_in.stem}.txt'
         
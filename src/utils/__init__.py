@@ -1,6 +1,14 @@
 from .logger import configure_logging
 from .logging_object import LoggingObject
+from .checkpoint import CheckpointStore, hash_file
+from .model_cache import ModelCache, model_cache
+from .worker import init_worker
+from .profiling import Profiler, StageMetrics
 
-from .rttm_loader import load_rttm_file
-from .load_word_timestamps import load_word_timestamps
-from .get_words_speaker_mapping import get_words_speaker_mapping
\ No newline at end of file
+from .tables import StringPool, TurnTable, WordTable
+
+from .rttm_io import RTTMRecords, iter_rttm, read_rttm, write_rttm
+from .rttm_loader import load_rttm_file, load_turn_table
+from .load_word_timestamps import load_word_timestamps, load_word_table, load_words, save_word_timestamps
+from .get_words_speaker_mapping import get_words_speaker_mapping, map_word_table_speakers_by_anchor
+from .speaker_overlap_mapping import get_words_speaker_mapping_by_overlap, map_word_table_speakers
\ No newline at end of file
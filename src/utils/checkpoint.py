@@ -0,0 +1,93 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Optional
+
+from .logging_object import LoggingObject
+
+CHECKPOINT_FILE = 'checkpoint.json'
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def hash_file(path: Path) -> str:
+    """Returns the sha256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with path.open('rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CheckpointStore(LoggingObject):
+    """
+    Content-addressed storage for pipeline stage artifacts.
+
+    Every stage gets a directory under root named after a key derived from the hash of
+    the input file, the stage name and the stage parameters. Downstream stages include the
+    keys of the stages they consume in their parameters, so changing a parameter only
+    invalidates the stages that depend on it. A stage is valid when its checkpoint.json
+    exists and every artifact it lists still has the recorded size.
+    """
+
+    def __init__(self, name: str, root: Path, input_file: Path, resume: bool = True):
+        super().__init__(name)
+        self.input_file = input_file
+        self.resume = resume
+
+        self.input_hash = hash_file(input_file)
+        self.directory = root / f"{input_file.stem}_{self.input_hash[:16]}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def key(self, stage: str, params: dict[str, Any]) -> str:
+        payload = json.dumps({'input': self.input_hash, 'stage': stage, 'params': params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def stage_dir(self, stage: str, params: dict[str, Any]) -> Path:
+        stage_dir = self.directory / f"{stage}_{self.key(stage, params)}"
+        stage_dir.mkdir(parents=True, exist_ok=True)
+        return stage_dir
+
+    def load(self, stage: str, params: dict[str, Any]) -> Optional[dict[str, Any]]:
+        """
+        Returns the saved checkpoint of a stage, {'artifacts': [Path, ...], 'data': {...}},
+        or None if the stage has to be (re)run.
+        """
+        if not self.resume:
+            return None
+
+        checkpoint_file = self.stage_dir(stage, params) / CHECKPOINT_FILE
+        if not checkpoint_file.is_file():
+            return None
+
+        with checkpoint_file.open('r') as f:
+            checkpoint = json.load(f)
+
+        artifacts = []
+        for artifact in checkpoint['artifacts']:
+            path = checkpoint_file.parent / artifact['path']
+            if not path.is_file() or path.stat().st_size != artifact['size']:
+                self.logger.warning("Checkpoint %s is stale, %s is missing or changed", stage, path)
+                return None
+            artifacts.append(path)
+
+        self.logger.info("Resuming from checkpoint: %s", checkpoint_file.parent.name)
+        return {'artifacts': artifacts, 'data': checkpoint['data']}
+
+    def save(self, stage: str, params: dict[str, Any], artifacts: list[Path], data: Optional[dict[str, Any]] = None):
+        """Marks a stage as complete. Artifacts must live inside the stage directory."""
+        stage_dir = self.stage_dir(stage, params)
+        checkpoint = {
+            'stage': stage,
+            'params': params,
+            'artifacts': [
+                {'path': str(Path(artifact).relative_to(stage_dir)), 'size': Path(artifact).stat().st_size}
+                for artifact in artifacts
+            ],
+            'data': data or {},
+        }
+
+        # write then rename so that a crash never leaves a half written checkpoint behind
+        temp_file = stage_dir / (CHECKPOINT_FILE + '.tmp')
+        with temp_file.open('w') as f:
+            json.dump(checkpoint, f, indent=2, default=str)
+        temp_file.replace(stage_dir / CHECKPOINT_FILE)
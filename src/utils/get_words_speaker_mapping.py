@@ -1,3 +1,7 @@
+import numpy as np
+
+from .tables import WordTable
+
 def get_word_ts_anchor(start, end, option='start'):
     """
     Get the anchor point for a word timestamp
@@ -26,4 +30,20 @@ def get_words_speaker_mapping(wrd_ts, spk_ts, word_anchor_option='start')-> list
             turn_idx = min(turn_idx, len(spk_ts) - 1)
             start, end, speaker = spk_ts[turn_idx]
         wrd_spk_mapping.append({'word': word, 'start_time': word_start_s, 'end_time': word_end_s, 'speaker': speaker})
-    return wrd_spk_mapping
\ No newline at end of file
+    return wrd_spk_mapping
+
+def map_word_table_speakers_by_anchor(words: WordTable, spk_ts, word_anchor_option='start') -> WordTable:
+    """
+    Columnar get_words_speaker_mapping on millisecond times, returns words with their speakers filled in.
+    Words past the end of the last turn get the speaker of the last turn.
+    """
+    start, end, speaker = spk_ts[0]
+    turn_idx = 0
+    speakers = np.empty(len(words), dtype=np.int32)
+    for i, (word_start, word_end) in enumerate(zip(words.start_ms.tolist(), words.end_ms.tolist())):
+        wrd_pos = get_word_ts_anchor(word_start, word_end, word_anchor_option)
+        while wrd_pos > float(end) and turn_idx < len(spk_ts) - 1:
+            turn_idx += 1
+            start, end, speaker = spk_ts[turn_idx]
+        speakers[i] = speaker
+    return words.with_speakers(speakers)
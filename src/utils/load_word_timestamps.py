@@ -1,6 +1,11 @@
 import json
+from array import array
 from pathlib import Path
 
+import numpy as np
+
+from .tables import StringPool, WordTable
+
 def load_word_timestamps( word_ts_file_path: Path )-> list[ dict ]:
     """
     Load a word timestamp file and return a list of dictionaries of the form: {'start': start_time, 'end': end_time, 'text': word}
@@ -10,4 +15,43 @@ def load_word_timestamps( word_ts_file_path: Path )-> list[ dict ]:
         for line in f:
             line_temp = json.loads(line)
             word_ts.append(line_temp)
-    return word_ts
\ No newline at end of file
+    return word_ts
+
+def load_word_table( word_ts_file_path: Path )-> WordTable:
+    """
+    Load a word timestamp file straight into a columnar WordTable, without keeping a dict per word
+    """
+    pool = StringPool()
+    starts, ends, text_ids, scores = array('q'), array('q'), array('i'), array('f')
+    with word_ts_file_path.open('r') as f:
+        for line in f:
+            line_temp = json.loads(line)
+            starts.append(int(line_temp['start'] * 1000))
+            ends.append(int(line_temp['end'] * 1000))
+            text_ids.append(pool.intern(line_temp['text']))
+            scores.append(line_temp.get('score', float('nan')))
+
+    return WordTable(
+        np.frombuffer(starts, dtype=np.int64),
+        np.frombuffer(ends, dtype=np.int64),
+        np.frombuffer(text_ids, dtype=np.int32),
+        pool,
+        score=np.frombuffer(scores, dtype=np.float32),
+        )
+
+
+def load_words( words_path: Path, mmap: bool = True )-> WordTable:
+    """
+    Load words saved either as a JSONL word timestamp file or as a WordTable column directory
+    """
+    if words_path.is_dir():
+        return WordTable.load_columns(words_path, mmap=mmap)
+    return load_word_table(words_path)
+
+def save_word_timestamps( words: WordTable, word_ts_file_path: Path )-> Path:
+    """
+    Export a WordTable as a JSONL word timestamp file, one {'text', 'start', 'end', 'score'} object per line
+    """
+    with word_ts_file_path.open('w') as f:
+        f.writelines(f'{json.dumps(wrd_dict)}\n' for wrd_dict in words.to_word_timestamps())
+    return word_ts_file_path
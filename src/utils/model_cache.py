@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, Callable, Hashable, Optional
+
+from .logging_object import LoggingObject
+
+
+def estimate_model_size_bytes(model: Any) -> int:
+    """
+    Estimates the memory held by a model from its torch parameters and buffers.
+
+    Tuples and lists (e.g. a WhisperX aligner and its metadata) are summed, and objects
+    that wrap several torch modules (e.g. NeMo's ClusteringDiarizer) are inspected one
+    attribute deep. Anything else counts as 0.
+    """
+    if hasattr(model, 'parameters') and hasattr(model, 'buffers'):
+        tensors = [*model.parameters(), *model.buffers()]
+        return sum(t.numel() * t.element_size() for t in tensors)
+    if isinstance(model, (tuple, list)):
+        return sum(estimate_model_size_bytes(m) for m in model)
+    if hasattr(model, '__dict__'):
+        return sum(
+            estimate_model_size_bytes(attribute)
+            for attribute in vars(model).values()
+            if hasattr(attribute, 'parameters')
+        )
+    return 0
+
+
+class ModelCache(LoggingObject):
+    """
+    A process-wide LRU cache of loaded models.
+
+    Models are keyed on whatever identifies them, e.g. (model name, device, language),
+    and loaded at most once while they stay cached. The least recently used models are
+    evicted when there are more than max_models entries or when the estimated size of
+    the cached models exceeds memory_budget_bytes.
+    """
+
+    def __init__(self, name: str, max_models: Optional[int] = None, memory_budget_bytes: Optional[int] = None):
+        super().__init__(name)
+        self.max_models = max_models
+        self.memory_budget_bytes = memory_budget_bytes
+
+        self._models: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._lock = RLock()
+
+    def configure(self, max_models: Optional[int] = None, memory_budget_bytes: Optional[int] = None):
+        with self._lock:
+            self.max_models = max_models
+            self.memory_budget_bytes = memory_budget_bytes
+            self._evict()
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Returns the cached model for key, calling loader() to load it on a miss"""
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.logger.debug("Model cache hit: %s", key)
+                return self._models[key][0]
+
+            self.logger.info("Loading model: %s", key)
+            model = loader()
+            self._models[key] = (model, estimate_model_size_bytes(model))
+            self._evict(keep=key)
+            return model
+
+    def evict(self, key: Hashable):
+        with self._lock:
+            self._models.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(size for _, size in self._models.values())
+
+    def _evict(self, keep: Optional[Hashable] = None):
+        def over_budget():
+            too_many = self.max_models is not None and len(self._models) > self.max_models
+            too_big = self.memory_budget_bytes is not None and self.size_bytes > self.memory_budget_bytes
+            return too_many or too_big
+
+        while over_budget():
+            key = next((k for k in self._models if k != keep), None)
+            if key is None:
+                # only the model just loaded is left, keep it even if it is over budget on its own
+                break
+            self.logger.info("Evicting model: %s", key)
+            del self._models[key]
+
+
+model_cache = ModelCache("ModelCache")
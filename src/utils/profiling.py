@@ -0,0 +1,246 @@
+import json
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from .logging_object import LoggingObject
+
+PROFILERS = ('cprofile', 'pyinstrument')
+RSS_SAMPLE_INTERVAL_S = 0.05
+PROMETHEUS_PREFIX = 'diarization_stage'
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process from /proc, None where /proc is not available"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss_bytes() -> int:
+    """Peak resident set size of this process so far"""
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def cpu_seconds() -> float:
+    """User and system CPU time of this process and of its finished children, e.g. ffmpeg"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class RSSSampler:
+    """Samples the RSS on a background thread to find the peak of one stage rather than of the process"""
+
+    def __init__(self, interval_s: float = RSS_SAMPLE_INTERVAL_S):
+        self.interval_s = interval_s
+        self.peak_bytes = current_rss_bytes()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self) -> 'RSSSampler':
+        if self.peak_bytes is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._update()
+        else:
+            self.peak_bytes = max_rss_bytes()
+
+    def _update(self):
+        rss = current_rss_bytes()
+        if rss is not None and rss > self.peak_bytes:
+            self.peak_bytes = rss
+
+    def _sample(self):
+        while not self._stop.wait(self.interval_s):
+            self._update()
+
+
+@dataclass
+class StageMetrics:
+    """Accumulated metrics of one stage, audio_s is the audio the stage processed"""
+    stage: str
+    calls: int = 0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_bytes: int = 0
+    audio_s: Optional[float] = None
+
+    @property
+    def real_time_factor(self) -> Optional[float]:
+        """Processing time per second of audio, below 1 is faster than real time"""
+        return self.wall_s / self.audio_s if self.audio_s else None
+
+    def add(self, other: 'StageMetrics'):
+        self.calls += other.calls
+        self.wall_s += other.wall_s
+        self.cpu_s += other.cpu_s
+        self.peak_rss_bytes = max(self.peak_rss_bytes, other.peak_rss_bytes)
+        if other.audio_s is not None:
+            self.audio_s = (self.audio_s or 0.0) + other.audio_s
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), 'real_time_factor': self.real_time_factor}
+
+
+class Profiler(LoggingObject):
+    """
+    Measures wall time, CPU time, peak RSS and real-time factor per pipeline stage.
+
+    Stages are timed with the stage() context manager, may nest, and accumulate when
+    entered more than once. Stages without their own audio_s are charged the episode's
+    audio_s. Metrics measured in worker processes are merged with merge(). Stages listed
+    in profile_stages, or every stage for 'all', are also run under cProfile or
+    pyinstrument, with the report written to profile_dir. Episode-level figures that are
+    not stage metrics, e.g. the audio removed by silence compaction, go in details.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        audio_s: Optional[float] = None,
+        profile_stages: Iterable[str] = (),
+        profile_dir: Optional[Path] = None,
+        profiler: str = 'cprofile',
+        ):
+        super().__init__(name)
+
+        if profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler: {profiler}, expected one of {PROFILERS}")
+
+        self.audio_s = audio_s
+        self.profile_stages = set(profile_stages)
+        self.profile_dir = profile_dir
+        self.profiler = profiler
+        self.stages: dict[str, StageMetrics] = {}
+        self.details: dict[str, Any] = {}
+
+    def empty_copy(self) -> 'Profiler':
+        """A profiler with the same settings and no metrics, for a worker process to fill in"""
+        return Profiler(self.name, self.audio_s, self.profile_stages, self.profile_dir, self.profiler)
+
+    @property
+    def timings(self) -> dict[str, float]:
+        return {stage: metrics.wall_s for stage, metrics in self.stages.items()}
+
+    def _profiled(self, stage: str) -> bool:
+        return self.profile_dir is not None and ('all' in self.profile_stages or stage in self.profile_stages)
+
+    @contextmanager
+    def stage(self, stage: str, audio_s: Optional[float] = None):
+        self.logger.info("Stage: %s", stage)
+        wall_start, cpu_start = time.perf_counter(), cpu_seconds()
+        rss = RSSSampler()
+        try:
+            with rss, self._profile(stage):
+                yield
+        finally:
+            metrics = StageMetrics(
+                stage,
+                calls=1,
+                wall_s=time.perf_counter() - wall_start,
+                cpu_s=cpu_seconds() - cpu_start,
+                peak_rss_bytes=rss.peak_bytes or 0,
+                audio_s=audio_s,
+                )
+            self.add(metrics)
+            self.logger.debug("Stage %s took %.2f s wall, %.2f s CPU, peak RSS %.0f MB",
+                              stage, metrics.wall_s, metrics.cpu_s, metrics.peak_rss_bytes / 2**20)
+
+    @contextmanager
+    def _profile(self, stage: str):
+        if not self._profiled(stage):
+            yield
+            return
+
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        if self.profiler == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler as PyinstrumentProfiler
+            except ImportError as ex:
+                raise ImportError("pyinstrument is not installed, install it or profile with cprofile") from ex
+            profiler = PyinstrumentProfiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                profile_file = self.profile_dir / f'{stage}.html'
+                profile_file.write_text(profiler.output_html())
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                profile_file = self.profile_dir / f'{stage}.prof'
+                profiler.dump_stats(profile_file)
+        self.logger.info("Profile of stage %s written to %s", stage, profile_file)
+
+    def add(self, metrics: StageMetrics):
+        if metrics.stage not in self.stages:
+            self.stages[metrics.stage] = StageMetrics(metrics.stage)
+        self.stages[metrics.stage].add(metrics)
+
+    def merge(self, stages: dict[str, StageMetrics]):
+        """Adds metrics measured elsewhere, e.g. by the profiler of a worker process"""
+        for metrics in stages.values():
+            self.add(metrics)
+
+    def to_dict(self) -> dict:
+        stages = {}
+        for stage, metrics in self.stages.items():
+            if metrics.audio_s is None and self.audio_s is not None:
+                metrics = StageMetrics(**{**asdict(metrics), 'audio_s': self.audio_s})
+            stages[stage] = metrics.to_dict()
+        return {'audio_s': self.audio_s, **self.details, 'stages': stages}
+
+    def write_json(self, output_file: Path) -> Path:
+        with output_file.open('w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return output_file
+
+    def write_prometheus(self, output_file: Path, labels: Optional[dict[str, str]] = None) -> Path:
+        """
+        Writes the metrics in the Prometheus text format, for the node_exporter textfile
+        collector. The file is replaced atomically so the collector never reads half of it.
+        """
+        metrics = {
+            'wall_seconds': ('gauge', 'Wall clock time of the stage', 'wall_s'),
+            'cpu_seconds': ('gauge', 'CPU time of the stage', 'cpu_s'),
+            'peak_rss_bytes': ('gauge', 'Peak resident set size during the stage', 'peak_rss_bytes'),
+            'audio_seconds': ('gauge', 'Seconds of audio processed by the stage', 'audio_s'),
+            'real_time_factor': ('gauge', 'Wall time per second of audio', 'real_time_factor'),
+            'calls_total': ('counter', 'Number of times the stage ran', 'calls'),
+        }
+        stages = self.to_dict()['stages']
+        base_labels = ''.join(f',{key}="{value}"' for key, value in (labels or {}).items())
+
+        lines = []
+        for metric, (metric_type, description, field) in metrics.items():
+            name = f'{PROMETHEUS_PREFIX}_{metric}'
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for stage, values in stages.items():
+                if values[field] is not None:
+                    lines.append(f'{name}{{stage="{stage}"{base_labels}}} {values[field]}')
+
+        temp_file = output_file.with_name(output_file.name + '.tmp')
+        temp_file.write_text('\n'.join(lines) + '\n')
+        temp_file.replace(output_file)
+        return output_file
@@ -0,0 +1,82 @@
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+# SPEAKER <file> <channel> <start_s> <duration_s> <NA> <NA> <speaker> <NA> <NA>
+RTTM_START_FIELD = 3
+RTTM_DURATION_FIELD = 4
+RTTM_SPEAKER_FIELD = 7
+
+
+@dataclass
+class RTTMRecords:
+    """The speaker turns of an RTTM file, times in seconds"""
+    file_id: Optional[str]
+    start_s: np.ndarray
+    duration_s: np.ndarray
+    speaker: np.ndarray
+
+    def __len__(self):
+        return len(self.start_s)
+
+    @property
+    def end_s(self) -> np.ndarray:
+        return self.start_s + self.duration_s
+
+
+def iter_rttm(rttm_file_path: Path) -> Iterator[tuple[str, float, float, str]]:
+    """
+    Streams (file_id, start_s, duration_s, speaker) from the SPEAKER lines of an RTTM file.
+
+    Fields may be separated by any amount of whitespace; blank lines, comments and other
+    record types are skipped.
+    """
+    with Path(rttm_file_path).open('r') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) <= RTTM_SPEAKER_FIELD or fields[0] != 'SPEAKER':
+                continue
+            yield fields[1], float(fields[RTTM_START_FIELD]), float(fields[RTTM_DURATION_FIELD]), fields[RTTM_SPEAKER_FIELD]
+
+
+def read_rttm(rttm_file_path: Path) -> RTTMRecords:
+    """Reads an RTTM file into typed arrays, interning the speaker labels"""
+    file_id = None
+    starts, durations = array('d'), array('d')
+    speakers = []
+    labels = {}
+    for file, start_s, duration_s, speaker in iter_rttm(rttm_file_path):
+        if file_id is None:
+            file_id = file
+        starts.append(start_s)
+        durations.append(duration_s)
+        speakers.append(labels.setdefault(speaker, speaker))
+
+    return RTTMRecords(
+        file_id,
+        np.frombuffer(starts, dtype=np.float64),
+        np.frombuffer(durations, dtype=np.float64),
+        np.array(speakers, dtype=object),
+        )
+
+
+def format_rttm_line(file_id: str, start_s: float, duration_s: float, speaker: str) -> str:
+    return f"SPEAKER {file_id} 1 {start_s:.3f} {duration_s:.3f} <NA> <NA> {speaker} <NA> <NA>\n"
+
+
+def write_rttm(
+    rttm_file_path: Path,
+    file_id: str,
+    start_s: Iterable[float],
+    end_s: Iterable[float],
+    speaker: Iterable[str],
+    ):
+    """Writes speaker turns to an RTTM file, times rounded to milliseconds"""
+    with Path(rttm_file_path).open('w') as f:
+        f.writelines(
+            format_rttm_line(file_id, start, end - start, spk)
+            for start, end, spk in zip(np.asarray(start_s).tolist(), np.asarray(end_s).tolist(), speaker)
+            )
@@ -1,17 +1,37 @@
+from array import array
 from pathlib import Path
 
+import numpy as np
+
+from .rttm_io import iter_rttm
+from .tables import TurnTable
+
 def load_rttm_file( rttm_file_path: Path )-> list[ list[int] ]:
     """
     Load a speaker timetsamp .rttm file and return a list of lists of the form: [start_time, end_time, speaker_id]
     """
     speaker_ts = []
-    with rttm_file_path.open('r') as f:
-        lines = f.readlines()
-        for line in lines:
-            line_list = line.split(' ')
-            start = int(float(line_list[3]) * 1000)
-            end = start + int(float(line_list[4]) * 1000)
-            speaker_id = int(line_list[7].split('_')[-1])
-            speaker_ts.append([start, end, speaker_id])
+    for _, start_s, duration_s, speaker in iter_rttm(rttm_file_path):
+        start = int(start_s * 1000)
+        end = start + int(duration_s * 1000)
+        speaker_id = int(speaker.split('_')[-1])
+        speaker_ts.append([start, end, speaker_id])
+
+    return speaker_ts
+
+def load_turn_table( rttm_file_path: Path )-> TurnTable:
+    """
+    Load a speaker timestamp .rttm file straight into a columnar TurnTable, times in milliseconds
+    """
+    starts, ends, speakers = array('q'), array('q'), array('i')
+    for _, start_s, duration_s, speaker in iter_rttm(rttm_file_path):
+        start = int(start_s * 1000)
+        starts.append(start)
+        ends.append(start + int(duration_s * 1000))
+        speakers.append(int(speaker.split('_')[-1]))
 
-    return speaker_ts
\ No newline at end of file
+    return TurnTable(
+        np.frombuffer(starts, dtype=np.int64),
+        np.frombuffer(ends, dtype=np.int64),
+        np.frombuffer(speakers, dtype=np.int32),
+        )
@@ -0,0 +1,154 @@
+import numpy as np
+
+from .tables import TurnTable, WordTable
+
+
+def merge_intervals(starts: np.ndarray, ends: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Merges possibly unsorted, overlapping [start, end) intervals into sorted disjoint ones.
+    """
+    if len(starts) == 0:
+        return np.zeros(0), np.zeros(0)
+
+    order = np.argsort(starts, kind='stable')
+    starts, ends = starts[order], ends[order]
+    running_end = np.maximum.accumulate(ends)
+
+    # a new group starts wherever an interval begins after everything before it has ended
+    new_group = starts[1:] > running_end[:-1]
+    merged_starts = starts[np.r_[True, new_group]]
+    merged_ends = running_end[np.r_[new_group, True]]
+    return merged_starts, merged_ends
+
+
+def coverage(times: np.ndarray, merged_starts: np.ndarray, merged_ends: np.ndarray) -> np.ndarray:
+    """
+    Returns, for each time t, the total length of the merged intervals that lies before t.
+    The overlap of [a, b) with the intervals is then coverage(b) - coverage(a).
+    """
+    if len(merged_starts) == 0:
+        return np.zeros(len(times))
+
+    cumulative = np.concatenate(([0.0], np.cumsum(merged_ends - merged_starts)))
+    # index of the last interval starting at or before t, -1 if none
+    last = np.searchsorted(merged_starts, times, side='right') - 1
+    safe = np.maximum(last, 0)
+    partial = np.clip(np.minimum(times, merged_ends[safe]) - merged_starts[safe], 0, None)
+    return np.where(last >= 0, cumulative[safe] + partial, 0.0)
+
+
+def distance_to_intervals(times: np.ndarray, merged_starts: np.ndarray, merged_ends: np.ndarray) -> np.ndarray:
+    """Returns the distance from each time to the nearest merged interval, 0 inside one"""
+    if len(merged_starts) == 0:
+        return np.full(len(times), np.inf)
+
+    following = np.searchsorted(merged_starts, times, side='right')
+    previous = following - 1
+
+    distance_previous = np.where(
+        previous >= 0,
+        np.clip(times - merged_ends[np.maximum(previous, 0)], 0, None),
+        np.inf,
+        )
+    distance_following = np.where(
+        following < len(merged_starts),
+        merged_starts[np.minimum(following, len(merged_starts) - 1)] - times,
+        np.inf,
+        )
+    return np.minimum(distance_previous, distance_following)
+
+
+def speaker_overlap_scores(
+    word_starts: np.ndarray,
+    word_ends: np.ndarray,
+    turn_starts: np.ndarray,
+    turn_ends: np.ndarray,
+    turn_speakers: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes how much of each word every speaker is talking over.
+
+    Returns (scores, speakers) where scores is a (words, speakers) matrix of overlap
+    durations and speakers holds the speaker id of each column. Turns may be unsorted
+    and may overlap each other, each speaker's turns are merged before scoring.
+    """
+    speakers = np.unique(turn_speakers)
+    scores = np.zeros((len(word_starts), len(speakers)))
+
+    for column, speaker in enumerate(speakers):
+        mask = turn_speakers == speaker
+        merged_starts, merged_ends = merge_intervals(turn_starts[mask], turn_ends[mask])
+        scores[:, column] = (
+            coverage(word_ends, merged_starts, merged_ends)
+            - coverage(word_starts, merged_starts, merged_ends)
+            )
+
+    return scores, speakers
+
+
+def assign_word_speakers(
+    word_starts: np.ndarray,
+    word_ends: np.ndarray,
+    turn_starts: np.ndarray,
+    turn_ends: np.ndarray,
+    turn_speakers: np.ndarray,
+    ) -> np.ndarray:
+    """
+    Assigns every word to the speaker whose turns overlap it the most. Words that no turn
+    overlaps go to the speaker with the turn nearest to the word's midpoint.
+    """
+    word_starts = np.asarray(word_starts, dtype=np.float64)
+    word_ends = np.asarray(word_ends, dtype=np.float64)
+    turn_starts = np.asarray(turn_starts, dtype=np.float64)
+    turn_ends = np.asarray(turn_ends, dtype=np.float64)
+    turn_speakers = np.asarray(turn_speakers)
+
+    scores, speakers = speaker_overlap_scores(word_starts, word_ends, turn_starts, turn_ends, turn_speakers)
+    best = np.argmax(scores, axis=1)
+
+    unassigned = scores[np.arange(len(best)), best] <= 0
+    if unassigned.any():
+        midpoints = (word_starts[unassigned] + word_ends[unassigned]) / 2
+        distances = np.empty((len(midpoints), len(speakers)))
+        for column, speaker in enumerate(speakers):
+            mask = turn_speakers == speaker
+            merged_starts, merged_ends = merge_intervals(turn_starts[mask], turn_ends[mask])
+            distances[:, column] = distance_to_intervals(midpoints, merged_starts, merged_ends)
+        best[unassigned] = np.argmin(distances, axis=1)
+
+    return speakers[best]
+
+
+def get_words_speaker_mapping_by_overlap(wrd_ts, spk_ts) -> list[dict]:
+    """
+    Map words to speakers by overlap-weighted speaker scores.
+
+    Unlike get_words_speaker_mapping, the turns do not need to be sorted or disjoint:
+    a word spoken during overlapping speech goes to the speaker covering most of it.
+    Takes and returns the same shapes as get_words_speaker_mapping. Without any turns
+    every word keeps the unassigned speaker -1, as in map_word_table_speakers.
+    """
+    if not wrd_ts:
+        return []
+
+    word_starts_ms = np.array([int(wrd_dict['start'] * 1000) for wrd_dict in wrd_ts], dtype=np.int64)
+    word_ends_ms = np.array([int(wrd_dict['end'] * 1000) for wrd_dict in wrd_ts], dtype=np.int64)
+    turns = np.asarray(spk_ts, dtype=np.int64).reshape(-1, 3)
+
+    if len(turns) == 0:
+        speakers = np.full(len(wrd_ts), -1)
+    else:
+        speakers = assign_word_speakers(word_starts_ms, word_ends_ms, turns[:, 0], turns[:, 1], turns[:, 2])
+
+    return [
+        {'word': wrd_dict['text'], 'start_time': int(start), 'end_time': int(end), 'speaker': int(speaker)}
+        for wrd_dict, start, end, speaker in zip(wrd_ts, word_starts_ms, word_ends_ms, speakers)
+    ]
+
+
+def map_word_table_speakers(words: WordTable, turns: TurnTable) -> WordTable:
+    """Columnar get_words_speaker_mapping_by_overlap, returns words with their speakers filled in"""
+    if len(words) == 0 or len(turns) == 0:
+        return words
+    speakers = assign_word_speakers(words.start_ms, words.end_ms, turns.start_ms, turns.end_ms, turns.speaker)
+    return words.with_speakers(speakers)
@@ -0,0 +1,205 @@
+import json
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+WORD_COLUMNS = ('start_ms', 'end_ms', 'text_id', 'speaker', 'score')
+TEXT_POOL_FILE = 'text_pool.json'
+
+
+class StringPool:
+    """Interns strings so that repeated words are stored once and referenced by an int32 id"""
+
+    def __init__(self, strings: Optional[list[str]] = None):
+        self.strings: list[str] = []
+        self._ids: dict[str, int] = {}
+        for string in strings or []:
+            self.intern(string)
+
+    def intern(self, string: str) -> int:
+        string_id = self._ids.get(string)
+        if string_id is None:
+            string_id = self._ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def intern_all(self, strings: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.intern(s) for s in strings), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, string_id: int) -> str:
+        return self.strings[string_id]
+
+
+@dataclass
+class TurnTable:
+    """Columnar speaker turns, times in milliseconds"""
+    start_ms: np.ndarray
+    end_ms: np.ndarray
+    speaker: np.ndarray
+
+    def __len__(self):
+        return len(self.start_ms)
+
+    @classmethod
+    def from_lists(cls, spk_ts: list[list[int]]) -> 'TurnTable':
+        """Adapter from the [start_ms, end_ms, speaker_id] lists of load_rttm_file"""
+        turns = np.asarray(spk_ts, dtype=np.int64).reshape(-1, 3)
+        return cls(turns[:, 0].copy(), turns[:, 1].copy(), turns[:, 2].astype(np.int32))
+
+    def to_lists(self) -> list[list[int]]:
+        return [[int(s), int(e), int(spk)] for s, e, spk in zip(self.start_ms, self.end_ms, self.speaker)]
+
+    @property
+    def nbytes(self) -> int:
+        return self.start_ms.nbytes + self.end_ms.nbytes + self.speaker.nbytes
+
+
+@dataclass
+class WordTable:
+    """
+    Columnar words: times in milliseconds, a speaker id per word (-1 until assigned),
+    an alignment score per word (NaN when unknown), and the text as ids into a shared
+    string pool.
+    """
+    start_ms: np.ndarray
+    end_ms: np.ndarray
+    text_id: np.ndarray
+    text_pool: StringPool
+    speaker: np.ndarray = None
+    score: np.ndarray = None
+    _texts: Optional[list[str]] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.speaker is None:
+            self.speaker = np.full(len(self.start_ms), -1, dtype=np.int32)
+        if self.score is None:
+            self.score = np.full(len(self.start_ms), np.nan, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.start_ms)
+
+    @property
+    def texts(self) -> list[str]:
+        """The text of every word, references into the pool rather than new strings"""
+        if self._texts is None:
+            strings = self.text_pool.strings
+            self._texts = [strings[i] for i in self.text_id.tolist()]
+        return self._texts
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.start_ms, self.end_ms, self.text_id, self.speaker, self.score)
+        return sum(a.nbytes for a in arrays)
+
+    def select(self, index) -> 'WordTable':
+        """Returns the words at a slice, mask or index array, sharing the string pool"""
+        return WordTable(self.start_ms[index], self.end_ms[index], self.text_id[index], self.text_pool,
+                         self.speaker[index], self.score[index])
+
+    def with_speakers(self, speaker: np.ndarray) -> 'WordTable':
+        """Returns a table sharing every column except the speakers"""
+        return WordTable(self.start_ms, self.end_ms, self.text_id, self.text_pool,
+                         np.asarray(speaker, dtype=np.int32), self.score, self._texts)
+
+    @classmethod
+    def from_word_timestamps(cls, wrd_ts: Iterable[dict]) -> 'WordTable':
+        """Adapter from Whisper word dicts: {'text', 'start', 'end', 'score'?}, times in seconds"""
+        pool = StringPool()
+        starts, ends, text_ids, scores = [], [], [], []
+        for wrd_dict in wrd_ts:
+            starts.append(int(wrd_dict['start'] * 1000))
+            ends.append(int(wrd_dict['end'] * 1000))
+            text_ids.append(pool.intern(wrd_dict['text']))
+            scores.append(wrd_dict.get('score', np.nan))
+        return cls(
+            np.array(starts, dtype=np.int64),
+            np.array(ends, dtype=np.int64),
+            np.array(text_ids, dtype=np.int32),
+            pool,
+            score=np.array(scores, dtype=np.float32),
+            )
+
+    @classmethod
+    def from_records(cls, word_speaker_mapping: list[dict]) -> 'WordTable':
+        """Adapter from word speaker mapping dicts: {'word', 'start_time', 'end_time', 'speaker'}, times in ms"""
+        pool = StringPool()
+        return cls(
+            np.array([d['start_time'] for d in word_speaker_mapping], dtype=np.int64),
+            np.array([d['end_time'] for d in word_speaker_mapping], dtype=np.int64),
+            pool.intern_all(d['word'] for d in word_speaker_mapping),
+            pool,
+            speaker=np.array([d['speaker'] for d in word_speaker_mapping], dtype=np.int32),
+            )
+
+    def to_records(self) -> list[dict]:
+        """Adapter to word speaker mapping dicts"""
+        return [
+            {'word': text, 'start_time': start, 'end_time': end, 'speaker': speaker}
+            for text, start, end, speaker in zip(
+                self.texts, self.start_ms.tolist(), self.end_ms.tolist(), self.speaker.tolist())
+        ]
+
+    def to_word_timestamps(self) -> list[dict]:
+        """Adapter to Whisper word dicts, times in seconds, for JSONL export. Unknown scores are left out."""
+        word_ts = []
+        for text, start, end, score in zip(self.texts, self.start_ms.tolist(), self.end_ms.tolist(), self.score.tolist()):
+            wrd_dict = {'text': text, 'start': start / 1000, 'end': end / 1000}
+            if not math.isnan(score):
+                wrd_dict['score'] = score
+            word_ts.append(wrd_dict)
+        return word_ts
+
+    def save_columns(self, directory: Path) -> list[Path]:
+        """
+        Saves every column as its own .npy file plus the string pool as JSON, so that the
+        columns can be memory-mapped by load_columns. Returns the files written.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for column in WORD_COLUMNS:
+            files.append(directory / f'{column}.npy')
+            np.save(files[-1], getattr(self, column))
+
+        files.append(directory / TEXT_POOL_FILE)
+        with files[-1].open('w') as f:
+            json.dump(self.text_pool.strings, f)
+        return files
+
+    @classmethod
+    def load_columns(cls, directory: Path, mmap: bool = True) -> 'WordTable':
+        """Loads a table saved by save_columns, memory-mapping the columns unless mmap is False"""
+        mmap_mode = 'r' if mmap else None
+        columns = {column: np.load(directory / f'{column}.npy', mmap_mode=mmap_mode) for column in WORD_COLUMNS}
+        with (directory / TEXT_POOL_FILE).open('r') as f:
+            text_pool = StringPool(json.load(f))
+        return cls(text_pool=text_pool, **columns)
+
+    def save(self, path: Path):
+        """Saves the table as an uncompressed .npz"""
+        np.savez(
+            path,
+            start_ms=self.start_ms,
+            end_ms=self.end_ms,
+            text_id=self.text_id,
+            speaker=self.speaker,
+            score=self.score,
+            text_pool=np.array(self.text_pool.strings, dtype=str),
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> 'WordTable':
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data['start_ms'],
+                data['end_ms'],
+                data['text_id'],
+                StringPool(data['text_pool'].tolist()),
+                speaker=data['speaker'],
+                score=data['score'],
+                )
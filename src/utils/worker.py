@@ -0,0 +1,33 @@
+import os
+from typing import Optional
+
+from .logger import configure_logging
+from .model_cache import model_cache
+
+THREAD_ENVIRONMENT_VARIABLES = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+
+def init_worker(
+    num_threads: int,
+    verbose: bool = False,
+    max_models: Optional[int] = None,
+    memory_budget_bytes: Optional[int] = None,
+    ):
+    """
+    Process pool initializer that pins the intra-op thread pools of a worker process
+    to its CPU thread budget, sets up console logging and applies the parent's model
+    cache limits, which a spawned worker does not inherit.
+    """
+    for variable in THREAD_ENVIRONMENT_VARIABLES:
+        os.environ[variable] = str(num_threads)
+
+    import torch
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # can only be set before any inter-op work has started
+        pass
+
+    configure_logging(verbose=verbose)
+    model_cache.configure(max_models, memory_budget_bytes)
@@ -0,0 +1,2 @@
+from .subtitle_writer import SUBTITLE_FORMATS, SubtitleWriter, format_timestamp, save_subtitles, split_sentence
+from .web_vtt_converter import WebVTTConverter
\ No newline at end of file
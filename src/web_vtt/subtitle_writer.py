@@ -0,0 +1,141 @@
+from pathlib import Path
+from typing import Iterable, Optional
+
+from utils import LoggingObject
+
+SUBTITLE_FORMATS = ('vtt', 'srt')
+MAX_CUE_CHARS = 84          # two lines of 42 characters
+MAX_CUE_DURATION_S = 7.0
+
+
+def format_timestamp(time_ms: int, subtitle_format: str = 'vtt') -> str:
+    """Formats milliseconds as HH:MM:SS.mmm for WebVTT or HH:MM:SS,mmm for SRT"""
+    time_ms = max(int(round(time_ms)), 0)
+    hours, time_ms = divmod(time_ms, 3_600_000)
+    minutes, time_ms = divmod(time_ms, 60_000)
+    seconds, milliseconds = divmod(time_ms, 1000)
+    separator = ',' if subtitle_format == 'srt' else '.'
+    return f'{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}'
+
+
+def split_sentence(
+    sentence: dict,
+    max_cue_chars: int = MAX_CUE_CHARS,
+    max_cue_duration_s: float = MAX_CUE_DURATION_S,
+    ) -> list[dict]:
+    """
+    Splits a sentence {'speaker', 'start_time', 'end_time', 'text'}, times in milliseconds,
+    into cues of at most max_cue_chars characters and max_cue_duration_s seconds. Cuts fall
+    between words and cue times are interpolated by character position, since a sentence
+    does not carry the times of its words. A single word is never split.
+    """
+    words = sentence['text'].split()
+    start_ms, end_ms = sentence['start_time'], sentence['end_time']
+    total_chars = max(len(' '.join(words)), 1)
+    ms_per_char = (end_ms - start_ms) / total_chars
+    max_cue_ms = max_cue_duration_s * 1000
+
+    cues = []
+    cue_words, cue_start_char, position = [], 0, 0
+    for word in words:
+        word_end_char = position + len(word)
+        if cue_words and (
+            word_end_char - cue_start_char > max_cue_chars
+            or (word_end_char - cue_start_char) * ms_per_char > max_cue_ms
+            ):
+            cues.append((cue_words, cue_start_char, position - 1))
+            cue_words, cue_start_char = [], position
+        cue_words.append(word)
+        position = word_end_char + 1
+    if cue_words:
+        cues.append((cue_words, cue_start_char, total_chars))
+
+    return [
+        {
+            'speaker': sentence['speaker'],
+            'start_time': int(round(start_ms + first_char * ms_per_char)),
+            'end_time': end_ms if last_char == total_chars else int(round(start_ms + last_char * ms_per_char)),
+            'text': ' '.join(cue_words),
+        }
+        for cue_words, first_char, last_char in cues
+    ]
+
+
+class SubtitleWriter(LoggingObject):
+    """
+    Writes sentences as WebVTT or SRT cues, to disk as soon as each sentence arrives.
+
+    Long sentences are split into cue-sized pieces. The file is flushed after every
+    sentence, so a player or a live caption feed can follow it while it grows.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        output_file: Path,
+        subtitle_format: Optional[str] = None,
+        max_cue_chars: int = MAX_CUE_CHARS,
+        max_cue_duration_s: float = MAX_CUE_DURATION_S,
+        ):
+        super().__init__(name)
+
+        subtitle_format = subtitle_format or output_file.suffix.lstrip('.')
+        if subtitle_format not in SUBTITLE_FORMATS:
+            raise ValueError(f"Unknown subtitle format: {subtitle_format}, expected one of {SUBTITLE_FORMATS}")
+
+        self.output_file = output_file
+        self.subtitle_format = subtitle_format
+        self.max_cue_chars = max_cue_chars
+        self.max_cue_duration_s = max_cue_duration_s
+
+        self.cues_written = 0
+        self._file = None
+
+    def __enter__(self) -> 'SubtitleWriter':
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        self._file = self.output_file.open('w', encoding='utf-8')
+        if self.subtitle_format == 'vtt':
+            self._file.write('WEBVTT\n\n')
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self.logger.info("Wrote %s cues to %s", self.cues_written, self.output_file)
+
+    def format_cue(self, cue: dict) -> str:
+        start = format_timestamp(cue['start_time'], self.subtitle_format)
+        end = format_timestamp(cue['end_time'], self.subtitle_format)
+        if self.subtitle_format == 'srt':
+            return f"{self.cues_written}\n{start} --> {end}\n{cue['speaker']}: {cue['text']}\n\n"
+        return f"{start} --> {end}\n<v {cue['speaker']}>{cue['text']}\n\n"
+
+    def write(self, sentence: dict):
+        """Writes one sentence, {'speaker', 'start_time', 'end_time', 'text'} with times in milliseconds"""
+        for cue in split_sentence(sentence, self.max_cue_chars, self.max_cue_duration_s):
+            if not cue['text']:
+                continue
+            self.cues_written += 1
+            self._file.write(self.format_cue(cue))
+        self._file.flush()
+
+    def write_all(self, sentences: Iterable[dict]) -> Path:
+        for sentence in sentences:
+            self.write(sentence)
+        return self.output_file
+
+
+def save_subtitles(sentences: list[dict], output_dir: Path, subtitle_formats: Iterable[str] = SUBTITLE_FORMATS) -> list[Path]:
+    """Writes the sentences as diarization.<format> in output_dir for each format"""
+    output_files = []
+    for subtitle_format in subtitle_formats:
+        output_file = output_dir / f'diarization.{subtitle_format}'
+        with SubtitleWriter("SubtitleWriter", output_file, subtitle_format) as writer:
+            output_files.append(writer.write_all(sentences))
+    return output_files
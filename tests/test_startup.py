@@ -0,0 +1,41 @@
+"""
+The CLI must start fast: importing the packages main.py uses may not load torch or any
+other heavy framework, and `main.py --help` must finish within STARTUP_TARGET_S.
+benchmarks/bench_startup.py tracks the same numbers over time.
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+from time import perf_counter
+
+SOURCE_DIR = Path(__file__).resolve().parent.parent / 'src'
+STARTUP_TARGET_S = 0.5
+HEAVY_MODULES = ('torch', 'whisper', 'whisperx', 'nemo', 'pandas', 'scipy')
+CLI_PACKAGES = (
+    'utils', 'pipeline', 'punctuation_realignment', 'streaming', 'web_vtt',
+    'audio_processing', 'transcriber', 'diarizer', 'rttm_combiner', 'speaker_index',
+)
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    """Runs a fresh interpreter in src, where main.py imports its packages from"""
+    return subprocess.run([sys.executable, *args], cwd=SOURCE_DIR, capture_output=True, text=True, check=True)
+
+
+def test_cli_packages_import_no_heavy_modules():
+    code = (
+        f'import json, sys; import {", ".join(CLI_PACKAGES)}; '
+        f'print(json.dumps(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules)))'
+    )
+    assert json.loads(run_python('-c', code).stdout) == []
+
+
+def test_cli_help_within_target():
+    # best of a few runs, so a single slow start on a busy machine does not fail the test
+    elapsed_s = []
+    for _ in range(3):
+        start = perf_counter()
+        run_python('main.py', '--help')
+        elapsed_s.append(perf_counter() - start)
+    assert min(elapsed_s) <= STARTUP_TARGET_S, f"main.py --help took {min(elapsed_s):.3f} s"